@@ -0,0 +1,86 @@
+import sys
+import os
+import argparse
+import random
+import tempfile
+import time
+# Add src to path to allow importing our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.accounting.categorizer import categorize_item
+from src.core.accounting.classifier import train, load_model, DEFAULT_DIMS
+from src.core.timing import summarize_durations
+from src.data.synthetic import DESCRIPTIONS, noisy_description
+
+
+def synthetic_samples(count, seed):
+    """Draws (description, category) pairs with the variations seen on real invoices."""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        description, category = rng.choice(DESCRIPTIONS)
+        samples.append((noisy_description(rng, description), category))
+    return samples
+
+
+def db_samples():
+    from src.api.app import create_app
+    from scripts.train_categorizer import training_samples
+    app = create_app()
+    with app.app_context():
+        return training_samples()
+
+
+def evaluate(name, predict_many, samples, repeat):
+    """Prints accuracy and per-item batch latency of a categorizer."""
+    descriptions = [d for d, _ in samples]
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predictions = predict_many(descriptions)
+        times.append((time.perf_counter() - start) / len(descriptions))
+    correct = sum(p == c for p, (_, c) in zip(predictions, samples))
+    stats = summarize_durations(times)
+    print(f"{name:<10} accuracy {correct / len(samples):>6.1%}   "
+          f"{stats['p50'] * 1e6:>7.1f}us/item (best {min(times) * 1e6:.1f}us)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the keyword and learned categorizers on the same data.")
+    parser.add_argument('--from-db', action='store_true', help="Use manual category corrections instead of synthetic items")
+    parser.add_argument('--count', type=int, default=5000, help="Synthetic samples")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--test-fraction', type=float, default=0.2)
+    parser.add_argument('--dims', type=int, default=DEFAULT_DIMS)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    samples = db_samples() if args.from_db else synthetic_samples(args.count, args.seed)
+    random.Random(args.seed).shuffle(samples)
+    split = max(1, int(len(samples) * (1 - args.test_fraction)))
+    train_set, test_set = samples[:split], samples[split:]
+    if not test_set:
+        print("Error: Not enough samples for a test set.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    model = train(train_set, dims=args.dims)
+    train_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'categorizer.model')
+        model.save(path)
+        start = time.perf_counter()
+        mapped = load_model(path)
+        load_seconds = time.perf_counter() - start
+        print(f"{len(train_set)} training / {len(test_set)} test samples; trained in {train_seconds:.2f}s, "
+              f"model {os.path.getsize(path) / 1024:.0f} KiB, mapped in {load_seconds * 1000:.2f}ms")
+
+        # No deduplication here, so every item is scored
+        evaluate('keywords', lambda ds: [categorize_item(d) for d in ds], test_set, args.repeat)
+        evaluate('linear', lambda ds: [mapped.predict(d) for d in ds], test_set, args.repeat)
+        mapped.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import sys
+import os
+import argparse
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+# Add src to path to allow importing our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.accounting.batch import EntryBatch
+from src.core.accounting.entry import AccountingEntry
+from src.core.accounting.journal import append_invoice_entries, generate_entries_from_invoices
+from src.core.export.fec_exporter import export_to_fec, write_fec
+from src.data.synthetic import random_invoice
+
+
+@dataclass
+class DictEntry:
+    """AccountingEntry as it was before `slots=True`, for comparison."""
+    entry_date: date
+    account_number: int
+    account_name: str
+    description: str
+    debit: Optional[float] = None
+    credit: Optional[float] = None
+
+    def __post_init__(self):
+        if self.debit is None and self.credit is None:
+            raise ValueError("An accounting entry must have either a debit or a credit value.")
+        if self.debit is not None and self.credit is not None:
+            raise ValueError("An accounting entry cannot have both a debit and a credit value.")
+
+
+def entry_rows(invoices):
+    """The (date, account, name, description, debit, credit) rows of the invoices' journal entries."""
+    batch = EntryBatch()
+    for invoice in invoices:
+        append_invoice_entries(invoice, batch)
+    return [(e.entry_date, e.account_number, e.account_name, e.description, e.debit, e.credit) for e in batch]
+
+
+def measure(name, build):
+    """Prints the time and the memory a container of entries takes to build."""
+    # Timed without tracemalloc, which slows allocations down unevenly
+    start = time.perf_counter()
+    build()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<16} {seconds:>7.3f}s   {size / 1024 / 1024:>8.1f} MiB   {size / len(result):>6.0f} B/entry")
+    return result
+
+
+def build_batch(rows):
+    batch = EntryBatch()
+    for row in rows:
+        batch.append(*row)
+    batch.validate()
+    return batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory and build time of entry objects and EntryBatch.")
+    parser.add_argument('--invoices', type=int, default=100000, help="Random invoices to generate entries from")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = entry_rows(random_invoice(rng) for _ in range(args.invoices))
+    print(f"{len(rows)} entries from {args.invoices} invoices")
+
+    measure('dataclass', lambda: [DictEntry(*row) for row in rows])
+    entries = measure('slots dataclass', lambda: [AccountingEntry(*row) for row in rows])
+    batch = measure('EntryBatch', lambda: build_batch(rows))
+
+    for name, source in (('entries', entries), ('EntryBatch', batch)):
+        start = time.perf_counter()
+        export_to_fec(source)
+        print(f"FEC export from {name:<10} {time.perf_counter() - start:>7.3f}s")
+
+    # A closing run streamed from invoices to a file, against the same run held in memory
+    invoices = [random_invoice(rng) for _ in range(args.invoices)]
+    for name, run in (('in memory', lambda out: out.write(export_to_fec(list(generate_entries_from_invoices(invoices))))),
+                      ('streamed', lambda out: write_fec(generate_entries_from_invoices(invoices), out))):
+        with open(os.devnull, 'w', encoding='utf-8') as out:
+            tracemalloc.start()
+            start = time.perf_counter()
+            run(out)
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        print(f"closing run {name:<10} {seconds:>7.3f}s   peak {peak / 1024 / 1024:>8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
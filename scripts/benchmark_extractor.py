@@ -0,0 +1,83 @@
+import sys
+import os
+import argparse
+import random
+import re
+import time
+# Add src to path to allow importing our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.ocr.extractor import InvoiceScanner, _parse_amount, _parse_line_items
+from src.data.synthetic import random_invoice, render_text
+
+
+def legacy_extract(text):
+    """The per-field `re.search` extraction used before InvoiceScanner, kept as a baseline."""
+    def search(pattern):
+        match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+        return match.group(1).strip() if match else None
+
+    patterns = {
+        'supplier': r"^(.*?)\n",
+        'invoice_id': r"FACTURE N°:\s*(\S+)",
+        'date': r"Date:\s*(\d{2}/\d{2}/\d{4})",
+        'total_ht': r"Total HT:\s*([\d\s,.]+)",
+        'total_ttc': r"Total TTC:\s*([\d\s,.]+)"
+    }
+    raw_data = {key: search(pat) for key, pat in patterns.items()}
+    vat_rate = None
+    vat_match = re.search(r"TVA\s*\(?\s*(\d+\.?\d*)\s*%\s*\)?:\s*([\d\s,.]+)", text, re.IGNORECASE)
+    if vat_match:
+        vat_rate = _parse_amount(vat_match.group(1))
+        vat_amount_str = vat_match.group(2)
+    else:
+        vat_amount_str = search(r"TVA:\s*([\d\s,.]+)")
+    return {
+        'supplier': raw_data['supplier'],
+        'invoice_id': raw_data['invoice_id'],
+        'date': raw_data['date'],
+        'total_ht': _parse_amount(raw_data['total_ht']),
+        'vat_rate': vat_rate,
+        'vat_amount': _parse_amount(vat_amount_str),
+        'total_ttc': _parse_amount(raw_data['total_ttc']),
+        'line_items': _parse_line_items(text)
+    }
+
+
+def best_of(runs, func):
+    """Returns the fastest of `runs` timings of `func()`, in seconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark of invoice text extraction.")
+    parser.add_argument('--count', type=int, default=10000, help="Number of synthetic OCR texts")
+    parser.add_argument('--runs', type=int, default=5, help="Timed runs, the best one is reported")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [render_text(random_invoice(rng)) for _ in range(args.count)]
+    scanner = InvoiceScanner()
+
+    mismatches = sum(1 for text, data in zip(texts, scanner.extract_many(texts)) if data != legacy_extract(text))
+    if mismatches:
+        print(f"Warning: {mismatches} text(s) extracted differently by the two implementations")
+
+    results = {
+        'legacy re.search': best_of(args.runs, lambda: [legacy_extract(t) for t in texts]),
+        'InvoiceScanner': best_of(args.runs, lambda: list(scanner.extract_many(texts))),
+        'header fields only (scan)': best_of(args.runs, lambda: [scanner.scan(t) for t in texts]),
+    }
+    print(f"{args.count} synthetic invoices, best of {args.runs} runs")
+    for name, seconds in results.items():
+        print(f"{name:<28} {seconds:8.3f}s  {seconds / args.count * 1e6:8.1f} µs/invoice")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import sys
+import os
+import argparse
+import csv
+import io
+import random
+import tempfile
+import time
+# Add src to path to allow importing our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.accounting.batch import EntryBatch
+from src.core.accounting.journal import append_invoice_entries
+from src.core.export.fec_exporter import FEC_HEADER, export_to_fec
+from src.data.synthetic import random_invoice
+
+
+def benchmark_database(batch, worker_counts):
+    """Times the sequential and sharded exports of `batch` stored as one fiscal year in SQLite."""
+    from datetime import date
+    from sqlalchemy import create_engine, insert
+    from src.api.extensions import db
+    from src.core.accounting.batch import DEBIT
+    from src.core.accounting.models import JournalEntry
+    from src.core.auth.models import User  # Referenced by the journal's foreign keys
+    from src.core.invoicing.models import Invoice
+    from src.core.export.parallel import fec_chunks, parallel_fec_chunks
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_uri = 'sqlite:///' + os.path.join(tmp, 'journal.db')
+        engine = create_engine(database_uri)
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            rows = []
+            for ordinal, number, account_number, name_id, description, side, cents in zip(
+                    batch.dates, batch.numbers, batch.accounts, batch.name_ids, batch.descriptions, batch.sides,
+                    batch.cents):
+                entry_date = date.fromordinal(ordinal)
+                rows.append({'user_id': 1, 'fiscal_year': entry_date.year, 'ecriture_num': number,
+                             'journal_code': 'AC', 'entry_date': entry_date, 'account_number': account_number,
+                             'account_name': batch.names[name_id], 'description': description,
+                             'debit_cents': cents if side == DEBIT else None,
+                             'credit_cents': None if side == DEBIT else cents})
+                if len(rows) == 50000:
+                    connection.execute(insert(JournalEntry), rows)
+                    rows = []
+            if rows:
+                connection.execute(insert(JournalEntry), rows)
+        engine.dispose()
+        year = date.fromordinal(batch.dates[0]).year
+
+        start = time.perf_counter()
+        sequential = ''.join(fec_chunks(database_uri, 1, year))
+        baseline = time.perf_counter() - start
+        print(f"{'sequential':<22} {baseline:>7.3f}s")
+        for workers in worker_counts:
+            start = time.perf_counter()
+            output = ''.join(parallel_fec_chunks(database_uri, 1, year, workers=workers))
+            seconds = time.perf_counter() - start
+            if output != sequential:
+                print(f"Error: the export on {workers} workers differs from the sequential one")
+                sys.exit(1)
+            print(f"{f'{workers} workers':<22} {seconds:>7.3f}s   x{baseline / seconds:.2f}")
+
+
+def csv_export(entries, journal_code="AC", journal_lib="ACHATS"):
+    """The exporter as it was before FecWriter: csv.writer and per-field formatting, for comparison."""
+    output = io.StringIO()
+    writer = csv.writer(output, delimiter='\t', lineterminator='\n')
+    writer.writerow(FEC_HEADER)
+    for entry in entries:
+        entry_date_str = entry.entry_date.strftime('%Y%m%d')
+        debit_str = f"{entry.debit:.2f}".replace('.', ',') if entry.debit is not None else ""
+        credit_str = f"{entry.credit:.2f}".replace('.', ',') if entry.credit is not None else ""
+        writer.writerow([
+            journal_code, journal_lib, str(entry.ecriture_num).zfill(5), entry_date_str,
+            str(entry.account_number), entry.account_name, "", "", "", entry_date_str, entry.description,
+            debit_str, credit_str, "", "", entry_date_str, "", "",
+        ])
+    return output.getvalue()
+
+
+def build_batch(count, seed):
+    """Journal entries of random invoices, repeated up to `count` entries."""
+    rng = random.Random(seed)
+    sample = EntryBatch()
+    number = 1
+    while len(sample) < min(count, 100000):
+        append_invoice_entries(random_invoice(rng), sample, number)
+        number += 1
+    batch = EntryBatch()
+    while len(batch) < count:
+        batch.extend(sample)
+    batch.truncate(count)
+    return batch
+
+
+def best_of(repeat, function):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the FEC writer with csv.writer on the same entries.")
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--database', action='store_true',
+                        help="Store the entries in SQLite and time the sequential and sharded exports")
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    batch = build_batch(args.entries, args.seed)
+    if args.database:
+        print(f"{len(batch)} entries")
+        benchmark_database(batch, args.workers)
+        return
+    entries = batch.to_entries()
+    print(f"{len(batch)} entries")
+
+    baseline_seconds, baseline = best_of(args.repeat, lambda: csv_export(entries))
+    print(f"{'csv.writer':<22} {baseline_seconds:>7.3f}s   {len(batch) / baseline_seconds:>10,.0f} rows/s")
+    for name, source in (('FecWriter (entries)', entries), ('FecWriter (batch)', batch)):
+        seconds, output = best_of(args.repeat, lambda: export_to_fec(source))
+        if output != baseline:
+            print(f"Error: {name} output differs from csv.writer")
+            sys.exit(1)
+        print(f"{name:<22} {seconds:>7.3f}s   {len(batch) / seconds:>10,.0f} rows/s   "
+              f"x{baseline_seconds / seconds:.2f}")
+    print(f"Outputs identical ({len(baseline.encode('utf-8')) / 1024 / 1024:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import sys
+import os
+import argparse
+import glob
+import random
+import tempfile
+import time
+# Add src to path to allow importing our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.ocr.reader import extract_text_from_image
+from src.core.ocr.adaptive import AdaptiveReader
+from src.core.ocr.extractor import extract_invoice_data
+from src.core.ocr.evaluation import load_ground_truth, score_fields, SCORED_FIELDS
+from src.core.accounting.journal import generate_entries_from_invoice
+from src.core.export.fec_exporter import export_to_fec
+from src.core.timing import summarize_durations
+from src.data.synthetic import generate_corpus, random_invoice, render_text
+
+STAGES = ('ocr', 'extract', 'journal', 'export')
+
+
+def run_pipeline(documents, read_text):
+    """
+    Runs every document through OCR, extraction, journal entry generation and
+    FEC export, timing each stage.
+
+    Args:
+        documents: (source, ground truth or None) pairs.
+        read_text: Returns the OCR text of a source.
+
+    Returns:
+        Per-stage durations, per-field (correct, checked) counts, the number of
+        documents whose entries could not be generated, and the elapsed time.
+    """
+    durations = {stage: [] for stage in STAGES}
+    fields = {}
+    rejected = 0
+    start = time.perf_counter()
+    for source, truth in documents:
+        t0 = time.perf_counter()
+        text = read_text(source)
+        t1 = time.perf_counter()
+        data = extract_invoice_data(text)
+        t2 = time.perf_counter()
+        durations['ocr'].append(t1 - t0)
+        durations['extract'].append(t2 - t1)
+        try:
+            entries = generate_entries_from_invoice(data)
+        except ValueError:
+            # Unreadable invoices are counted, as the journal stage rejects them in production
+            rejected += 1
+            entries = None
+        t3 = time.perf_counter()
+        durations['journal'].append(t3 - t2)
+        if entries is not None:
+            export_to_fec(entries)
+            durations['export'].append(time.perf_counter() - t3)
+        if truth:
+            for field, ok in score_fields(truth, data).items():
+                correct, checked = fields.get(field, (0, 0))
+                fields[field] = (correct + ok, checked + 1)
+    return durations, fields, rejected, time.perf_counter() - start
+
+
+def print_report(durations, fields, rejected, elapsed):
+    count = len(durations['ocr'])
+    print(f"{count} invoice(s) in {elapsed:.2f}s, {count / elapsed if elapsed > 0 else 0.0:.1f} invoices/s, "
+          f"{rejected} rejected by the journal stage")
+    print(f"{'stage':<8} {'count':>6} {'mean':>10} {'p50':>10} {'p95':>10} {'max':>10}")
+    for stage in STAGES:
+        stats = summarize_durations(durations[stage])
+        print(f"{stage:<8} {stats['count']:>6} " + " ".join(
+            f"{stats[key] * 1000:>8.2f}ms" for key in ('mean', 'p50', 'p95', 'max')))
+    if fields:
+        print("field accuracy:")
+        total_correct = total_checked = 0
+        for field in SCORED_FIELDS + ('line_items',):
+            if field in fields:
+                correct, checked = fields[field]
+                total_correct += correct
+                total_checked += checked
+                print(f"  {field:<12} {correct / checked:>6.1%} ({correct}/{checked})")
+        print(f"  {'overall':<12} {total_correct / total_checked:>6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the invoice pipeline (OCR, extraction, journal, FEC export) and score its accuracy.")
+    parser.add_argument('images', nargs='?', default=os.path.join('data', 'invoices', '*.png'),
+                        help="Glob of images with ground-truth JSON next to them (default: data/invoices/*.png)")
+    parser.add_argument('--generate', type=int, metavar='N',
+                        help="Benchmark N freshly generated synthetic invoices instead of IMAGES")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for --generate")
+    parser.add_argument('--noise', type=float, default=0.3, help="Maximum scan noise for --generate")
+    parser.add_argument('--skip-ocr', action='store_true',
+                        help="With --generate, feed the rendered text instead of running Tesseract")
+    parser.add_argument('--adaptive', action='store_true', help="Read images with the adaptive multi-pass reader")
+    args = parser.parse_args()
+    if args.skip_ocr and not args.generate:
+        parser.error("--skip-ocr requires --generate")
+
+    if args.skip_ocr:
+        rng = random.Random(args.seed)
+        invoices = [random_invoice(rng) for _ in range(args.generate)]
+        results = run_pipeline([(render_text(inv), inv) for inv in invoices], read_text=lambda text: text)
+        print_report(*results)
+        return
+
+    if args.adaptive:
+        reader = AdaptiveReader()
+        read_text = lambda path: reader.read_invoice(path)[0]
+    else:
+        read_text = extract_text_from_image
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.generate:
+            paths = generate_corpus(tmp, args.generate, seed=args.seed, noise=args.noise)
+        else:
+            paths = sorted(glob.glob(args.images))
+        if not paths:
+            print(f"Error: No images found for '{args.images}'")
+            sys.exit(1)
+        results = run_pipeline([(path, load_ground_truth(path)) for path in paths], read_text)
+
+    print_report(*results)
+    if args.adaptive:
+        for name, stats in reader.stats.summary()['passes'].items():
+            print(f"pass '{name}': {stats['runs']} run(s), accepted {stats['accepted']} ({stats['accept_rate']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import sys
+import os
+import argparse
+import glob
+import time
+# Add src to path to allow importing our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from src.core.ocr.preprocess import PreprocessConfig, STEPS, NO_PREPROCESSING, DEFAULT_PREPROCESSING, FULL_PREPROCESSING, preprocess_image
+from src.core.ocr.reader import OCR_LANG, get_backend
+from src.core.ocr.extractor import extract_invoice_data
+from src.core.ocr.evaluation import load_ground_truth, score_fields
+from src.core.timing import summarize_durations
+
+# The pipelines compared, from no preprocessing to every step
+PRESETS = {
+    'none': NO_PREPROCESSING,
+    'default': DEFAULT_PREPROCESSING,
+    'binarize': PreprocessConfig(steps=('downscale', 'grayscale', 'binarize')),
+    'deskew+crop': PreprocessConfig(steps=('downscale', 'grayscale', 'deskew', 'crop')),
+    'full': FULL_PREPROCESSING,
+}
+
+
+def benchmark(image_paths, config, repeat):
+    """
+    Runs preprocessing and OCR on every image `repeat` times.
+
+    Returns:
+        Per-step timings, OCR timings, total timings and the field accuracy.
+    """
+    step_times = {step: [] for step in STEPS}
+    ocr_times = []
+    totals = []
+    correct = checked = 0
+
+    for path in image_paths:
+        truth = load_ground_truth(path)
+        for _ in range(repeat):
+            with Image.open(path) as img:
+                start = time.perf_counter()
+                processed, timings = preprocess_image(img, config)
+                ocr_start = time.perf_counter()
+                text = get_backend().image_to_string(processed, OCR_LANG)
+                end = time.perf_counter()
+            for step, seconds in timings.items():
+                step_times[step].append(seconds)
+            ocr_times.append(end - ocr_start)
+            totals.append(end - start)
+        if truth:
+            scores = score_fields(truth, extract_invoice_data(text))
+            correct += sum(scores.values())
+            checked += len(scores)
+
+    accuracy = correct / checked if checked else None
+    return step_times, ocr_times, totals, accuracy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare OCR latency and accuracy across preprocessing pipelines.")
+    parser.add_argument('images', nargs='?', default=os.path.join('data', 'invoices', '*.png'),
+                        help="Glob of images to OCR (default: data/invoices/*.png)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per image and pipeline")
+    parser.add_argument('--presets', nargs='+', choices=sorted(PRESETS), default=list(PRESETS))
+    args = parser.parse_args()
+
+    image_paths = sorted(glob.glob(args.images))
+    if not image_paths:
+        print(f"Error: No images found for '{args.images}'")
+        sys.exit(1)
+
+    print(f"{len(image_paths)} image(s), {args.repeat} run(s) each")
+    print(f"{'pipeline':<12} {'p50 total':>10} {'p95 total':>10} {'p50 ocr':>10} {'accuracy':>9}  step p50s")
+    for name in args.presets:
+        step_times, ocr_times, totals, accuracy = benchmark(image_paths, PRESETS[name], args.repeat)
+        total_stats = summarize_durations(totals)
+        ocr_stats = summarize_durations(ocr_times)
+        steps = ", ".join(f"{step} {summarize_durations(times)['p50'] * 1000:.1f}ms"
+                          for step, times in step_times.items() if times)
+        accuracy_str = f"{accuracy:.0%}" if accuracy is not None else "n/a"
+        print(f"{name:<12} {total_stats['p50'] * 1000:>8.1f}ms {total_stats['p95'] * 1000:>8.1f}ms "
+              f"{ocr_stats['p50'] * 1000:>8.1f}ms {accuracy_str:>9}  {steps or '-'}")
+
+
+if __name__ == "__main__":
+    main()
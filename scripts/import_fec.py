@@ -0,0 +1,65 @@
+import os
+import sys
+import argparse
+import time
+
+# Add project root to the Python path to ensure `src` can be found
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.export.fec_reader import FecFormatError, import_fec, validate_fec
+
+
+def print_report(report, seconds):
+    print(f"{report.lines} line(s), {report.ecritures} écriture(s), {report.rejected} rejected, in {seconds:.1f}s")
+    if not report.valid and not report.imported:
+        print("Nothing imported: fix the errors below, or pass --skip-invalid")
+    for journal_code, (debit, credit) in sorted(report.journals.items()):
+        print(f"  {journal_code:<6} debit {debit / 100:>16,.2f}   credit {credit / 100:>16,.2f}")
+    for line, message in report.errors:
+        print(f"  line {line}: {message}")
+    if report.error_count > len(report.errors):
+        print(f"  ... and {report.error_count - len(report.errors)} more error(s)")
+
+
+def main():
+    """
+    Checks a FEC file and imports its balanced écritures into a user's journal.
+    """
+    parser = argparse.ArgumentParser(description="Validate and import a FEC file into the journal.")
+    parser.add_argument('path', help="FEC file, tab or pipe separated")
+    parser.add_argument('--user', type=int, help="User whose journal receives the écritures")
+    parser.add_argument('--encoding', default='utf-8', help="File encoding, e.g. iso-8859-15")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Lines inserted per transaction")
+    parser.add_argument('--validate-only', action='store_true', help="Check the file without importing it")
+    parser.add_argument('--skip-invalid', action='store_true',
+                        help="Import the balanced écritures of a file with errors, leaving the others out")
+    args = parser.parse_args()
+    if not args.validate_only and args.user is None:
+        parser.error("--user is required to import")
+
+    start = time.perf_counter()
+    try:
+        if args.validate_only:
+            report = validate_fec(args.path, args.encoding)
+        else:
+            from src.api.app import create_app
+
+            def progress(done, total):
+                print(f"\r{done / total:6.1%}", end='', flush=True)
+
+            app = create_app()
+            with app.app_context():
+                report = import_fec(args.path, args.user, args.encoding, args.batch_size, progress,
+                                    args.skip_invalid)
+            print()
+            print(f"{report.imported} écriture(s) imported")
+    except FecFormatError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print_report(report, time.perf_counter() - start)
+    if not report.valid:
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,190 @@
 import sys
 import os
+import argparse
+import glob
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 # Add src to path to allow importing our modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.core.ocr.reader import extract_text_from_image
+from src.core.ocr.extractor import extract_invoice_data
+from src.core.ocr.adaptive import AdaptiveReader, AdaptiveStats
+from src.core.timing import summarize_durations
 
-if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        image_path = sys.argv[1]
-        if not os.path.exists(image_path):
-            print(f"Error: Image file not found at '{image_path}'")
-            sys.exit(1)
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.pdf'}
+
+
+def collect_images(target):
+    """
+    Expands a directory (searched recursively) or a glob pattern into a sorted
+    list of image paths.
+    """
+    if os.path.isdir(target):
+        paths = []
+        for root, _, files in os.walk(target):
+            for name in files:
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                    paths.append(os.path.join(root, name))
+    else:
+        paths = [p for p in glob.glob(target, recursive=True) if os.path.isfile(p)]
+    return sorted(paths)
+
+
+def load_checkpoint(checkpoint_path):
+    """Returns the set of paths already processed by a previous run."""
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return set()
+    with open(checkpoint_path, encoding='utf-8') as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+# One adaptive reader per worker process, created on first use
+_adaptive_reader = None
+
+
+def process_image(image_path, adaptive=False):
+    """
+    Runs OCR and extraction on one image. Executed in a worker process, so it
+    only returns plain, picklable data. In adaptive mode the record also lists
+    the passes that ran, as [name, seconds, valid] triples.
+    """
+    global _adaptive_reader
+    start = time.perf_counter()
+    passes = [] if adaptive else None
+    try:
+        if adaptive:
+            if _adaptive_reader is None:
+                _adaptive_reader = AdaptiveReader()
+            text, data, _ = _adaptive_reader.read_invoice(image_path, trace=passes)
+        else:
+            text = extract_text_from_image(image_path)
+            data = extract_invoice_data(text)
+        error = None if text else "OCR returned no text"
+    except Exception as e:
+        data = None
+        error = str(e)
+    record = {
+        'path': image_path,
+        'seconds': round(time.perf_counter() - start, 4),
+        'data': data,
+        'error': error,
+    }
+    if adaptive:
+        record['passes'] = [[name, round(seconds, 4), valid] for name, seconds, valid in passes]
+    return record
+
+
+def run_batch(paths, workers, output, checkpoint_path=None, pass_stats=None):
+    """
+    Processes `paths` on a process pool and writes one JSON line per image to
+    `output` as results complete. Successfully processed paths are appended to
+    the checkpoint file so an interrupted run can resume where it stopped;
+    failed images are retried on the next run. When `pass_stats` (an
+    `AdaptiveStats`) is given, images are read adaptively and the passes
+    reported by the workers are recorded in it.
+
+    Returns:
+        A tuple (durations, error_count, elapsed_seconds).
+    """
+    checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+    durations = []
+    errors = 0
+    start = time.perf_counter()
+    pending_paths = iter(paths)
+    in_flight = set()
+    # Keep a bounded window of submitted jobs so huge archives don't queue all at once
+    window = workers * 4
 
-        text = extract_text_from_image(image_path)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                for path in pending_paths:
+                    in_flight.add(executor.submit(process_image, path, pass_stats is not None))
+                    if len(in_flight) >= window:
+                        break
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    durations.append(result['seconds'])
+                    if pass_stats is not None:
+                        for name, seconds, valid in result['passes']:
+                            pass_stats.record(name, seconds, valid)
+                        if not any(valid for _, _, valid in result['passes']):
+                            pass_stats.record_unresolved()
+                    if result['error']:
+                        errors += 1
+                    output.write(json.dumps(result, ensure_ascii=False) + '\n')
+                    output.flush()
+                    if checkpoint and not result['error']:
+                        checkpoint.write(result['path'] + '\n')
+                        checkpoint.flush()
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+    return durations, errors, time.perf_counter() - start
+
+
+def print_summary(durations, errors, elapsed, skipped, pass_stats=None):
+    """Prints the throughput summary of a batch run to stderr."""
+    stats = summarize_durations(durations)
+    rate = stats['count'] / elapsed if elapsed > 0 else 0.0
+    print("--- Batch OCR Summary ---", file=sys.stderr)
+    print(f"Images processed: {stats['count']} (errors: {errors}, skipped from checkpoint: {skipped})", file=sys.stderr)
+    print(f"Elapsed: {elapsed:.2f}s, throughput: {rate:.2f} images/s", file=sys.stderr)
+    print(f"Per image: p50 {stats['p50']:.3f}s, p95 {stats['p95']:.3f}s, max {stats['max']:.3f}s", file=sys.stderr)
+    if pass_stats is not None:
+        summary = pass_stats.summary()
+        for name, p in summary['passes'].items():
+            print(f"Pass '{name}': {p['runs']} run(s), accepted {p['accepted']} ({p['accept_rate']:.0%}), "
+                  f"p50 {p['p50']:.3f}s, p95 {p['p95']:.3f}s", file=sys.stderr)
+        print(f"Unresolved (no pass validated the totals): {summary['unresolved']}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run OCR on an image, or on a directory/glob of images in parallel.")
+    parser.add_argument('target', help="An image file, a directory, or a glob pattern (quote it), e.g. 'archive/**/*.png'")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    parser.add_argument('--output', help="Append NDJSON results to this file instead of stdout")
+    parser.add_argument('--checkpoint', help="File recording processed images, used to resume an interrupted run")
+    parser.add_argument('--backend', choices=['auto', 'pytesseract', 'tesserocr'],
+                        help="OCR engine; each worker process keeps its own (default: $OCR_BACKEND or auto)")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Try a fast low-resolution pass first and re-read only invoices whose totals do not add up")
+    args = parser.parse_args()
+    if args.backend:
+        # Read by the reader in this process and inherited by the workers
+        os.environ['OCR_BACKEND'] = args.backend
+
+    # Single image: keep the plain text output
+    if os.path.isfile(args.target):
+        text = extract_text_from_image(args.target)
         print("--- OCR Output ---")
         print(text)
         print("--------------------")
-    else:
-        print("Usage: python scripts/run_ocr.py <path_to_image>")
+        return
+
+    paths = collect_images(args.target)
+    if not paths:
+        print(f"Error: No images found for '{args.target}'")
         sys.exit(1)
+
+    done = load_checkpoint(args.checkpoint)
+    todo = [p for p in paths if p not in done]
+
+    output = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    pass_stats = AdaptiveStats([p.name for p in AdaptiveReader().passes]) if args.adaptive else None
+    try:
+        durations, errors, elapsed = run_batch(todo, max(1, args.workers), output, args.checkpoint, pass_stats)
+    finally:
+        if args.output:
+            output.close()
+    print_summary(durations, errors, elapsed, len(paths) - len(todo), pass_stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import argparse
+
+# Add project root to the Python path to ensure `src` can be found
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.api.app import create_app
+from src.api.extensions import db
+from src.core.accounting.models import CategoryMemo
+from src.core.accounting.classifier import train, DEFAULT_DIMS
+
+
+def training_samples(user_id=None):
+    """
+    Returns (description, category) pairs confirmed by users: their manual
+    corrections. The categories of other line items mostly come from the
+    keyword rules, or are the default for what they did not match, so a model
+    trained on them would only learn the rules back.
+    """
+    query = db.session.query(CategoryMemo.description, CategoryMemo.category).filter(
+        CategoryMemo.source == 'manual')
+    if user_id is not None:
+        query = query.filter(CategoryMemo.user_id == user_id)
+    return query.all()
+
+
+def main():
+    """
+    Trains the learned categorizer from manual category corrections and
+    writes it where `CATEGORIZER_MODEL_PATH` can point to.
+    """
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram line item categorizer.")
+    parser.add_argument('--output', default=None, help="Model file (default: categorizer.model in the instance folder)")
+    parser.add_argument('--user', type=int, help="Train on one user's corrections only")
+    parser.add_argument('--dims', type=int, default=DEFAULT_DIMS, help="Number of hashed feature buckets")
+    parser.add_argument('--epochs', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        samples = training_samples(args.user)
+        output = args.output or os.path.join(app.instance_path, 'categorizer.model')
+    if not samples:
+        print("Error: No manual category corrections to train on.")
+        sys.exit(1)
+
+    model = train(samples, dims=args.dims, epochs=args.epochs)
+    model.save(output)
+    print(f"Trained on {len(samples)} correction(s), {len(model.classes)} categories")
+    print(f"Model written to {output} ({os.path.getsize(output) / 1024:.0f} KiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,22 @@
+import datetime
 import os
 import sys
-from flask import Flask, jsonify, send_from_directory, make_response, request
+import tempfile
+import zlib
+from flask import (Flask, Response, jsonify, send_file, send_from_directory, make_response, request,
+                   stream_with_context)
 from werkzeug.utils import secure_filename
 
 # --- Project Path Setup ---
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 # --- Local Imports ---
-from src.api.extensions import db, bcrypt, login_manager, migrate
+from src.api.extensions import db, bcrypt, login_manager, migrate, ocr_jobs, ocr_cache, category_rules
 from src.core.auth.models import User # Ensures user_loader is registered
 from src.core.invoicing.models import Invoice, LineItem # Ensures models are registered
 from src.core.cashflow.models import Transaction # Ensures models are registered
 from src.core.vat.models import VatRecord # Ensures models are registered
+from src.core.accounting.models import CategoryRule, CategoryRuleSet, JournalEntry, AccountBalance # Ensures models are registered
 
 def create_app(config_object='src.config.DevelopmentConfig'):
     """Application factory pattern."""
@@ -27,6 +32,8 @@ def create_app(config_object='src.config.DevelopmentConfig'):
     bcrypt.init_app(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
+    ocr_jobs.init_app(app)
+    category_rules.init_app(app)
     login_manager.login_view = 'auth.login'
     login_manager.login_message = "Please log in to access this page."
     login_manager.login_message_category = 'info'
@@ -41,6 +48,8 @@ def create_app(config_object='src.config.DevelopmentConfig'):
     except OSError:
         pass
 
+    ocr_cache.init_app(app)
+
     # Register blueprints and routes within the app context
     with app.app_context():
         # Blueprints
@@ -56,6 +65,12 @@ def create_app(config_object='src.config.DevelopmentConfig'):
         from src.api.vat import vat as vat_blueprint
         app.register_blueprint(vat_blueprint, url_prefix='/api/vat')
 
+        from src.api.categories import categories as categories_blueprint
+        app.register_blueprint(categories_blueprint, url_prefix='/api/categories')
+
+        from src.api.ledger import ledger as ledger_blueprint
+        app.register_blueprint(ledger_blueprint, url_prefix='/api/ledger')
+
         # Main application routes
         register_main_routes(app)
 
@@ -63,12 +78,14 @@ def create_app(config_object='src.config.DevelopmentConfig'):
 
 def register_main_routes(app):
     """Register the main application routes to avoid cluttering the factory."""
-    from src.core.ocr.extractor import extract_invoice_data
-    from src.core.ocr.reader import extract_text_from_image
-    from src.core.reporting.summaries import generate_financial_summary
-    from src.core.accounting.journal import generate_entries_from_invoice
-    from src.core.export.fec_exporter import export_to_fec
-    from flask_login import login_required
+    from src.core.reporting.summaries import financial_summary, generate_financial_summary
+    from src.core.accounting.batch import EntryBatch
+    from src.core.accounting.journal import append_invoice_entries
+    from src.core.export.fec_exporter import FecWriter, export_to_fec, iter_fec
+    from src.core.accounting.posting import iter_journal, journals
+    from src.core.export.parallel import is_shared_database, parallel_fec_chunks
+    from src.core.export.columnar import write_parquet, write_snapshot
+    from flask_login import login_required, current_user
 
     PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
     WEB_DIR = app.static_folder
@@ -78,6 +95,25 @@ def register_main_routes(app):
     def serve_dashboard():
         return send_from_directory(WEB_DIR, 'index.html')
 
+    @app.route('/api/summary')
+    @login_required
+    def get_summary():
+        """
+        Returns the financial summary of the current user's validated invoices
+        and transactions, aggregated in the database. Optional filters:
+        start_date and end_date (YYYY-MM-DD), supplier and category.
+        """
+        bounds = []
+        for name in ('start_date', 'end_date'):
+            value = request.args.get(name)
+            try:
+                bounds.append(datetime.datetime.strptime(value, '%Y-%m-%d').date() if value else None)
+            except ValueError:
+                return jsonify({"error": f"Invalid {name} format. Use YYYY-MM-DD."}), 400
+        summary = financial_summary(current_user.id, bounds[0], bounds[1],
+                                    request.args.get('supplier') or None, request.args.get('category') or None)
+        return jsonify(summary)
+
     @app.route('/api/summary/<string:filename>')
     @login_required
     def get_financial_summary(filename):
@@ -85,8 +121,7 @@ def register_main_routes(app):
             invoice_path = os.path.join(DATA_DIR, filename)
             if not os.path.exists(invoice_path):
                 return jsonify({"error": "Invoice not found."}), 404
-            raw_text = extract_text_from_image(invoice_path)
-            invoice_data = extract_invoice_data(raw_text)
+            raw_text, invoice_data = ocr_cache.read_invoice(invoice_path, category_rules.categorizer_for(current_user.id))
             summary_data = generate_financial_summary([invoice_data])
             return jsonify(summary_data)
         except Exception as e:
@@ -99,9 +134,9 @@ def register_main_routes(app):
             invoice_path = os.path.join(DATA_DIR, filename)
             if not os.path.exists(invoice_path):
                 return jsonify({"error": "Invoice not found."}), 404
-            raw_text = extract_text_from_image(invoice_path)
-            invoice_data = extract_invoice_data(raw_text)
-            entries = generate_entries_from_invoice(invoice_data)
+            raw_text, invoice_data = ocr_cache.read_invoice(invoice_path, category_rules.categorizer_for(current_user.id))
+            entries = EntryBatch()
+            append_invoice_entries(invoice_data, entries)
             fec_content = export_to_fec(entries)
             response = make_response(fec_content)
             response.headers["Content-Disposition"] = "attachment; filename=fec.txt"
@@ -110,6 +145,94 @@ def register_main_routes(app):
         except Exception as e:
             return jsonify({"error": "An internal error occurred during FEC export.", "details": str(e)}), 500
 
+    @app.route('/api/export/fec')
+    @login_required
+    def export_fec_year():
+        """
+        Streams the FEC of a fiscal year (?year=YYYY) from the posted journal
+        entries, gzip-compressed with ?gzip=1. Rows go out in chunks as they are
+        read, so memory does not depend on the size of the year. Écritures are
+        listed in the order they were posted, under the number validation gave
+        them, so a file handed out stays valid as later invoices are validated.
+
+        With ?parallel=1, ranges of écritures are formatted by
+        FEC_EXPORT_WORKERS processes; the file is the same.
+        """
+        year = request.args.get('year', '')
+        if not year.isdigit() or len(year) != 4:
+            return jsonify({"error": "Invalid year. Use YYYY."}), 400
+        compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+        database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+        # Workers open their own connections, which an in-memory database does not allow
+        parallel = (request.args.get('parallel', '').lower() in ('1', 'true', 'yes')
+                    and app.config['FEC_EXPORT_WORKERS'] > 1 and is_shared_database(database_uri))
+        user_id = current_user.id
+
+        def generate():
+            header = True
+            for journal_code, journal_lib in journals(user_id, int(year)):
+                if parallel:
+                    chunks = parallel_fec_chunks(database_uri, user_id, int(year), journal_code, journal_lib, header,
+                                                 app.config['FEC_EXPORT_WORKERS'])
+                else:
+                    chunks = iter_fec(iter_journal(user_id, int(year), journal_code), journal_code, journal_lib, header)
+                for chunk in chunks:
+                    yield chunk.encode('utf-8')
+                header = False
+            if header:
+                # A year without entries still gets a valid, empty file
+                yield FecWriter.header().encode('utf-8')
+
+        def gzipped(chunks):
+            # wbits=31 writes the gzip header and trailer
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            for chunk in chunks:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.flush()
+
+        filename = f"fec_{year}.txt"
+        if compress:
+            response = Response(stream_with_context(gzipped(generate())), mimetype='application/gzip')
+            filename += '.gz'
+        else:
+            response = Response(stream_with_context(generate()), mimetype='text/plain')
+            response.headers["Content-Type"] = "text/plain; charset=utf-8"
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+        return response
+
+    @app.route('/api/export/snapshot')
+    @login_required
+    def export_snapshot():
+        """
+        Downloads the current user's invoices, line items, transactions and
+        journal entries as a columnar snapshot, for analysis tools. Optional
+        ?start= and ?end= (YYYY-MM-DD) bound the period, ?tables= lists the
+        tables to include, and ?format=parquet writes Parquet files instead.
+        """
+        bounds = []
+        for name in ('start', 'end'):
+            value = request.args.get(name)
+            try:
+                bounds.append(datetime.datetime.strptime(value, '%Y-%m-%d').date() if value else None)
+            except ValueError:
+                return jsonify({"error": f"Invalid {name} format. Use YYYY-MM-DD."}), 400
+        tables = request.args.get('tables')
+        tables = tables.split(',') if tables else None
+        writer = write_parquet if request.args.get('format') == 'parquet' else write_snapshot
+
+        # Written to a temporary file first: a ZIP's directory comes at its end
+        snapshot = tempfile.TemporaryFile()
+        try:
+            writer(snapshot, current_user.id, bounds[0], bounds[1], tables)
+        except (ValueError, RuntimeError) as e:
+            snapshot.close()
+            return jsonify({"error": str(e)}), 400
+        snapshot.seek(0)
+        filename = f"snapshot_{bounds[0] or 'all'}_{bounds[1] or 'all'}.zip"
+        return send_file(snapshot, mimetype='application/zip', as_attachment=True, download_name=filename)
+
     @app.route('/api/health')
     def health_check():
         return jsonify({"status": "ok"})
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from src.api.extensions import db
 from src.core.cashflow.models import Transaction
+from src.core.money import from_cents, to_cents
 from sqlalchemy import func
 import datetime
 
@@ -47,17 +48,18 @@ def get_cashflow_summary():
     for r in results:
         if r.transaction_type == 'credit':
             # Amount is stored as positive
-            inflows = float(r.total) if r.total is not None else 0
+            inflows = to_cents(r.total) if r.total is not None else 0
         elif r.transaction_type == 'debit':
             # Amount is stored as negative, so we take the absolute value for "outflows"
-            outflows = abs(float(r.total)) if r.total is not None else 0
+            outflows = abs(to_cents(r.total)) if r.total is not None else 0
 
+    # Amounts are added up in cents and only converted back for the response
     net_balance = inflows - outflows
 
     summary = {
-        'total_inflows': inflows,
-        'total_outflows': outflows,
-        'net_balance': net_balance
+        'total_inflows': from_cents(inflows),
+        'total_outflows': from_cents(outflows),
+        'net_balance': from_cents(net_balance)
     }
 
     return jsonify(summary)
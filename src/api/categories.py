@@ -0,0 +1,90 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from src.api.extensions import db, category_rules
+from src.core.accounting.models import CategoryRule, RULE_KINDS
+from src.core.accounting.categories import EXPENSE_CATEGORIES, REVENUE_CATEGORIES
+from src.core.accounting.categorizer import _normalize_text, normalize_supplier
+
+categories = Blueprint('categories', __name__)
+
+def _rule_to_dict(rule):
+    return {
+        'id': rule.id,
+        'kind': rule.kind,
+        'pattern': rule.pattern,
+        'category': rule.category,
+        'created_at': rule.created_at.isoformat() if rule.created_at else None
+    }
+
+@categories.route('/rules', methods=['GET'])
+@login_required
+def list_rules():
+    """Returns the categorization rules of the current user."""
+    rules = CategoryRule.query.filter_by(user_id=current_user.id).order_by(CategoryRule.id).all()
+    return jsonify([_rule_to_dict(rule) for rule in rules])
+
+@categories.route('/rules', methods=['POST'])
+@login_required
+def create_rule():
+    """
+    Adds a keyword or supplier rule for the current user, or updates the
+    category of an existing rule with the same pattern.
+    """
+    data = request.get_json(silent=True) or {}
+    kind = data.get('kind')
+    pattern = (data.get('pattern') or '').strip()
+    category = data.get('category')
+
+    if kind not in RULE_KINDS:
+        return jsonify({'error': f'kind must be one of {list(RULE_KINDS)}.'}), 400
+    if not pattern:
+        return jsonify({'error': 'pattern is required.'}), 400
+    if category not in EXPENSE_CATEGORIES + REVENUE_CATEGORIES:
+        return jsonify({'error': 'Unknown category.'}), 400
+
+    # Stored as matched, so the rule behaves the same whatever the case or accents
+    pattern = normalize_supplier(pattern) if kind == 'supplier' else _normalize_text(pattern)
+
+    rule = CategoryRule.query.filter_by(user_id=current_user.id, kind=kind, pattern=pattern).first()
+    status = 200
+    if rule is None:
+        rule = CategoryRule(user_id=current_user.id, kind=kind, pattern=pattern, category=category)
+        db.session.add(rule)
+        status = 201
+    else:
+        rule.category = category
+    category_rules.forget_learned(current_user.id)
+    category_rules.bump_version(current_user.id)
+    db.session.commit()
+    category_rules.invalidate(current_user.id)
+
+    return jsonify(_rule_to_dict(rule)), status
+
+@categories.route('/rules/<int:rule_id>', methods=['DELETE'])
+@login_required
+def delete_rule(rule_id):
+    """Deletes one of the current user's rules."""
+    rule = CategoryRule.query.filter_by(id=rule_id, user_id=current_user.id).first_or_404()
+    db.session.delete(rule)
+    category_rules.forget_learned(current_user.id)
+    category_rules.bump_version(current_user.id)
+    db.session.commit()
+    category_rules.invalidate(current_user.id)
+
+    return jsonify({'message': f'Rule {rule_id} deleted.'}), 200
+
+@categories.route('/stats', methods=['GET'])
+@login_required
+def categorization_stats():
+    """
+    Returns hit and miss counters of the current user's supplier memo, of
+    the compiled rule cache and of the text normalization cache.
+    """
+    categorizer = category_rules.categorizer_for(current_user.id)
+    cache = category_rules.cache
+    normalize = _normalize_text.cache_info()
+    return jsonify({
+        'memo': categorizer.memo.stats() if categorizer.memo is not None else None,
+        'rules_cache': {'hits': cache.hits, 'misses': cache.misses, 'users': len(cache)},
+        'normalize_cache': {'hits': normalize.hits, 'misses': normalize.misses, 'size': normalize.currsize}
+    })
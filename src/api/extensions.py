@@ -6,8 +6,14 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 from flask_migrate import Migrate
+from src.core.ocr.jobs import OcrJobQueue
+from src.core.ocr.cache import OcrCache
+from src.core.accounting.rules import CategoryRules
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
 login_manager = LoginManager()
 migrate = Migrate()
+ocr_jobs = OcrJobQueue()
+ocr_cache = OcrCache()
+category_rules = CategoryRules()
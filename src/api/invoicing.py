@@ -1,19 +1,28 @@
 import os
-from flask import Blueprint, request, jsonify
+import logging
+from flask import Blueprint, current_app, request, jsonify, url_for
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from src.api.app import db
+from src.api.extensions import ocr_jobs, ocr_cache, category_rules
 from src.core.invoicing.models import Invoice, LineItem
-from src.core.ocr.reader import extract_text_from_image
-from src.core.ocr.extractor import extract_invoice_data
+from src.core.ocr.jobs import QueueFullError
+from src.core.accounting.categories import EXPENSE_CATEGORIES, REVENUE_CATEGORIES
+from src.core.money import optional_cents, to_decimal
 import datetime
 
 invoicing = Blueprint('invoicing', __name__)
+logger = logging.getLogger(__name__)
 
 # Define a folder to store uploaded invoices
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'instance', 'uploads')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf'}
 
+def _to_numeric(amount):
+    """Rounds an extracted float amount to the cent, as a Decimal for the Numeric columns."""
+    cents = optional_cents(amount)
+    return None if cents is None else to_decimal(cents)
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -22,7 +31,10 @@ def allowed_file(filename):
 @login_required
 def validate_invoice(invoice_id):
     """
-    Validates an invoice and creates the corresponding financial transaction.
+    Validates an invoice: posts its journal entries and creates the
+    corresponding financial transaction. The response carries the écriture
+    number taken in the fiscal year's sequence, which the yearly FEC export
+    keeps (see /api/export/fec).
     """
     invoice = Invoice.query.filter_by(id=invoice_id, user_id=current_user.id).first_or_404()
 
@@ -34,6 +46,14 @@ def validate_invoice(invoice_id):
 
     from src.core.cashflow.models import Transaction
     from src.core.vat.models import VatRecord
+    from src.core.accounting.posting import post_invoice
+
+    # --- Journal entries, written once here and read back by exports and ledgers ---
+    try:
+        ecriture_num = post_invoice(invoice)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': f'Cannot post invoice to the journal: {e}'}), 400
 
     # For a sales invoice, this would be a credit. For a bill, a debit.
     # We'll assume these are bills/expenses for now, so VAT is deductible.
@@ -76,7 +96,8 @@ def validate_invoice(invoice_id):
     db.session.add(transaction)
     db.session.commit()
 
-    return jsonify({'message': f'Invoice {invoice.id} validated and transaction created.'}), 200
+    return jsonify({'message': f'Invoice {invoice.id} validated and transaction created.',
+                    'ecriture_num': ecriture_num}), 200
 
 @invoicing.route('', methods=['GET'])
 @login_required
@@ -99,10 +120,134 @@ def list_invoices():
 
     return jsonify(output)
 
+@invoicing.route('/ocr/stats', methods=['GET'])
+@login_required
+def ocr_stats():
+    """
+    Returns this process's adaptive OCR counters: for each pass, how often it
+    ran and settled a document, with its timings. Cache hits do not count.
+    """
+    return jsonify({'adaptive': current_app.config['OCR_ADAPTIVE'], **ocr_cache.adaptive.stats.summary()})
+
+@invoicing.route('/<int:invoice_id>', methods=['GET'])
+@login_required
+def get_invoice(invoice_id):
+    """Returns an invoice with its line items, so clients can poll its processing status."""
+    invoice = Invoice.query.filter_by(id=invoice_id, user_id=current_user.id).first_or_404()
+
+    invoice_data = {
+        'id': invoice.id,
+        'filename': invoice.filename,
+        'status': invoice.status,
+        'supplier': invoice.supplier,
+        'invoice_date': invoice.invoice_date.strftime('%Y-%m-%d') if invoice.invoice_date else None,
+        'total_ht': str(invoice.total_ht) if invoice.total_ht is not None else None,
+        'total_vat': str(invoice.total_vat) if invoice.total_vat is not None else None,
+        'total_ttc': str(invoice.total_ttc) if invoice.total_ttc is not None else None,
+        'created_at': invoice.created_at.isoformat(),
+        'processed_at': invoice.processed_at.isoformat() if invoice.processed_at else None,
+        'line_items': [
+            {
+                'id': item.id,
+                'description': item.description,
+                'quantity': str(item.quantity) if item.quantity is not None else None,
+                'unit_price_ht': str(item.unit_price_ht) if item.unit_price_ht is not None else None,
+                'total_ht': str(item.total_ht),
+                'category': item.category
+            }
+            for item in invoice.line_items
+        ]
+    }
+
+    return jsonify(invoice_data)
+
+@invoicing.route('/<int:invoice_id>/line_items/<int:item_id>', methods=['PATCH'])
+@login_required
+def update_line_item_category(invoice_id, item_id):
+    """
+    Corrects the category of a line item. The correction is remembered for
+    this supplier and description, and applies to future invoices.
+    """
+    invoice = Invoice.query.filter_by(id=invoice_id, user_id=current_user.id).first_or_404()
+    item = LineItem.query.filter_by(id=item_id, invoice_id=invoice.id).first_or_404()
+
+    data = request.get_json(silent=True) or {}
+    category = data.get('category')
+    if category not in EXPENSE_CATEGORIES + REVENUE_CATEGORIES:
+        return jsonify({'error': 'Unknown category.'}), 400
+
+    item.category = category
+    category_rules.remember(current_user.id, invoice.supplier, item.description, category)
+    db.session.commit()
+    category_rules.correct(current_user.id, invoice.supplier, item.description, category)
+
+    return jsonify({'id': item.id, 'description': item.description, 'category': item.category}), 200
+
+def process_invoice(invoice_id, filepath):
+    """
+    Runs OCR and extraction on an uploaded file and stores the results.
+    This is executed by the OCR job queue, outside of the upload request.
+    """
+    invoice = db.session.get(Invoice, invoice_id)
+    if invoice is None:
+        return
+
+    raw_text = None
+    extracted_data = None
+    categorizer = category_rules.categorizer_for(invoice.user_id)
+    try:
+        # 1. Process the file
+        raw_text, extracted_data = ocr_cache.read_invoice(filepath, categorizer)
+
+        # 2. Update invoice with extracted data
+        invoice.supplier = extracted_data.get('supplier')
+        invoice.invoice_date = datetime.datetime.strptime(extracted_data.get('date'), '%d/%m/%Y').date() if extracted_data.get('date') else None
+        invoice.total_ht = _to_numeric(extracted_data.get('total_ht'))
+        invoice.total_ttc = _to_numeric(extracted_data.get('total_ttc'))
+        invoice.total_vat = _to_numeric(extracted_data.get('vat_amount')) # Correct key from extractor
+        invoice.status = 'completed'
+        invoice.processed_at = datetime.datetime.utcnow()
+
+        # 3. Create line items
+        for item_data in extracted_data.get('line_items', []):
+            line_item = LineItem(
+                description=item_data.get('description'),
+                quantity=item_data.get('quantity'),
+                unit_price_ht=_to_numeric(item_data.get('unit_price')),
+                total_ht=_to_numeric(item_data.get('total')),
+                category=item_data.get('category'),
+                invoice_id=invoice.id
+            )
+            db.session.add(line_item)
+
+        db.session.commit()
+
+    except Exception as e:
+        # 4. Handle errors
+        db.session.rollback()
+        invoice.status = 'error'
+        invoice.processed_at = datetime.datetime.utcnow()
+        db.session.commit()
+        logger.info(f"Error processing invoice {invoice_id}: {e}")
+        logger.info(f"Raw text: {raw_text}")
+        logger.info(f"Extracted data: {extracted_data}")
+        return
+
+    # 5. Remember the categories found, so this supplier's items skip the rules next time
+    try:
+        category_rules.save_memo(invoice.user_id, categorizer)
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Could not save category memo for user {invoice.user_id}: {e}")
+
 @invoicing.route('/upload', methods=['POST'])
 @login_required
 def upload_invoice():
-    """Handles invoice file uploads and processing."""
+    """
+    Handles invoice file uploads.
+    The file is queued for OCR and the request returns 202 right away;
+    clients poll `GET /api/invoices/<id>` until the status leaves 'processing'.
+    """
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'}), 400
     file = request.files['file']
@@ -117,7 +262,7 @@ def upload_invoice():
         filepath = os.path.join(UPLOAD_FOLDER, filename)
         file.save(filepath)
 
-        # 1. Create initial invoice record
+        # Create the invoice record, the OCR job fills it in later
         invoice = Invoice(
             filename=filename,
             user_id=current_user.id,
@@ -125,46 +270,29 @@ def upload_invoice():
         )
         db.session.add(invoice)
         db.session.commit()
+        invoice_id = invoice.id
 
         try:
-            # 2. Process the file
-            raw_text = extract_text_from_image(filepath) # Assuming this works for PDFs too if dependencies are present
-            extracted_data = extract_invoice_data(raw_text)
-
-            # 3. Update invoice with extracted data
-            invoice.supplier = extracted_data.get('supplier')
-            invoice.invoice_date = datetime.datetime.strptime(extracted_data.get('date'), '%d/%m/%Y').date() if extracted_data.get('date') else None
-            invoice.total_ht = extracted_data.get('total_ht')
-            invoice.total_ttc = extracted_data.get('total_ttc')
-            invoice.total_vat = extracted_data.get('vat_amount') # Correct key from extractor
-            invoice.status = 'completed'
-            invoice.processed_at = datetime.datetime.utcnow()
-
-            # 4. Create line items
-            for item_data in extracted_data.get('line_items', []):
-                line_item = LineItem(
-                    description=item_data.get('description'),
-                    quantity=item_data.get('quantity'),
-                    unit_price_ht=item_data.get('unit_price'),
-                    total_ht=item_data.get('total'),
-                    invoice_id=invoice.id
-                )
-                db.session.add(line_item)
-
+            ocr_jobs.submit(process_invoice, invoice_id, filepath)
+        except QueueFullError as e:
+            # Back-pressure: drop the record and its upload, and ask the client
+            # to retry later. Uploads are stored by name, so the file is kept
+            # while another invoice still points at it.
+            db.session.delete(invoice)
             db.session.commit()
+            if Invoice.query.filter_by(filename=filename).first() is None:
+                os.remove(filepath)
+            response = jsonify({'error': str(e)})
+            response.headers['Retry-After'] = '5'
+            return response, 503
 
-            return jsonify({'message': 'Invoice processed successfully', 'invoice_id': invoice.id}), 201
-
-        except Exception as e:
-            # 5. Handle errors
-            invoice.status = 'error'
-            db.session.commit()
-            import logging
-            logging.basicConfig(level=logging.INFO)
-            logging.info(f"Error processing invoice: {e}")
-            logging.info(f"Raw text: {raw_text}")
-            logging.info(f"Extracted data: {extracted_data}")
-            # In a real app, log the error `e`
-            return jsonify({'error': 'Failed to process invoice', 'details': str(e)}), 500
+        status_url = url_for('invoicing.get_invoice', invoice_id=invoice_id)
+        response = jsonify({
+            'message': 'Invoice accepted for processing',
+            'invoice_id': invoice_id,
+            'status_url': status_url
+        })
+        response.headers['Location'] = status_url
+        return response, 202
 
     return jsonify({'error': 'File type not allowed'}), 400
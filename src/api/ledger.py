@@ -0,0 +1,92 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from src.core.accounting.ledger import account_periods, trial_balance
+from src.core.money import format_cents
+import datetime
+
+ledger = Blueprint('ledger', __name__)
+
+def _amount(cents):
+    return format_cents(cents, '.')
+
+def _period_range():
+    """
+    Reads the months to report on: 'start' and 'end' as YYYY-MM, or a whole 'year'.
+    Raises ValueError on a malformed parameter.
+    """
+    year = request.args.get('year')
+    if year:
+        if not year.isdigit() or len(year) != 4:
+            raise ValueError('Invalid year. Use YYYY.')
+        return f'{year}-01', f'{year}-12'
+    bounds = []
+    for name in ('start', 'end'):
+        value = request.args.get(name)
+        if value:
+            try:
+                value = datetime.datetime.strptime(value, '%Y-%m').strftime('%Y-%m')
+            except ValueError:
+                raise ValueError(f'Invalid {name} format. Use YYYY-MM.')
+        bounds.append(value or None)
+    return tuple(bounds)
+
+@ledger.route('/balances', methods=['GET'])
+@login_required
+def get_trial_balance():
+    """
+    Returns the trial balance of the current user: the debits, credits and
+    balance of every account over a range of months.
+    """
+    try:
+        start, end = _period_range()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    accounts = trial_balance(current_user.id, start, end)
+    total_debit = sum(a['debit'] for a in accounts)
+    total_credit = sum(a['credit'] for a in accounts)
+    return jsonify({
+        'start': start,
+        'end': end,
+        'accounts': [
+            {
+                'account_number': a['account_number'],
+                'account_name': a['account_name'],
+                'debit': _amount(a['debit']),
+                'credit': _amount(a['credit']),
+                'balance': _amount(a['debit'] - a['credit'])
+            }
+            for a in accounts
+        ],
+        'total_debit': _amount(total_debit),
+        'total_credit': _amount(total_credit),
+        'balanced': total_debit == total_credit
+    })
+
+@ledger.route('/accounts/<int:account_number>', methods=['GET'])
+@login_required
+def get_account(account_number):
+    """Returns the monthly debits, credits and running balance of one account."""
+    try:
+        start, end = _period_range()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    periods = account_periods(current_user.id, account_number, start, end)
+    if not periods:
+        return jsonify({'error': 'No entries for this account in the period.'}), 404
+
+    return jsonify({
+        'account_number': account_number,
+        'account_name': periods[-1]['account_name'],
+        'periods': [
+            {
+                'period_key': p['period_key'],
+                'debit': _amount(p['debit']),
+                'credit': _amount(p['credit']),
+                'balance': _amount(p['balance'])
+            }
+            for p in periods
+        ],
+        'balance': _amount(periods[-1]['balance'])
+    })
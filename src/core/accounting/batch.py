@@ -0,0 +1,183 @@
+"""
+A columnar container for large numbers of accounting entries.
+
+A year-end run over a busy client produces millions of entries. Stored as
+`AccountingEntry` objects, each costs an object header, boxed dates and floats,
+and a `__post_init__` call. `EntryBatch` keeps one typed array per column
+instead: dates as ordinals, account numbers as integers, amounts as integer
+cents with a debit/credit flag, and account names as indices into a table of
+distinct names. Validation and balance checks run over whole columns.
+"""
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.core.accounting.entry import AccountingEntry
+from src.core.money import Cents, from_cents, to_cents
+
+DEBIT = 0
+CREDIT = 1
+
+# An entry as the journal stores it: (date, account number, account name,
+# description, debit cents, credit cents, écriture number), one amount None
+JournalRow = Tuple[date, int, str, str, Optional[Cents], Optional[Cents], int]
+
+
+class EntryBatch:
+    """
+    Accounting entries stored column by column.
+
+    Rows are appended without validation; call `validate` once the batch is
+    built. Iterating yields `AccountingEntry` objects, for code that needs them.
+    """
+
+    __slots__ = ('dates', 'accounts', 'sides', 'cents', 'name_ids', 'numbers', 'descriptions', 'names', '_name_index')
+
+    def __init__(self):
+        self.dates = array('l')         # date.toordinal()
+        self.accounts = array('q')      # account number
+        self.sides = array('b')         # DEBIT or CREDIT
+        self.cents = array('q')         # amount in cents, see src.core.money
+        self.name_ids = array('l')      # index into `names`
+        self.numbers = array('l')       # EcritureNum, shared by the entries of one écriture
+        self.descriptions: List[str] = []
+        self.names: List[str] = []
+        self._name_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._name_index.get(name)
+        if name_id is None:
+            name_id = self._name_index[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def append_cents(self, entry_date: date, account_number: int, account_name: str, description: str,
+                     side: int, cents: Cents, number: int = 1) -> None:
+        """Appends an entry whose amount is already in cents."""
+        self.dates.append(entry_date.toordinal())
+        self.accounts.append(account_number)
+        self.sides.append(side)
+        self.cents.append(cents)
+        self.name_ids.append(self._name_id(account_name))
+        self.numbers.append(number)
+        self.descriptions.append(description)
+
+    def append(self, entry_date: date, account_number: int, account_name: str, description: str,
+               debit: Optional[float] = None, credit: Optional[float] = None, number: int = 1) -> None:
+        """
+        Appends an entry with the same arguments as `AccountingEntry`, and its
+        écriture number. An entry with both or neither of debit and credit is
+        stored as invalid and reported by `validate`.
+        """
+        if (debit is None) == (credit is None):
+            side, amount = -1, 0
+        elif credit is None:
+            side, amount = DEBIT, debit
+        else:
+            side, amount = CREDIT, credit
+        name_id = self._name_index.get(account_name)
+        if name_id is None:
+            name_id = self._name_id(account_name)
+        self.dates.append(entry_date.toordinal())
+        self.accounts.append(account_number)
+        self.sides.append(side)
+        self.cents.append(to_cents(amount))
+        self.name_ids.append(name_id)
+        self.numbers.append(number)
+        self.descriptions.append(description)
+
+    def add(self, entry: AccountingEntry) -> None:
+        self.append(entry.entry_date, entry.account_number, entry.account_name, entry.description,
+                    entry.debit, entry.credit, entry.ecriture_num)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[AccountingEntry]) -> 'EntryBatch':
+        batch = cls()
+        for entry in entries:
+            batch.add(entry)
+        return batch
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[JournalRow]) -> 'EntryBatch':
+        """Builds a batch from journal rows, filling each column at once."""
+        batch = cls()
+        columns = tuple(zip(*rows))
+        if not columns:
+            return batch
+        dates, accounts, names, descriptions, debits, credits, numbers = columns
+        batch.dates = array('l', map(date.toordinal, dates))
+        batch.accounts = array('q', accounts)
+        batch.sides = array('b', [CREDIT if debit is None else DEBIT for debit in debits])
+        batch.cents = array('q', [credit if debit is None else debit for debit, credit in zip(debits, credits)])
+        batch.name_ids = array('l', map(batch._name_id, names))
+        batch.numbers = array('l', numbers)
+        batch.descriptions = list(descriptions)
+        return batch
+
+    def extend(self, other: 'EntryBatch') -> None:
+        """Appends all the rows of another batch."""
+        remap = array('l', (self._name_id(name) for name in other.names))
+        self.dates.extend(other.dates)
+        self.accounts.extend(other.accounts)
+        self.sides.extend(other.sides)
+        self.cents.extend(other.cents)
+        self.name_ids.extend(remap[i] for i in other.name_ids)
+        self.numbers.extend(other.numbers)
+        self.descriptions.extend(other.descriptions)
+
+    def truncate(self, size: int) -> None:
+        """Drops the rows from `size` on, e.g. those of an invoice that failed validation."""
+        del self.dates[size:], self.accounts[size:], self.sides[size:], self.cents[size:]
+        del self.name_ids[size:], self.numbers[size:], self.descriptions[size:]
+
+    def validate(self, start: int = 0, end: Optional[int] = None) -> None:
+        """
+        Checks the rules of `AccountingEntry` over rows `start` to `end` at once.
+
+        Raises:
+            ValueError: naming the first invalid row.
+        """
+        end = len(self) if end is None else end
+        sides = self.sides[start:end]
+        cents = self.cents[start:end]
+        if sides and min(sides) < 0:
+            row = start + sides.index(-1)
+            raise ValueError(f"Entry {row}: an accounting entry must have exactly one of debit or credit.")
+        if cents and min(cents) < 0:
+            row = start + cents.index(min(cents))
+            kind = "debit" if self.sides[row] == DEBIT else "credit"
+            raise ValueError(f"Entry {row}: a {kind} value cannot be negative.")
+
+    def totals(self, start: int = 0, end: Optional[int] = None) -> Tuple[Cents, Cents]:
+        """Returns (total debits, total credits) in cents over rows `start` to `end`."""
+        end = len(self) if end is None else end
+        credits = sum(c for c, s in zip(self.cents[start:end], self.sides[start:end]) if s == CREDIT)
+        return sum(self.cents[start:end]) - credits, credits
+
+    def is_balanced(self, start: int = 0, end: Optional[int] = None) -> bool:
+        debits, credits = self.totals(start, end)
+        return debits == credits
+
+    def entry(self, row: int) -> AccountingEntry:
+        """Builds the `AccountingEntry` of one row."""
+        amount = from_cents(self.cents[row])
+        side = self.sides[row]
+        return AccountingEntry(
+            entry_date=date.fromordinal(self.dates[row]),
+            account_number=self.accounts[row],
+            account_name=self.names[self.name_ids[row]],
+            description=self.descriptions[row],
+            debit=amount if side == DEBIT else None,
+            credit=amount if side == CREDIT else None,
+            ecriture_num=self.numbers[row],
+        )
+
+    def __iter__(self) -> Iterator[AccountingEntry]:
+        for row in range(len(self)):
+            yield self.entry(row)
+
+    def to_entries(self) -> List[AccountingEntry]:
+        return list(self)
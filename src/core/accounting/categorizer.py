@@ -1,6 +1,9 @@
 import re
-from typing import Dict, List
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
 from src.core.accounting.categories import EXPENSE_CATEGORIES, REVENUE_CATEGORIES, DEFAULT_CATEGORY
+from src.core.accounting.matcher import KeywordMatcher
 
 # A mapping of keywords to specific accounting categories.
 # The keywords should be in lowercase and normalized (no accents).
@@ -39,30 +42,119 @@ KEYWORD_TO_CATEGORY: Dict[str, str] = {
     "service": "Prestations de services",
 }
 
+# Compiled once from KEYWORD_TO_CATEGORY
+_MATCHER = KeywordMatcher(KEYWORD_TO_CATEGORY)
+
+@lru_cache(maxsize=65536)
 def _normalize_text(text: str) -> str:
     """
     Normalizes text for keyword matching by making it lowercase and removing accents.
+    Results are memoized, as the same descriptions come back on every invoice.
     """
-    import unicodedata
     nfkd_form = unicodedata.normalize('NFKD', text)
     only_ascii = nfkd_form.encode('ASCII', 'ignore').decode('utf-8')
     return only_ascii.lower()
 
 
-def categorize_item(description: str) -> str:
+@lru_cache(maxsize=8192)
+def normalize_supplier(supplier: str) -> str:
+    """Normalizes a supplier name for exact lookups: no accents, lowercase, single spaces."""
+    return ' '.join(_normalize_text(supplier).split())
+
+
+class Categorizer:
     """
-    Categorizes a line item based on its description using a keyword-matching system.
-    It prioritizes longer keywords to find the most specific match.
+    Categorizes line items for one tenant.
+
+    Rules are applied in order: the tenant's memo of already categorized
+    (supplier, description) pairs, then a supplier rule assigning one category
+    to every item of that supplier, then the tenant's own keywords, then the
+    shared `KEYWORD_TO_CATEGORY` table and, when no keyword matched, the
+    learned `model` if there is one. Keywords are compiled once,
+    so a `Categorizer` is meant to be built once per rule set and reused.
+
+    Args:
+        keywords: Tenant keyword -> category overrides.
+        suppliers: Tenant supplier name -> category overrides.
+        version: Version of the rule set this categorizer was built from.
+        memo: A `SupplierMemo`, consulted first and taught every category
+            found by the rules.
+        model: A `LinearModel` (see `classifier.py`) for descriptions no keyword matches.
     """
-    if not description:
+
+    def __init__(self, keywords: Optional[Dict[str, str]] = None, suppliers: Optional[Dict[str, str]] = None,
+                 version: int = 0, memo=None, model=None):
+        self.version = version
+        self.memo = memo
+        self.model = model
+        self._keywords = KeywordMatcher({_normalize_text(k): v for k, v in keywords.items()}) if keywords else None
+        self._suppliers = {normalize_supplier(k): v for k, v in (suppliers or {}).items()}
+
+    def categorize(self, description: str, supplier: Optional[str] = None) -> str:
+        """Returns the category of a line item, given its invoice's supplier if known."""
+        if self.memo is None or not description:
+            return self._apply_rules(description, supplier)
+        category = self.memo.lookup(supplier, description)
+        if category is None:
+            category = self._apply_rules(description, supplier)
+            self.memo.learn(supplier, description, category)
+        return category
+
+    def _apply_rules(self, description: str, supplier: Optional[str]) -> str:
+        if supplier and self._suppliers:
+            category = self._suppliers.get(normalize_supplier(supplier))
+            if category:
+                return category
+        if not description:
+            return DEFAULT_CATEGORY
+
+        normalized_desc = _normalize_text(description)
+        if self._keywords is not None:
+            category = self._keywords.match(normalized_desc)
+            if category:
+                return category
+        category = _MATCHER.match(normalized_desc)
+        if category:
+            return category
+        if self.model is not None:
+            return self.model.predict(description) or DEFAULT_CATEGORY
         return DEFAULT_CATEGORY
 
-    normalized_desc = _normalize_text(description)
+    def categorize_many(self, descriptions: Iterable[str], supplier: Optional[str] = None) -> List[str]:
+        """
+        Categorizes a batch of line item descriptions, in order.
+        Repeated descriptions are normalized and matched only once.
+        """
+        seen: Dict[str, str] = {}
+        categories = []
+        for description in descriptions:
+            if description not in seen:
+                seen[description] = self.categorize(description, supplier)
+            categories.append(seen[description])
+        return categories
 
-    sorted_keywords = sorted(KEYWORD_TO_CATEGORY.keys(), key=len, reverse=True)
+    def categorize_invoice(self, invoice_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns a copy of extracted invoice data with its line items re-categorized by these rules."""
+        items = invoice_data.get('line_items') or []
+        categories = self.categorize_many([item.get('description') for item in items], invoice_data.get('supplier'))
+        return {**invoice_data, 'line_items': [{**item, 'category': c} for item, c in zip(items, categories)]}
 
-    for keyword in sorted_keywords:
-        if keyword in normalized_desc:
-            return KEYWORD_TO_CATEGORY[keyword]
 
-    return DEFAULT_CATEGORY
+# The shared keyword table only, for callers without tenant rules
+DEFAULT_CATEGORIZER = Categorizer()
+
+
+def categorize_item(description: str) -> str:
+    """
+    Categorizes a line item based on its description using a keyword-matching system.
+    It prioritizes longer keywords to find the most specific match.
+    """
+    return DEFAULT_CATEGORIZER.categorize(description)
+
+
+def categorize_many(descriptions: Iterable[str]) -> List[str]:
+    """
+    Categorizes a batch of line item descriptions, in order.
+    Repeated descriptions are normalized and matched only once.
+    """
+    return DEFAULT_CATEGORIZER.categorize_many(descriptions)
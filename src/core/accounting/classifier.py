@@ -0,0 +1,192 @@
+"""
+A learned line item categorizer: a linear model over hashed character n-grams.
+
+Keyword rules only know the words they were given. This model is trained
+from line items whose category a user validated, so it also recognises
+descriptions that share no keyword with the tables, through their spelling
+('maint. serv.', 'cartouche encre noire'...).
+
+Features are character n-grams of the normalized description plus its whole
+words, hashed into a fixed number of buckets, so the model size does not
+depend on the vocabulary. Training is an averaged perceptron, in pure Python.
+The weights are written as one float32 array, and `load_model` maps that file
+with mmap: loading is instant and worker processes share the same pages.
+"""
+import array
+import json
+import mmap
+import random
+import struct
+import sys
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from src.core.accounting.categorizer import _normalize_text
+
+MAGIC = b'LNCAT001'
+# dims, number of classes, smallest and largest n-gram length, length of the class list
+_HEADER = struct.Struct('<IIIII')
+
+DEFAULT_DIMS = 1 << 16
+DEFAULT_NGRAMS = (3, 5)
+
+
+def hashed_features(text: str, dims: int = DEFAULT_DIMS, ngrams: Tuple[int, int] = DEFAULT_NGRAMS) -> List[int]:
+    """
+    Returns the feature buckets of a description: its character n-grams
+    (word boundaries included) and its words, hashed with CRC-32 so buckets
+    are the same in every process.
+    """
+    words = _normalize_text(text).split()
+    if not words:
+        return []
+    padded = ' ' + ' '.join(words) + ' '
+    crc32 = zlib.crc32
+    features = [crc32(b'w:' + word.encode()) % dims for word in words]
+    low, high = ngrams
+    encoded = padded.encode()
+    for n in range(low, high + 1):
+        for i in range(len(encoded) - n + 1):
+            features.append(crc32(encoded[i:i + n]) % dims)
+    return features
+
+
+class LinearModel:
+    """
+    A trained model: `weights` holds, for each feature bucket, one float per
+    class, so the weights of one feature are contiguous.
+    """
+
+    def __init__(self, classes: Sequence[str], weights, bias, dims: int = DEFAULT_DIMS,
+                 ngrams: Tuple[int, int] = DEFAULT_NGRAMS, _mapping=None):
+        self.classes = list(classes)
+        self.weights = weights
+        self.bias = list(bias)
+        self.dims = dims
+        self.ngrams = tuple(ngrams)
+        self._mapping = _mapping
+
+    def scores(self, description: str) -> List[float]:
+        n = len(self.classes)
+        weights = self.weights
+        scores = list(self.bias)
+        for feature in hashed_features(description, self.dims, self.ngrams):
+            base = feature * n
+            scores = [s + w for s, w in zip(scores, weights[base:base + n])]
+        return scores
+
+    def predict(self, description: str) -> Optional[str]:
+        """Returns the most likely category, or None for an empty description."""
+        if not description or not description.strip():
+            return None
+        scores = self.scores(description)
+        return self.classes[max(range(len(scores)), key=scores.__getitem__)]
+
+    def predict_many(self, descriptions: Iterable[str]) -> List[Optional[str]]:
+        """Predicts a batch, scoring each distinct description once."""
+        seen = {}
+        results = []
+        for description in descriptions:
+            if description not in seen:
+                seen[description] = self.predict(description)
+            results.append(seen[description])
+        return results
+
+    def save(self, path: str) -> None:
+        """Writes the model as a header, the class names, then float32 biases and weights."""
+        names = json.dumps(self.classes, ensure_ascii=False).encode('utf-8')
+        header = MAGIC + _HEADER.pack(self.dims, len(self.classes), self.ngrams[0], self.ngrams[1], len(names)) + names
+        header += b'\0' * (-len(header) % 4)
+        values = array.array('f', self.bias)
+        values.extend(self.weights)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        with open(path, 'wb') as f:
+            f.write(header)
+            values.tofile(f)
+
+    def close(self) -> None:
+        """Releases the mapped file of a loaded model."""
+        if self._mapping is not None:
+            self.weights.release()
+            self._mapping.close()
+            self._mapping = None
+
+
+def load_model(path: str) -> LinearModel:
+    """Maps a model written by `LinearModel.save`; the weights are read from the file on demand."""
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapping[:len(MAGIC)] != MAGIC or len(mapping) < len(MAGIC) + _HEADER.size:
+        mapping.close()
+        raise ValueError(f"{path} is not a categorizer model")
+    offset = len(MAGIC)
+    dims, n_classes, low, high, names_length = _HEADER.unpack_from(mapping, offset)
+    offset += _HEADER.size
+    classes = json.loads(mapping[offset:offset + names_length].decode('utf-8'))
+    offset += names_length
+    offset += -offset % 4
+    if len(mapping) - offset != 4 * n_classes * (dims + 1):
+        # A truncated file would map fewer weights and score silently wrong
+        mapping.close()
+        raise ValueError(f"{path} is truncated or corrupt: expected {n_classes} x {dims + 1} weights")
+    floats = memoryview(mapping)[offset:offset + 4 * n_classes * (dims + 1)].cast('f')
+    bias = floats[:n_classes].tolist()
+    if sys.byteorder != 'little':
+        # The file is little-endian: swap into memory rather than mapping it
+        values = array.array('f', floats[n_classes:].tobytes())
+        values.byteswap()
+        floats.release()
+        mapping.close()
+        return LinearModel(classes, values, bias, dims, (low, high))
+    return LinearModel(classes, floats[n_classes:], bias, dims, (low, high), _mapping=mapping)
+
+
+def train(samples: Iterable[Tuple[str, str]], dims: int = DEFAULT_DIMS, ngrams: Tuple[int, int] = DEFAULT_NGRAMS,
+          epochs: int = 5, seed: int = 0) -> LinearModel:
+    """
+    Trains an averaged perceptron on (description, category) pairs.
+
+    Returns:
+        A `LinearModel` over the categories seen in `samples`.
+    """
+    data = [(description, category) for description, category in samples if description and category]
+    if not data:
+        raise ValueError("No training samples")
+    classes = sorted({category for _, category in data})
+    class_index = {c: i for i, c in enumerate(classes)}
+    n = len(classes)
+    encoded = [(hashed_features(d, dims, ngrams), class_index[c]) for d, c in data]
+
+    weights = array.array('f', bytes(4 * dims * n))
+    bias = [0.0] * n
+    # Sums of the updates weighted by their time step, for the averaging
+    weights_acc = array.array('d', bytes(8 * dims * n))
+    bias_acc = [0.0] * n
+    step = 1
+    rng = random.Random(seed)
+    for _ in range(epochs):
+        rng.shuffle(encoded)
+        for features, target in encoded:
+            scores = list(bias)
+            for feature in features:
+                base = feature * n
+                scores = [s + w for s, w in zip(scores, weights[base:base + n])]
+            guess = max(range(n), key=scores.__getitem__)
+            if guess != target:
+                for feature in features:
+                    base = feature * n
+                    weights[base + target] += 1.0
+                    weights[base + guess] -= 1.0
+                    weights_acc[base + target] += step
+                    weights_acc[base + guess] -= step
+                bias[target] += 1.0
+                bias[guess] -= 1.0
+                bias_acc[target] += step
+                bias_acc[guess] -= step
+            step += 1
+
+    averaged = array.array('f', (w - a / step for w, a in zip(weights, weights_acc)))
+    # Stored as float32, like the weights, so a saved model scores the same
+    averaged_bias = array.array('f', (b - a / step for b, a in zip(bias, bias_acc))).tolist()
+    return LinearModel(classes, averaged, averaged_bias, dims, ngrams)
@@ -2,11 +2,12 @@ from dataclasses import dataclass
 from datetime import date
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class AccountingEntry:
     """
     Represents a single accounting entry (a line in a journal).
     Ensures that each entry has either a debit or a credit, but not both.
+    For large volumes, see `EntryBatch`, which stores entries column by column.
     """
     entry_date: date
     account_number: int
@@ -14,6 +15,8 @@ class AccountingEntry:
     description: str
     debit: Optional[float] = None
     credit: Optional[float] = None
+    # EcritureNum: the entries of one invoice share the same number
+    ecriture_num: int = 1
 
     def __post_init__(self):
         if self.debit is None and self.credit is None:
@@ -1,25 +1,37 @@
-from datetime import datetime
-from typing import Dict, Any, List
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Iterator, List, Optional
 
+from src.core.accounting.batch import CREDIT, DEBIT, EntryBatch
 from src.core.accounting.entry import AccountingEntry
 from src.core.accounting.categories import CATEGORY_TO_ACCOUNT, DEFAULT_CATEGORY
 
 # Standard account numbers from the French Plan Comptable Général (PCG)
 FOURNISSEUR_ACCOUNT = 401  # Compte Fournisseurs (Accounts Payable)
 TVA_DEDUCTIBLE_ACCOUNT = 44566  # TVA sur autres biens et services déductible
+SUSPENSE_ACCOUNT = 471  # Compte d'attente, for amounts to be reviewed
 
-def generate_entries_from_invoice(invoice_data: Dict[str, Any]) -> List[AccountingEntry]:
+DEFAULT_ACCOUNT = CATEGORY_TO_ACCOUNT[DEFAULT_CATEGORY]
+
+@lru_cache(maxsize=4096)
+def _parse_date(value: str) -> date:
+    """Parses a 'dd/mm/yyyy' date; a closing run sees few distinct dates, each parsed once."""
+    return datetime.strptime(value, '%d/%m/%Y').date()
+
+def append_invoice_entries(invoice_data: Dict[str, Any], batch: EntryBatch, number: int = 1,
+                           suspense: bool = False) -> None:
     """
-    Generates a list of accounting entries from a dictionary of extracted invoice data.
+    Appends the journal entries of an invoice to a batch.
 
     Args:
         invoice_data: The structured data extracted from the invoice.
-
-    Returns:
-        A list of AccountingEntry objects representing the journal entries for the invoice.
+        batch: The batch the entries are added to. It is left unchanged if the
+            invoice is invalid.
+        number: The EcritureNum of the invoice's entries.
+        suspense: When the line items and VAT do not add up to the total, post
+            the difference to the suspense account instead of rejecting the
+            invoice, e.g. for a line OCR missed or misread.
     """
-    entries = []
-
     # --- Validate input data ---
     required_keys = ['date', 'total_ttc', 'total_ht', 'vat_amount', 'line_items']
     if not all(key in invoice_data and invoice_data[key] is not None for key in required_keys):
@@ -28,46 +40,89 @@ def generate_entries_from_invoice(invoice_data: Dict[str, Any]) -> List[Accounti
 
     try:
         # Convert date string 'dd/mm/yyyy' to a date object
-        entry_date = datetime.strptime(invoice_data['date'], '%d/%m/%Y').date()
+        entry_date = _parse_date(invoice_data['date'])
     except (ValueError, TypeError):
         raise ValueError("Invalid date format in invoice data. Expected 'dd/mm/yyyy'.")
 
-    # --- Create Debit Entries for each line item (Expense) ---
-    for item in invoice_data['line_items']:
-        account_number = CATEGORY_TO_ACCOUNT.get(item['category'], CATEGORY_TO_ACCOUNT[DEFAULT_CATEGORY])
-        account_name = item['category']
-
-        entries.append(AccountingEntry(
-            entry_date=entry_date,
-            account_number=account_number,
-            account_name=account_name,
-            description=item['description'],
-            debit=item['total']
-        ))
-
-    # --- Create Debit Entry for VAT ---
-    if invoice_data['vat_amount'] > 0:
-        entries.append(AccountingEntry(
-            entry_date=entry_date,
-            account_number=TVA_DEDUCTIBLE_ACCOUNT,
-            account_name="TVA Déductible",
-            description=f"TVA sur facture {invoice_data.get('invoice_id', '')}",
-            debit=invoice_data['vat_amount']
-        ))
-
-    # --- Create Credit Entry for the Supplier ---
-    entries.append(AccountingEntry(
-        entry_date=entry_date,
-        account_number=FOURNISSEUR_ACCOUNT,
-        account_name="Fournisseurs",
-        description=f"Facture {invoice_data.get('invoice_id', '')}",
-        credit=invoice_data['total_ttc']
-    ))
-
-    # --- Verification (optional but good practice) ---
-    total_debits = sum(e.debit for e in entries if e.debit is not None)
-    total_credits = sum(e.credit for e in entries if e.credit is not None)
-    if not round(total_debits, 2) == round(total_credits, 2):
-        raise ValueError("Debits and credits do not balance.")
-
-    return entries
+    start = len(batch)
+    try:
+        # --- Create Debit Entries for each line item (Expense) ---
+        for item in invoice_data['line_items']:
+            account_number = CATEGORY_TO_ACCOUNT.get(item['category'], DEFAULT_ACCOUNT)
+            batch.append(entry_date, account_number, item['category'], item['description'], debit=item['total'],
+                         number=number)
+
+        # --- Create Debit Entry for VAT ---
+        if invoice_data['vat_amount'] > 0:
+            batch.append(entry_date, TVA_DEDUCTIBLE_ACCOUNT, "TVA Déductible",
+                         f"TVA sur facture {invoice_data.get('invoice_id', '')}", debit=invoice_data['vat_amount'],
+                         number=number)
+
+        # --- Create Credit Entry for the Supplier ---
+        batch.append(entry_date, FOURNISSEUR_ACCOUNT, "Fournisseurs",
+                     f"Facture {invoice_data.get('invoice_id', '')}", credit=invoice_data['total_ttc'], number=number)
+
+        # --- Verification, over the whole invoice at once and exact in cents ---
+        batch.validate(start)
+        debits, credits = batch.totals(start)
+        if debits != credits:
+            if not suspense:
+                raise ValueError("Debits and credits do not balance.")
+            batch.append_cents(entry_date, SUSPENSE_ACCOUNT, "Compte d'attente",
+                               f"Écart sur facture {invoice_data.get('invoice_id', '')}",
+                               DEBIT if credits > debits else CREDIT, abs(credits - debits), number)
+    except Exception:
+        batch.truncate(start)
+        raise
+
+
+def generate_entries_from_invoice(invoice_data: Dict[str, Any]) -> List[AccountingEntry]:
+    """
+    Generates a list of accounting entries from a dictionary of extracted invoice data.
+
+    Args:
+        invoice_data: The structured data extracted from the invoice.
+
+    Returns:
+        A list of AccountingEntry objects representing the journal entries for the invoice.
+    """
+    batch = EntryBatch()
+    append_invoice_entries(invoice_data, batch)
+    return batch.to_entries()
+
+
+def generate_entries_from_invoices(invoices: Iterable[Dict[str, Any]], errors: Optional[list] = None,
+                                   first_number: int = 1) -> Iterator[AccountingEntry]:
+    """
+    Generates the accounting entries of many invoices, lazily.
+
+    Invoices are read from `invoices` one at a time and their entries yielded
+    before the next one is read, so a closing run can be written out as it goes.
+    An invalid invoice does not stop the run: it is skipped, and if `errors` is
+    given, a dict with its position, 'invoice_id' and error message is appended to it.
+
+    Args:
+        invoices: Structured invoice data, as for `generate_entries_from_invoice`.
+        errors: A list collecting the invoices that were skipped.
+        first_number: The EcritureNum of the first valid invoice; each following
+            invoice takes the next number.
+    """
+    # One batch, emptied after each invoice, holds the entries being checked
+    batch = EntryBatch()
+    number = first_number
+    for index, invoice_data in enumerate(invoices):
+        if not isinstance(invoice_data, dict):
+            if errors is not None:
+                errors.append({'index': index, 'invoice_id': None,
+                               'error': f"Expected invoice data, got {type(invoice_data).__name__}"})
+            continue
+        try:
+            append_invoice_entries(invoice_data, batch, number)
+        # ArithmeticError covers decimal.InvalidOperation, from amounts that are not numbers
+        except (ValueError, TypeError, KeyError, ArithmeticError) as e:
+            if errors is not None:
+                errors.append({'index': index, 'invoice_id': invoice_data.get('invoice_id'), 'error': str(e)})
+            continue
+        yield from batch
+        batch.truncate(0)
+        number += 1
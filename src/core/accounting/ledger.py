@@ -0,0 +1,121 @@
+"""
+Account balances per month, maintained as entries are posted.
+
+`update_balances` adds the entries of a posting to the `account_balances` row
+of each (account, month) they touch, in the posting's transaction. A trial
+balance or an account's history then sums at most one row per account and
+month, whatever the number of entries behind them.
+"""
+import datetime
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+
+from src.api.extensions import db
+from src.core.accounting.batch import DEBIT, EntryBatch
+from src.core.accounting.models import AccountBalance, JournalEntry
+from src.core.accounting.upsert import upsert_add
+
+
+def period_key(entry_date: datetime.date) -> str:
+    """Returns the month of a date as 'YYYY-MM', the key of `AccountBalance` rows."""
+    return f"{entry_date.year:04d}-{entry_date.month:02d}"
+
+
+def _add_to_balance(user_id: int, key: str, account_number: int, account_name: str,
+                    debit: int, credit: int) -> None:
+    upsert_add(AccountBalance, {'user_id': user_id, 'period_key': key, 'account_number': account_number},
+               {'debit_cents': debit, 'credit_cents': credit}, {'account_name': account_name})
+
+
+def update_balances(user_id: int, batch: EntryBatch, start: int = 0) -> None:
+    """Adds the entries of `batch` from row `start` on to the user's balances, in the current transaction."""
+    totals: Dict[Tuple[str, int], List[Any]] = {}
+    keys: Dict[int, str] = {}
+    names = batch.names
+    for row in range(start, len(batch)):
+        ordinal = batch.dates[row]
+        key = keys.get(ordinal)
+        if key is None:
+            key = keys[ordinal] = period_key(datetime.date.fromordinal(ordinal))
+        total = totals.get((key, batch.accounts[row]))
+        if total is None:
+            total = totals[(key, batch.accounts[row])] = [names[batch.name_ids[row]], 0, 0]
+        total[1 if batch.sides[row] == DEBIT else 2] += batch.cents[row]
+    for (key, account_number), (account_name, debit, credit) in sorted(totals.items()):
+        _add_to_balance(user_id, key, account_number, account_name, debit, credit)
+
+
+def rebuild_balances(user_id: int) -> None:
+    """
+    Recomputes a user's balances from the journal, in the current transaction,
+    e.g. for entries posted before balances were maintained.
+    """
+    AccountBalance.query.filter_by(user_id=user_id).delete()
+    rows = db.session.execute(
+        select(JournalEntry.entry_date, JournalEntry.account_number, func.max(JournalEntry.account_name),
+               func.coalesce(func.sum(JournalEntry.debit_cents), 0), func.coalesce(func.sum(JournalEntry.credit_cents), 0))
+        .where(JournalEntry.user_id == user_id)
+        .group_by(JournalEntry.entry_date, JournalEntry.account_number)
+    )
+    totals: Dict[Tuple[str, int], List[Any]] = defaultdict(lambda: [None, 0, 0])
+    for entry_date, account_number, account_name, debit, credit in rows:
+        total = totals[(period_key(entry_date), account_number)]
+        total[0] = account_name
+        total[1] += debit
+        total[2] += credit
+    if totals:
+        db.session.execute(insert(AccountBalance), [
+            {'user_id': user_id, 'period_key': key, 'account_number': account_number, 'account_name': name,
+             'debit_cents': debit, 'credit_cents': credit}
+            for (key, account_number), (name, debit, credit) in sorted(totals.items())
+        ])
+
+
+def trial_balance(user_id: int, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Returns the total debits and credits of every account over the months
+    `start` to `end` ('YYYY-MM', both included, open-ended when None), by
+    account number, with amounts in cents.
+    """
+    query = (
+        select(AccountBalance.account_number, func.max(AccountBalance.account_name),
+               func.sum(AccountBalance.debit_cents), func.sum(AccountBalance.credit_cents))
+        .where(AccountBalance.user_id == user_id)
+        .group_by(AccountBalance.account_number)
+        .order_by(AccountBalance.account_number)
+    )
+    if start is not None:
+        query = query.where(AccountBalance.period_key >= start)
+    if end is not None:
+        query = query.where(AccountBalance.period_key <= end)
+    return [
+        {'account_number': account_number, 'account_name': name, 'debit': debit, 'credit': credit}
+        for account_number, name, debit, credit in db.session.execute(query)
+    ]
+
+
+def account_periods(user_id: int, account_number: int, start: Optional[str] = None,
+                    end: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Returns an account's monthly debits and credits over the months `start` to
+    `end`, in cents, each with the running balance (debits minus credits) since `start`.
+    """
+    query = (
+        select(AccountBalance.period_key, AccountBalance.account_name,
+               AccountBalance.debit_cents, AccountBalance.credit_cents)
+        .where(AccountBalance.user_id == user_id, AccountBalance.account_number == account_number)
+        .order_by(AccountBalance.period_key)
+    )
+    if start is not None:
+        query = query.where(AccountBalance.period_key >= start)
+    if end is not None:
+        query = query.where(AccountBalance.period_key <= end)
+    periods = []
+    balance = 0
+    for key, name, debit, credit in db.session.execute(query):
+        balance += debit - credit
+        periods.append({'period_key': key, 'account_name': name, 'debit': debit, 'credit': credit,
+                        'balance': balance})
+    return periods
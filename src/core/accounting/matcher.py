@@ -0,0 +1,101 @@
+"""
+Multi-keyword matching with an Aho-Corasick automaton.
+
+The automaton is built once from a keyword table. It then finds every keyword
+occurring in a text in a single left-to-right pass, whatever the number of
+keywords, instead of one substring search per keyword.
+"""
+from collections import deque
+from typing import Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class KeywordMatcher(Generic[T]):
+    """
+    Maps a text to the value of the best keyword it contains.
+
+    The best keyword is the longest one found anywhere in the text, and among
+    keywords of the same length the one that comes first in `keywords`. This is
+    the order in which `categorize_item` always tried its keywords.
+
+    Args:
+        keywords: Keywords and their values. Keywords are matched as-is, so
+            they must already be normalized like the texts they are matched against.
+    """
+
+    def __init__(self, keywords: Dict[str, T]):
+        # Rank 0 is the best keyword: longest first, then insertion order
+        ranked = sorted((k for k in keywords if k), key=len, reverse=True)
+        self._values: List[T] = [keywords[k] for k in ranked]
+        self._keywords: List[str] = ranked
+
+        # Trie: one transition dict per node; node 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        # Rank of the best keyword ending at each node, via its failure links
+        self._best: List[Optional[int]] = [None]
+        for rank, keyword in enumerate(ranked):
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._best.append(None)
+                node = next_node
+            if self._best[node] is None:
+                self._best[node] = rank
+
+        # Failure links, breadth first, so a node's link is final before its children are visited
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[child] = link if link != child else 0
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def best_match(self, text: str) -> Optional[Tuple[str, T]]:
+        """Returns the best (keyword, value) found in `text`, or None."""
+        goto, fail, best_at = self._goto, self._fail, self._best
+        node = 0
+        best = None
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            rank = best_at[node]
+            if rank is not None and (best is None or rank < best):
+                best = rank
+                if best == 0:
+                    # Nothing can beat the longest keyword
+                    break
+        if best is None:
+            return None
+        return self._keywords[best], self._values[best]
+
+    def match(self, text: str, default: T = None) -> T:
+        """Returns the value of the best keyword found in `text`, or `default`."""
+        found = self.best_match(text)
+        return found[1] if found else default
+
+    def match_many(self, texts: Iterable[str], default: T = None) -> List[T]:
+        """Matches a batch of texts, scanning each distinct text once."""
+        seen: Dict[str, T] = {}
+        results = []
+        for text in texts:
+            if text not in seen:
+                seen[text] = self.match(text, default)
+            results.append(seen[text])
+        return results
@@ -0,0 +1,74 @@
+"""
+A learned index of line item categories per supplier.
+
+Suppliers send the same items month after month. Once an item has been
+categorized, by the keyword rules or by a manual correction, its category is
+remembered under (normalized supplier, normalized description), and the next
+occurrence is answered with one dictionary lookup instead of a keyword scan.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.core.accounting.categorizer import _normalize_text, normalize_supplier
+
+MemoKey = Tuple[str, str]
+
+
+class SupplierMemo:
+    """
+    In-process (supplier, description) -> category index of one user.
+
+    Entries learned in this process are also queued until `drain_unsaved`
+    hands them over for persistence.
+
+    Args:
+        entries: Known categories, keyed by normalized (supplier, description).
+    """
+
+    def __init__(self, entries: Optional[Dict[MemoKey, str]] = None):
+        self._entries: Dict[MemoKey, str] = dict(entries or {})
+        self._unsaved: Dict[MemoKey, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(supplier: Optional[str], description: str) -> MemoKey:
+        return normalize_supplier(supplier or ''), _normalize_text(description)
+
+    def lookup(self, supplier: Optional[str], description: str) -> Optional[str]:
+        """Returns the remembered category of an item, or None."""
+        category = self._entries.get(self.key(supplier, description))
+        # Counters are statistics only; a lost increment under contention is acceptable
+        if category is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return category
+
+    def learn(self, supplier: Optional[str], description: str, category: str) -> None:
+        """Remembers the category of an item and queues it for persistence."""
+        key = self.key(supplier, description)
+        with self._lock:
+            if self._entries.get(key) != category:
+                self._entries[key] = category
+                self._unsaved[key] = category
+
+    def correct(self, supplier: Optional[str], description: str, category: str) -> None:
+        """Remembers a manual correction, which its caller has already persisted."""
+        key = self.key(supplier, description)
+        with self._lock:
+            self._entries[key] = category
+            self._unsaved.pop(key, None)
+
+    def drain_unsaved(self) -> List[Tuple[str, str, str]]:
+        """Returns and forgets the (supplier, description, category) entries learned since the last call."""
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, {}
+        return [(supplier, description, category) for (supplier, description), category in unsaved.items()]
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
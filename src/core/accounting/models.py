@@ -0,0 +1,133 @@
+from sqlalchemy.orm import relationship
+from src.api.extensions import db
+import datetime
+
+# Kinds of categorization rules: a keyword matched in line item descriptions,
+# or a supplier whose items all go to one category
+RULE_KINDS = ('keyword', 'supplier')
+
+class CategoryRule(db.Model):
+    __tablename__ = 'category_rules'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    # Stored normalized (lowercase, no accents), as it is matched
+    pattern = db.Column(db.String(255), nullable=False)
+    category = db.Column(db.String(255), nullable=False)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    # Relationships
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user = relationship('User', backref=db.backref('category_rules', lazy=True))
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'kind', 'pattern', name='_user_rule_uc'),)
+
+    def __repr__(self):
+        return f'<CategoryRule {self.kind} {self.pattern!r} -> {self.category}>'
+
+class CategoryRuleSet(db.Model):
+    """
+    Version of a user's rule set, bumped on every edit so that compiled
+    categorizers cached by other processes know they are stale.
+    """
+    __tablename__ = 'category_rule_sets'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CategoryRuleSet user={self.user_id} v{self.version}>'
+
+# Where a memo entry comes from: the categorizer's own rules, or a user's correction
+MEMO_SOURCES = ('auto', 'manual')
+
+class CategoryMemo(db.Model):
+    """A remembered line item category, keyed by normalized supplier and description."""
+    __tablename__ = 'category_memos'
+
+    id = db.Column(db.Integer, primary_key=True)
+    supplier = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.String(255), nullable=False)
+    category = db.Column(db.String(255), nullable=False)
+    source = db.Column(db.String(20), nullable=False, default='auto')
+
+    # Timestamps
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    # Relationships
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'supplier', 'description', name='_user_memo_uc'),)
+
+    def __repr__(self):
+        return f'<CategoryMemo {self.supplier!r} {self.description!r} -> {self.category}>'
+
+class JournalEntry(db.Model):
+    """
+    One line of a posted écriture. Amounts are in cents (see `src.core.money`),
+    in `debit_cents` or `credit_cents`, the other being NULL.
+    """
+    __tablename__ = 'journal_entries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    fiscal_year = db.Column(db.Integer, nullable=False)
+    # EcritureNum, shared by the lines of one écriture
+    ecriture_num = db.Column(db.Integer, nullable=False)
+    journal_code = db.Column(db.String(10), nullable=False)
+    journal_lib = db.Column(db.String(100), nullable=True)
+    entry_date = db.Column(db.Date, nullable=False)
+    account_number = db.Column(db.Integer, nullable=False)
+    account_name = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.String(255), nullable=False)
+    debit_cents = db.Column(db.BigInteger, nullable=True)
+    credit_cents = db.Column(db.BigInteger, nullable=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    # Relationships
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=True)
+    invoice = relationship('Invoice', backref=db.backref('journal_entries', lazy=True))
+
+    __table_args__ = (
+        db.Index('ix_journal_user_year_num', 'user_id', 'fiscal_year', 'ecriture_num'),
+        db.Index('ix_journal_user_account_date', 'user_id', 'account_number', 'entry_date'),
+    )
+
+    def __repr__(self):
+        return f'<JournalEntry {self.fiscal_year}/{self.ecriture_num} {self.account_number}>'
+
+class JournalSequence(db.Model):
+    """The last EcritureNum given out in a user's fiscal year."""
+    __tablename__ = 'journal_sequences'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    fiscal_year = db.Column(db.Integer, primary_key=True)
+    last_num = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<JournalSequence user={self.user_id} {self.fiscal_year}: {self.last_num}>'
+
+class AccountBalance(db.Model):
+    """
+    Debit and credit totals of one account over one month, in cents, updated
+    in the transaction that posts the entries. A trial balance reads these
+    rows rather than the journal.
+    """
+    __tablename__ = 'account_balances'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    period_key = db.Column(db.String(7), primary_key=True) # e.g., "2025-01"
+    account_number = db.Column(db.Integer, primary_key=True)
+    account_name = db.Column(db.String(255), nullable=False)
+    debit_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    credit_cents = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (db.Index('ix_balance_user_account_period', 'user_id', 'account_number', 'period_key'),)
+
+    def __repr__(self):
+        return f'<AccountBalance {self.period_key} {self.account_number}>'
@@ -0,0 +1,181 @@
+"""
+Posting validated invoices to the journal.
+
+Journal entries are generated once, when an invoice is validated, and stored
+in `journal_entries` under an écriture number (EcritureNum) that follows a
+sequence per user and fiscal year. Exports and ledgers then read them back
+with indexed queries instead of running OCR on the source documents again.
+"""
+import datetime
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from src.api.extensions import db
+from src.core.accounting.batch import CREDIT, DEBIT, EntryBatch, JournalRow
+from src.core.accounting.categories import DEFAULT_CATEGORY
+from src.core.accounting.journal import append_invoice_entries
+from src.core.accounting.ledger import update_balances
+from src.core.accounting.models import JournalEntry, JournalSequence
+from src.core.accounting.upsert import upsert_add
+
+# Journal of supplier invoices
+PURCHASES_JOURNAL = 'AC'
+
+# Journal codes and their labels (JournalLib in the FEC)
+JOURNALS = {PURCHASES_JOURNAL: 'ACHATS'}
+
+
+def fiscal_year(entry_date: datetime.date) -> int:
+    """Returns the fiscal year of a date; fiscal years follow the calendar year."""
+    return entry_date.year
+
+
+def reserve_ecriture_nums(user_id: int, year: int, count: int) -> int:
+    """
+    Takes the next `count` écriture numbers of a user's fiscal year, in the
+    current transaction, and returns the first. The sequence row is created or
+    incremented by a single upsert, so concurrent postings, the first ones of
+    a year included, wait for each other rather than reuse a number.
+    """
+    last_num = upsert_add(JournalSequence, {'user_id': user_id, 'fiscal_year': year}, {'last_num': count},
+                          returning='last_num')
+    return last_num - count + 1
+
+
+def next_ecriture_num(user_id: int, year: int) -> int:
+    """Takes the next écriture number of a user's fiscal year, in the current transaction."""
+    return reserve_ecriture_nums(user_id, year, 1)
+
+
+def invoice_journal_data(invoice) -> Dict[str, Any]:
+    """Returns a stored invoice in the shape `append_invoice_entries` expects."""
+    return {
+        'invoice_id': str(invoice.id),
+        'date': invoice.invoice_date.strftime('%d/%m/%Y') if invoice.invoice_date else None,
+        'total_ht': invoice.total_ht,
+        'vat_amount': invoice.total_vat or 0,
+        'total_ttc': invoice.total_ttc,
+        'line_items': [
+            {
+                'description': item.description,
+                'category': item.category or DEFAULT_CATEGORY,
+                'total': item.total_ht,
+            }
+            for item in invoice.line_items
+        ],
+    }
+
+
+def insert_batch(user_id: int, batch: EntryBatch, journal_code: str, journal_lib: Optional[str] = None,
+                 invoice_id: Optional[int] = None) -> None:
+    """
+    Inserts the entries of a batch, already numbered, into the journal and
+    adds them to the account balances, in the current transaction.
+    """
+    names = batch.names
+    years: Dict[int, int] = {}
+    rows = []
+    for ordinal, number, account_number, name_id, description, side, cents in zip(
+            batch.dates, batch.numbers, batch.accounts, batch.name_ids, batch.descriptions, batch.sides, batch.cents):
+        entry_date = datetime.date.fromordinal(ordinal)
+        year = years.get(ordinal)
+        if year is None:
+            year = years[ordinal] = fiscal_year(entry_date)
+        rows.append({
+            'user_id': user_id,
+            'invoice_id': invoice_id,
+            'fiscal_year': year,
+            'ecriture_num': number,
+            'journal_code': journal_code,
+            'journal_lib': journal_lib,
+            'entry_date': entry_date,
+            'account_number': account_number,
+            'account_name': names[name_id],
+            'description': description,
+            'debit_cents': cents if side == DEBIT else None,
+            'credit_cents': cents if side == CREDIT else None,
+        })
+    if rows:
+        # A Core insert runs as one executemany: the ORM one splits the rows
+        # into a statement per run of lines with the same null amount column
+        db.session.execute(JournalEntry.__table__.insert(), rows)
+        update_balances(user_id, batch)
+
+
+def post_invoice(invoice, journal_code: str = PURCHASES_JOURNAL) -> int:
+    """
+    Generates the journal entries of an invoice and inserts them in the current
+    transaction, under the next écriture number of its fiscal year, and adds
+    them to the account balances. When the line items and VAT do not add up to
+    the total, the difference goes to the suspense account (471), to be
+    cleared once the invoice is reviewed.
+
+    Returns:
+        The écriture number.
+
+    Raises:
+        ValueError: If the invoice is incomplete or has negative amounts;
+            nothing is written and no number is taken.
+    """
+    batch = EntryBatch()
+    append_invoice_entries(invoice_journal_data(invoice), batch, suspense=True)
+    number = next_ecriture_num(invoice.user_id, fiscal_year(invoice.invoice_date))
+    batch.numbers = array('l', [number]) * len(batch)
+    insert_batch(invoice.user_id, batch, journal_code, JOURNALS.get(journal_code), invoice.id)
+    return number
+
+
+def journals(user_id: int, year: int) -> List[Tuple[str, str]]:
+    """Returns the (code, label) of the journals with entries in a user's fiscal year, by code."""
+    rows = db.session.execute(
+        select(JournalEntry.journal_code, func.max(JournalEntry.journal_lib))
+        .where(JournalEntry.user_id == user_id, JournalEntry.fiscal_year == year)
+        .group_by(JournalEntry.journal_code)
+        .order_by(JournalEntry.journal_code)
+    )
+    return [(code, lib or JOURNALS.get(code, code)) for code, lib in rows]
+
+
+def journal_query(user_id: int, year: int, journal_code: Optional[str] = None,
+                  numbers: Optional[Tuple[int, int]] = None):
+    """
+    Selects a user's posted entries for a fiscal year in écriture order, or
+    those of the écritures numbered `numbers` = (first, last) included.
+    """
+    query = (
+        select(JournalEntry.entry_date, JournalEntry.account_number, JournalEntry.account_name,
+               JournalEntry.description, JournalEntry.debit_cents, JournalEntry.credit_cents,
+               JournalEntry.ecriture_num)
+        .where(JournalEntry.user_id == user_id, JournalEntry.fiscal_year == year)
+        .order_by(JournalEntry.ecriture_num, JournalEntry.id)
+    )
+    if journal_code is not None:
+        query = query.where(JournalEntry.journal_code == journal_code)
+    if numbers is not None:
+        query = query.where(JournalEntry.ecriture_num.between(*numbers))
+    return query
+
+
+def iter_journal(user_id: int, year: int, journal_code: Optional[str] = None,
+                 chunk_size: int = 5000, bind=None) -> Iterator[JournalRow]:
+    """
+    Yields a user's posted entries for a fiscal year as journal rows, in
+    écriture order, with their amounts in cents. Rows are fetched from a
+    server-side cursor `chunk_size` at a time, so memory does not grow with
+    the size of the year. `bind` is a connection to read from instead of the
+    application's session, e.g. in a worker process.
+    """
+    query = journal_query(user_id, year, journal_code).execution_options(yield_per=chunk_size)
+    yield from (bind or db.session).execute(query)
+
+
+def load_journal(user_id: int, year: int, journal_code: Optional[str] = None,
+                 numbers: Optional[Tuple[int, int]] = None, bind=None) -> EntryBatch:
+    """
+    Reads a user's posted entries for a fiscal year, or a range of its
+    écritures, in écriture order. See `journal_query` for `numbers` and
+    `iter_journal` for `bind`.
+    """
+    return EntryBatch.from_rows((bind or db.session).execute(journal_query(user_id, year, journal_code, numbers)))
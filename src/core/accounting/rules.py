@@ -0,0 +1,258 @@
+"""
+Per-tenant categorization rules, compiled once and cached in-process.
+
+Each user can add keyword -> category and supplier -> category rules on top
+of the shared keyword table. Building a `Categorizer` compiles the keywords
+into an automaton, so compiled categorizers are kept in a bounded LRU cache,
+keyed by user and tagged with the version of the rule set they were built
+from. Edits made through this process invalidate the entry right away; edits
+made by other processes are picked up when the cached version is re-checked,
+at most every `CATEGORY_RULES_TTL` seconds. Between checks, categorizing an
+invoice runs no query at all.
+
+Each compiled categorizer also carries the user's `SupplierMemo`, loaded with
+it from the database; categories it learns are written back by `save_memo`.
+Manual corrections update the cached memo in place rather than the rule set
+version, so other processes see them when they next compile the user's rules.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from src.core.accounting.categorizer import Categorizer
+from src.core.accounting.memo import SupplierMemo, MemoKey
+from src.core.accounting.classifier import load_model
+
+logger = logging.getLogger(__name__)
+
+# (version, keyword rules, supplier rules, memo entries) of a user
+RuleSet = Tuple[int, Dict[str, str], Dict[str, str], Dict[MemoKey, str]]
+
+
+class CategorizerCache:
+    """
+    LRU cache of compiled categorizers.
+
+    Args:
+        load_rules: Returns the current `RuleSet` of a user.
+        load_version: Returns the current rule set version of a user, a cheap
+            query used to revalidate entries older than `ttl` seconds.
+        max_size: Number of users kept; the least recently used are evicted.
+        ttl: Seconds during which a cached categorizer is used without checking its version.
+        model: A learned model shared by all categorizers, or None.
+    """
+
+    def __init__(self, load_rules: Callable[[int], RuleSet], load_version: Callable[[int], int],
+                 max_size: int = 256, ttl: float = 30.0, model=None):
+        self.load_rules = load_rules
+        self.load_version = load_version
+        self.model = model
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Tuple[Categorizer, float]]" = OrderedDict()
+        # Bumped by every invalidation and correction, so a categorizer built
+        # from rules read before one is not stored after it
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Categorizer:
+        """Returns the categorizer of a user, compiling it only when its rules changed."""
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generation
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+                if now - entry[1] < self.ttl:
+                    self.hits += 1
+                    return entry[0]
+
+        if entry is not None and self.load_version(user_id) == entry[0].version:
+            categorizer = entry[0]
+            with self._lock:
+                self.hits += 1
+        else:
+            version, keywords, suppliers, memo = self.load_rules(user_id)
+            categorizer = Categorizer(keywords, suppliers, version=version, memo=SupplierMemo(memo), model=self.model)
+            with self._lock:
+                self.misses += 1
+
+        with self._lock:
+            if self._generation != generation:
+                # Invalidated while it was being built: used for this call only
+                return categorizer
+            self._entries[user_id] = (categorizer, now)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return categorizer
+
+    def correct(self, user_id: int, supplier: Optional[str], description: str, category: str) -> None:
+        """Applies a manual correction to the cached categorizer of a user, if any, in place."""
+        with self._lock:
+            # A categorizer being built may have read the memo before the correction
+            self._generation += 1
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0].memo is not None:
+                entry[0].memo.correct(supplier, description, category)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def _load_version(user_id: int) -> int:
+    from src.api.extensions import db
+    from src.core.accounting.models import CategoryRuleSet
+    rule_set = db.session.get(CategoryRuleSet, user_id)
+    return rule_set.version if rule_set else 0
+
+
+def _load_rules(user_id: int) -> RuleSet:
+    from src.api.extensions import db
+    from src.core.accounting.models import CategoryRule, CategoryMemo
+    keywords, suppliers = {}, {}
+    # Oldest first, so the order of equally long keywords is stable
+    for rule in CategoryRule.query.filter_by(user_id=user_id).order_by(CategoryRule.id):
+        (keywords if rule.kind == 'keyword' else suppliers)[rule.pattern] = rule.category
+    memo = {
+        (supplier, description): category
+        for supplier, description, category in db.session.query(
+            CategoryMemo.supplier, CategoryMemo.description, CategoryMemo.category
+        ).filter_by(user_id=user_id)
+    }
+    return _load_version(user_id), keywords, suppliers, memo
+
+
+class CategoryRules:
+    """
+    Flask extension giving each user a compiled `Categorizer`, cached by
+    rule-set version. Sized by `CATEGORY_RULES_CACHE_SIZE` and revalidated
+    every `CATEGORY_RULES_TTL` seconds. When `CATEGORIZER_MODEL_PATH` names a
+    trained model, it categorizes the items no keyword matches.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CATEGORY_RULES_CACHE_SIZE', 256)
+        app.config.setdefault('CATEGORY_RULES_TTL', 30.0)
+        app.config.setdefault('CATEGORIZER_MODEL_PATH', None)
+        model = None
+        model_path = app.config['CATEGORIZER_MODEL_PATH']
+        if model_path:
+            if os.path.exists(model_path):
+                model = load_model(model_path)
+            else:
+                logger.warning("Categorizer model %s not found, using keywords only", model_path)
+        app.extensions['category_rules'] = CategorizerCache(
+            _load_rules, _load_version,
+            max_size=app.config['CATEGORY_RULES_CACHE_SIZE'],
+            ttl=app.config['CATEGORY_RULES_TTL'],
+            model=model
+        )
+
+    @property
+    def cache(self) -> CategorizerCache:
+        return current_app.extensions['category_rules']
+
+    def categorizer_for(self, user_id: Optional[int]) -> Categorizer:
+        """Returns the categorizer of a user; must run inside an application context."""
+        if user_id is None:
+            from src.core.accounting.categorizer import DEFAULT_CATEGORIZER
+            return DEFAULT_CATEGORIZER
+        return self.cache.get(user_id)
+
+    def bump_version(self, user_id: int) -> int:
+        """
+        Marks a user's rules as changed. Call it in the transaction that edits
+        the rules, then `invalidate` once it is committed.
+        """
+        from src.api.extensions import db
+        from src.core.accounting.models import CategoryRuleSet
+        rule_set = db.session.get(CategoryRuleSet, user_id)
+        if rule_set is None:
+            rule_set = CategoryRuleSet(user_id=user_id, version=0)
+            db.session.add(rule_set)
+        rule_set.version += 1
+        return rule_set.version
+
+    def invalidate(self, user_id: int) -> None:
+        """Drops a user's compiled categorizer from this process's cache."""
+        self.cache.invalidate(user_id)
+
+    def forget_learned(self, user_id: int) -> None:
+        """
+        Deletes the memo entries learned from the rules, which an edit of the
+        rules may have made wrong. Manual corrections are kept.
+        """
+        from src.core.accounting.models import CategoryMemo
+        CategoryMemo.query.filter_by(user_id=user_id, source='auto').delete()
+
+    def remember(self, user_id: int, supplier: Optional[str], description: str, category: str) -> None:
+        """
+        Records a manual correction, overriding what was learned for this
+        supplier and description. Call `correct` once it is committed.
+        """
+        from src.api.extensions import db
+        from src.core.accounting.models import CategoryMemo
+        supplier_key, description_key = SupplierMemo.key(supplier, description)
+        memo = CategoryMemo.query.filter_by(user_id=user_id, supplier=supplier_key, description=description_key).first()
+        if memo is None:
+            memo = CategoryMemo(user_id=user_id, supplier=supplier_key, description=description_key)
+            db.session.add(memo)
+        memo.category = category
+        memo.source = 'manual'
+
+    def correct(self, user_id: int, supplier: Optional[str], description: str, category: str) -> None:
+        """
+        Applies a committed manual correction to this process's compiled
+        categorizer of the user, without recompiling its rules.
+        """
+        self.cache.correct(user_id, supplier, description, category)
+
+    def save_memo(self, user_id: int, categorizer: Categorizer) -> None:
+        """
+        Persists the categories a user's memo learned in this process, in its
+        own transaction. Entries already stored by another process are left alone.
+        """
+        from src.api.extensions import db
+        from src.core.accounting.models import CategoryMemo
+        if categorizer.memo is None:
+            return
+        learned = categorizer.memo.drain_unsaved()
+        if not learned:
+            return
+        existing = set(db.session.query(CategoryMemo.supplier, CategoryMemo.description).filter(
+            CategoryMemo.user_id == user_id,
+            CategoryMemo.description.in_({description for _, description, _ in learned})
+        ))
+        for supplier, description, category in learned:
+            if (supplier, description) not in existing:
+                db.session.add(CategoryMemo(user_id=user_id, supplier=supplier, description=description,
+                                            category=category, source='auto'))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another process stored some of them first; they will be loaded from there
+            db.session.rollback()
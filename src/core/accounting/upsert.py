@@ -0,0 +1,61 @@
+"""
+Counter rows updated by concurrent postings.
+
+Écriture sequences and account balances are rows that every posting adds to,
+and that the first posting of a year or month creates. Updating them with an
+UPDATE, then an INSERT when no row matched, lets two first postings both find
+the row missing and both insert it; the second fails on the primary key. An
+INSERT ... ON CONFLICT DO UPDATE does both in one statement, which the
+database serializes.
+"""
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from src.api.extensions import db
+
+_UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def upsert_add(model, keys: Dict[str, Any], amounts: Dict[str, int], values: Optional[Dict[str, Any]] = None,
+               returning: Optional[str] = None) -> Optional[Any]:
+    """
+    Adds `amounts` to the columns of the `model` row identified by `keys` and
+    sets `values`, or inserts the row with them when it does not exist yet, in
+    the current transaction.
+
+    Returns:
+        The `returning` column of the row once updated, if given.
+    """
+    table = model.__table__
+    values = values or {}
+    row = {**keys, **amounts, **values}
+    insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if insert is not None:
+        statement = insert(table).values(row)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={**{name: table.c[name] + statement.excluded[name] for name in amounts},
+                  **{name: statement.excluded[name] for name in values}},
+        )
+        if returning is None:
+            db.session.execute(statement)
+            return None
+        return db.session.execute(statement.returning(table.c[returning])).scalar_one()
+
+    # Databases without ON CONFLICT: insert in a savepoint, and update the
+    # row another transaction created first
+    where = [table.c[name] == value for name, value in keys.items()]
+    added = update(table).where(*where).values(
+        {**{name: table.c[name] + amount for name, amount in amounts.items()}, **values})
+    if db.session.execute(added).rowcount == 0:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert().values(row))
+        except IntegrityError:
+            db.session.execute(added)
+    if returning is None:
+        return None
+    return db.session.execute(select(table.c[returning]).where(*where)).scalar_one()
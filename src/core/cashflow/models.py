@@ -22,5 +22,7 @@ class Transaction(db.Model):
     invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=True)
     invoice = relationship('Invoice', backref=db.backref('transactions', lazy=True))
 
+    __table_args__ = (db.Index('ix_transactions_user_date', 'user_id', 'transaction_date'),)
+
     def __repr__(self):
         return f'<Transaction {self.id} ({self.transaction_type} {self.amount})>'
@@ -0,0 +1,317 @@
+"""
+Column-oriented snapshots of a user's accounting data, for analysis.
+
+Listing invoices through the API gives one JSON object per invoice, which is
+slow to produce and to scan over years of data. A snapshot instead stores
+invoices, line items, bank transactions and journal entries column by column.
+It is read from the database in row groups of `row_group_size` rows and
+written one row group at a time, so memory does not depend on the period.
+
+Each table column is stored as a typed array, like `EntryBatch` columns,
+compressed in a ZIP file:
+
+    manifest.json                   tables, columns, types and row group sizes
+    <table>/<group>/<column>.bin    little-endian values of one row group
+    <table>/<group>/<column>.json   the distinct values of a string column
+
+Column types and their storage:
+
+    int      int64, NULL_INT for null
+    cents    int64 amount in cents, NULL_INT for null
+    decimal  int64 hundredths of a NUMERIC(_, 2) column, NULL_INT for null
+    date     int32 proleptic ordinal (`date.toordinal()`), 0 for null
+    string   int32 index into the group's values, -1 for null
+
+A reader only decompresses the columns it asks for. With pyarrow installed,
+`write_parquet` writes the same tables as Parquet files instead.
+"""
+import datetime
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from array import array
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from sqlalchemy import select
+
+from src.api.extensions import db
+from src.core.accounting.models import JournalEntry
+from src.core.cashflow.models import Transaction
+from src.core.invoicing.models import Invoice, LineItem
+from src.core.money import to_cents
+
+SNAPSHOT_FORMAT = 'columnar-snapshot'
+SNAPSHOT_VERSION = 1
+
+NULL_INT = -(1 << 63)
+
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+_TYPECODES = {'int': 'q', 'cents': 'q', 'decimal': 'q', 'date': 'i', 'string': 'i'}
+_ARROW_TYPES = {'int': 'int64', 'cents': 'int64', 'decimal': 'int64', 'date': 'date32', 'string': 'string'}
+
+
+class Column(NamedTuple):
+    """A column of a snapshot table and the SQL expression it is read from."""
+    name: str
+    type: str
+    expression: Any
+
+
+class TableSpec(NamedTuple):
+    """
+    A snapshot table. `date_column` is the date its rows are selected on for
+    a period, and `query` adds the user filter and any joins to a select.
+    """
+    name: str
+    columns: Sequence[Column]
+    date_column: Any
+    query: Callable[[Any, int], Any]
+
+
+TABLES = (
+    TableSpec('invoices', (
+        Column('id', 'int', Invoice.id),
+        Column('invoice_date', 'date', Invoice.invoice_date),
+        Column('status', 'string', Invoice.status),
+        Column('supplier', 'string', Invoice.supplier),
+        Column('total_ht', 'decimal', Invoice.total_ht),
+        Column('total_vat', 'decimal', Invoice.total_vat),
+        Column('total_ttc', 'decimal', Invoice.total_ttc),
+    ), Invoice.invoice_date,
+        lambda query, user_id: query.where(Invoice.user_id == user_id).order_by(Invoice.id)),
+    TableSpec('line_items', (
+        Column('id', 'int', LineItem.id),
+        Column('invoice_id', 'int', LineItem.invoice_id),
+        # The invoice's, so line items can be scanned by period on their own
+        Column('invoice_date', 'date', Invoice.invoice_date),
+        Column('description', 'string', LineItem.description),
+        Column('category', 'string', LineItem.category),
+        Column('quantity', 'decimal', LineItem.quantity),
+        Column('unit_price_ht', 'decimal', LineItem.unit_price_ht),
+        Column('total_ht', 'decimal', LineItem.total_ht),
+        Column('vat_rate', 'decimal', LineItem.vat_rate),
+        Column('vat_amount', 'decimal', LineItem.vat_amount),
+    ), Invoice.invoice_date,
+        lambda query, user_id: query.join(Invoice, LineItem.invoice_id == Invoice.id)
+        .where(Invoice.user_id == user_id).order_by(LineItem.id)),
+    TableSpec('transactions', (
+        Column('id', 'int', Transaction.id),
+        Column('transaction_date', 'date', Transaction.transaction_date),
+        Column('transaction_type', 'string', Transaction.transaction_type),
+        Column('description', 'string', Transaction.description),
+        Column('amount', 'decimal', Transaction.amount),
+        Column('invoice_id', 'int', Transaction.invoice_id),
+    ), Transaction.transaction_date,
+        lambda query, user_id: query.where(Transaction.user_id == user_id).order_by(Transaction.id)),
+    TableSpec('journal', (
+        Column('id', 'int', JournalEntry.id),
+        Column('fiscal_year', 'int', JournalEntry.fiscal_year),
+        Column('journal_code', 'string', JournalEntry.journal_code),
+        Column('ecriture_num', 'int', JournalEntry.ecriture_num),
+        Column('entry_date', 'date', JournalEntry.entry_date),
+        Column('account_number', 'int', JournalEntry.account_number),
+        Column('account_name', 'string', JournalEntry.account_name),
+        Column('description', 'string', JournalEntry.description),
+        Column('debit', 'cents', JournalEntry.debit_cents),
+        Column('credit', 'cents', JournalEntry.credit_cents),
+        Column('invoice_id', 'int', JournalEntry.invoice_id),
+    ), JournalEntry.entry_date,
+        lambda query, user_id: query.where(JournalEntry.user_id == user_id).order_by(JournalEntry.id)),
+)
+
+TABLE_NAMES = tuple(spec.name for spec in TABLES)
+
+
+def _table_specs(tables: Optional[Sequence[str]]) -> List[TableSpec]:
+    if tables is None:
+        return list(TABLES)
+    unknown = set(tables) - set(TABLE_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown table(s): {', '.join(sorted(unknown))}")
+    return [spec for spec in TABLES if spec.name in tables]
+
+
+def _row_groups(spec: TableSpec, user_id: int, start: Optional[datetime.date], end: Optional[datetime.date],
+                row_group_size: int) -> Iterator[Sequence[Any]]:
+    """Yields the rows of a table for a user and period (both dates included), `row_group_size` at a time."""
+    query = spec.query(select(*(c.expression for c in spec.columns)), user_id)
+    if start is not None:
+        query = query.where(spec.date_column >= start)
+    if end is not None:
+        query = query.where(spec.date_column <= end)
+    result = db.session.execute(query.execution_options(yield_per=row_group_size))
+    yield from result.partitions(row_group_size)
+
+
+def _encode(column_type: str, values: List[Any]):
+    """Returns the typed array of a row group's values, and the distinct values of a string column."""
+    if column_type == 'string':
+        index: Dict[str, int] = {}
+        codes = array('i', [-1 if v is None else index.setdefault(v, len(index)) for v in values])
+        return codes, list(index)
+    if column_type == 'date':
+        return array('i', [0 if v is None else v.toordinal() for v in values]), None
+    if column_type == 'decimal':
+        return array('q', [NULL_INT if v is None else to_cents(v) for v in values]), None
+    return array('q', [NULL_INT if v is None else v for v in values]), None
+
+
+def write_snapshot(file: Union[str, BinaryIO], user_id: int, start: Optional[datetime.date] = None,
+                   end: Optional[datetime.date] = None, tables: Optional[Sequence[str]] = None,
+                   row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> Dict[str, Any]:
+    """
+    Writes a snapshot of a user's data between `start` and `end` (both
+    included, open-ended when None) to a path or a binary file.
+
+    Args:
+        tables: The tables to include, all of `TABLE_NAMES` by default.
+
+    Returns:
+        The manifest written into the snapshot.
+    """
+    specs = _table_specs(tables)
+    manifest: Dict[str, Any] = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'user_id': user_id,
+        'start': start.isoformat() if start else None,
+        'end': end.isoformat() if end else None,
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'tables': {},
+    }
+    with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+        for spec in specs:
+            groups = []
+            for rows in _row_groups(spec, user_id, start, end, row_group_size):
+                prefix = f"{spec.name}/{len(groups):05d}/"
+                for i, column in enumerate(spec.columns):
+                    values, distinct = _encode(column.type, [row[i] for row in rows])
+                    if sys.byteorder != 'little':
+                        values.byteswap()
+                    archive.writestr(prefix + column.name + '.bin', values.tobytes())
+                    if distinct is not None:
+                        archive.writestr(prefix + column.name + '.json', json.dumps(distinct, ensure_ascii=False))
+                groups.append(len(rows))
+            manifest['tables'][spec.name] = {
+                'columns': [{'name': c.name, 'type': c.type} for c in spec.columns],
+                'rows': sum(groups),
+                'row_groups': groups,
+            }
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+    return manifest
+
+
+class Snapshot:
+    """
+    Reads a snapshot written by `write_snapshot`, one column at a time.
+
+    Numeric and date columns come back as typed arrays with their null
+    markers (see the module documentation); string columns as lists.
+
+    Raises:
+        ValueError: If the file is not a snapshot of a supported version.
+    """
+
+    def __init__(self, file: Union[str, BinaryIO]):
+        self._archive = zipfile.ZipFile(file)
+        try:
+            self.manifest = json.loads(self._archive.read('manifest.json'))
+        except KeyError:
+            self._archive.close()
+            raise ValueError("Not a columnar snapshot: no manifest")
+        if self.manifest.get('format') != SNAPSHOT_FORMAT or self.manifest.get('version') != SNAPSHOT_VERSION:
+            self._archive.close()
+            raise ValueError("Unsupported snapshot format")
+        self.tables = self.manifest['tables']
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._archive.close()
+
+    def _column_type(self, table: str, column: str) -> str:
+        for c in self.tables[table]['columns']:
+            if c['name'] == column:
+                return c['type']
+        raise KeyError(f"{table} has no column {column!r}")
+
+    def _read_group(self, table: str, group: int, column: str, column_type: str):
+        prefix = f"{table}/{group:05d}/{column}"
+        values = array(_TYPECODES[column_type])
+        values.frombytes(self._archive.read(prefix + '.bin'))
+        if sys.byteorder != 'little':
+            values.byteswap()
+        if column_type == 'string':
+            distinct = json.loads(self._archive.read(prefix + '.json'))
+            return [None if code < 0 else distinct[code] for code in values]
+        return values
+
+    def row_groups(self, table: str, columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Yields the row groups of a table in order, each as a dict of its columns."""
+        names = columns or [c['name'] for c in self.tables[table]['columns']]
+        types = {name: self._column_type(table, name) for name in names}
+        for group in range(len(self.tables[table]['row_groups'])):
+            yield {name: self._read_group(table, group, name, types[name]) for name in names}
+
+    def read(self, table: str, columns: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Returns whole columns of a table, all of them by default."""
+        names = columns or [c['name'] for c in self.tables[table]['columns']]
+        result = {}
+        for name in names:
+            column_type = self._column_type(table, name)
+            result[name] = [] if column_type == 'string' else array(_TYPECODES[column_type])
+        for group in self.row_groups(table, names):
+            for name in names:
+                result[name].extend(group[name])
+        return result
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Writing Parquet files requires the 'pyarrow' package.")
+    return pyarrow, pyarrow.parquet
+
+
+def write_parquet(file: Union[str, BinaryIO], user_id: int, start: Optional[datetime.date] = None,
+                  end: Optional[datetime.date] = None, tables: Optional[Sequence[str]] = None,
+                  row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> List[str]:
+    """
+    Writes the same tables as `write_snapshot` as Parquet files, one per table,
+    gathered in an uncompressed ZIP file; Parquet compresses each column itself.
+    Nulls are Parquet nulls and decimal columns are in hundredths, as in a snapshot.
+
+    Returns:
+        The names of the Parquet files in the ZIP.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    pa, pq = _pyarrow()
+    specs = _table_specs(tables)
+    names = []
+    with tempfile.TemporaryDirectory() as tmp, zipfile.ZipFile(file, 'w', zipfile.ZIP_STORED) as archive:
+        for spec in specs:
+            schema = pa.schema([(c.name, getattr(pa, _ARROW_TYPES[c.type])()) for c in spec.columns])
+            path = os.path.join(tmp, spec.name + '.parquet')
+            with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+                for rows in _row_groups(spec, user_id, start, end, row_group_size):
+                    arrays = []
+                    for i, column in enumerate(spec.columns):
+                        values = [row[i] for row in rows]
+                        if column.type == 'decimal':
+                            values = [None if v is None else to_cents(v) for v in values]
+                        arrays.append(pa.array(values, schema.field(i).type))
+                    writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            archive.write(path, spec.name + '.parquet')
+            names.append(spec.name + '.parquet')
+    return names
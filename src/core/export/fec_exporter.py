@@ -1,7 +1,15 @@
 import csv
 import io
-from typing import List, Dict, Any
+import re
+from datetime import date
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, TextIO, Tuple, Union
+from src.core.accounting.batch import DEBIT, EntryBatch, JournalRow
 from src.core.accounting.entry import AccountingEntry
+from src.core.money import format_cents, to_cents
+
+# What the writer accepts: entries, a batch, or journal rows
+Entries = Union[Iterable[AccountingEntry], EntryBatch, Iterable[JournalRow]]
 
 # The 18 mandatory columns for the FEC file, in order.
 FEC_HEADER = [
@@ -11,51 +19,209 @@ FEC_HEADER = [
     "ValidDate", "Montantdevise", "Idevise"
 ]
 
-def export_to_fec(entries: List[AccountingEntry], journal_code: str = "AC", journal_lib: str = "ACHATS") -> str:
+DELIMITER = '\t'
+LINE_TERMINATOR = '\n'
+
+def _quoted_chars() -> str:
+    """
+    Returns the characters that make `csv.writer` quote a field with our
+    dialect. Whether a carriage return does depends on the Python version, so
+    ask the csv module rather than hardcode it.
+    """
+    chars = []
+    for char in '\t"\n\r':
+        buffer = io.StringIO()
+        csv.writer(buffer, delimiter=DELIMITER, lineterminator=LINE_TERMINATOR).writerow([f'a{char}b', ''])
+        if buffer.getvalue().startswith('"'):
+            chars.append(char)
+    return ''.join(chars)
+
+_needs_quoting: Callable[[str], object] = re.compile(f"[{re.escape(_quoted_chars())}]").search
+
+def _quote(field: str) -> str:
+    """Quotes a field the way `csv.writer` does, so both write the same bytes."""
+    if _needs_quoting(field):
+        return '"' + field.replace('"', '""') + '"'
+    return field
+
+# Amounts are cached until this many distinct values have been seen
+_AMOUNT_CACHE_SIZE = 1 << 16
+
+class FecWriter:
+    """
+    Serializes accounting entries to FEC lines.
+
+    The output is the same, byte for byte, as `csv.writer` with a tab
+    delimiter, but each line is one string format: the journal columns are
+    formatted once per writer, dates and 'account<TAB>label' pairs once per
+    distinct value, amounts are cached, and only free text is checked for
+    characters that need quoting.
+
+    Args:
+        journal_code: The journal code to use for these entries (e.g., 'AC' for Achat).
+        journal_lib: The library for the journal.
+    """
+
+    def __init__(self, journal_code: str = "AC", journal_lib: str = "ACHATS"):
+        self._prefix = f"{_quote(journal_code)}{DELIMITER}{_quote(journal_lib)}{DELIMITER}"
+        self._dates: Dict[object, str] = {}
+        self._accounts: Dict[Tuple[int, str], str] = {}
+        self._amounts: Dict[int, str] = {}
+        # Entries serialized by `chunks`
+        self.rows = 0
+
+    @staticmethod
+    def header() -> str:
+        return DELIMITER.join(FEC_HEADER) + LINE_TERMINATOR
+
+    def _amount(self, cents: int) -> str:
+        text = self._amounts.get(cents)
+        if text is None:
+            text = format_cents(cents)
+            if len(self._amounts) < _AMOUNT_CACHE_SIZE:
+                self._amounts[cents] = text
+        return text
+
+    def _account(self, account_number: int, account_name: str) -> str:
+        key = (account_number, account_name)
+        text = self._accounts.get(key)
+        if text is None:
+            text = self._accounts[key] = f"{account_number}{DELIMITER}{_quote(account_name)}"
+        return text
+
+    def batch_lines(self, batch: EntryBatch) -> Iterator[str]:
+        """Yields the lines of a batch, read column by column without building entry objects."""
+        prefix, dates, accounts, amounts = self._prefix, self._dates, self._accounts, self._amounts
+        names = batch.names
+        for ordinal, number, account_number, name_id, description, side, cents in zip(
+                batch.dates, batch.numbers, batch.accounts, batch.name_ids, batch.descriptions, batch.sides, batch.cents):
+            day = dates.get(ordinal)
+            if day is None:
+                day = dates[ordinal] = date.fromordinal(ordinal).strftime('%Y%m%d')
+            account = accounts.get((account_number, names[name_id]))
+            if account is None:
+                account = self._account(account_number, names[name_id])
+            amount = amounts.get(cents)
+            if amount is None:
+                amount = self._amount(cents)
+            if _needs_quoting(description):
+                description = _quote(description)
+            # CompAuxNum, CompAuxLib and PieceRef, then EcritureLet and DateLet,
+            # then Montantdevise and Idevise are always empty
+            if side == DEBIT:
+                yield f"{prefix}{number:05d}\t{day}\t{account}\t\t\t\t{day}\t{description}\t{amount}\t\t\t\t{day}\t\t\n"
+            else:
+                yield f"{prefix}{number:05d}\t{day}\t{account}\t\t\t\t{day}\t{description}\t\t{amount}\t\t\t{day}\t\t\n"
+
+    def entry_lines(self, entries: Iterable[AccountingEntry]) -> Iterator[str]:
+        """Yields the lines of entries read one at a time, so a generator of entries is never held in memory."""
+        prefix, dates, account, amount = self._prefix, self._dates, self._account, self._amount
+        for entry in entries:
+            day = dates.get(entry.entry_date)
+            if day is None:
+                day = dates[entry.entry_date] = entry.entry_date.strftime('%Y%m%d')
+            debit = amount(to_cents(entry.debit)) if entry.debit is not None else ""
+            credit = amount(to_cents(entry.credit)) if entry.credit is not None else ""
+            yield (f"{prefix}{entry.ecriture_num:05d}\t{day}\t{account(entry.account_number, entry.account_name)}"
+                   f"\t\t\t\t{day}\t{_quote(entry.description)}\t{debit}\t{credit}\t\t\t{day}\t\t\n")
+
+    def journal_lines(self, rows: Iterable[JournalRow]) -> Iterator[str]:
+        """
+        Yields the lines of journal rows, e.g. from `iter_journal`, so amounts go
+        from the database to the file without leaving cents.
+        """
+        prefix, dates, accounts, amounts = self._prefix, self._dates, self._accounts, self._amounts
+        for entry_date, account_number, account_name, description, debit, credit, number in rows:
+            day = dates.get(entry_date)
+            if day is None:
+                day = dates[entry_date] = entry_date.strftime('%Y%m%d')
+            account = accounts.get((account_number, account_name))
+            if account is None:
+                account = self._account(account_number, account_name)
+            if _needs_quoting(description):
+                description = _quote(description)
+            if debit is not None:
+                amount = amounts.get(debit)
+                if amount is None:
+                    amount = self._amount(debit)
+                yield f"{prefix}{number:05d}\t{day}\t{account}\t\t\t\t{day}\t{description}\t{amount}\t\t\t\t{day}\t\t\n"
+            else:
+                amount = amounts.get(credit)
+                if amount is None:
+                    amount = self._amount(credit)
+                yield f"{prefix}{number:05d}\t{day}\t{account}\t\t\t\t{day}\t{description}\t\t{amount}\t\t\t{day}\t\t\n"
+
+    def lines(self, entries: Entries) -> Iterator[str]:
+        """Yields the lines of a batch, of entries, or of journal rows."""
+        if isinstance(entries, EntryBatch):
+            return self.batch_lines(entries)
+        return self._iterable_lines(iter(entries))
+
+    def _iterable_lines(self, entries: Iterator) -> Iterator[str]:
+        first = next(entries, None)
+        if first is None:
+            return
+        if isinstance(first, AccountingEntry):
+            yield from self.entry_lines(chain((first,), entries))
+        else:
+            yield from self.journal_lines(chain((first,), entries))
+
+    def chunks(self, entries: Entries, header: bool = True,
+               chunk_rows: int = 4096) -> Iterator[str]:
+        """Yields the FEC of `entries` as strings of `chunk_rows` lines, reusing one buffer."""
+        buffer: List[str] = [self.header()] if header else []
+        append = buffer.append
+        for text in self.lines(entries):
+            append(text)
+            self.rows += 1
+            if len(buffer) >= chunk_rows:
+                yield ''.join(buffer)
+                buffer.clear()
+        if buffer:
+            yield ''.join(buffer)
+
+def write_fec(entries: Entries, stream: TextIO, journal_code: str = "AC",
+              journal_lib: str = "ACHATS", header: bool = True) -> int:
+    """
+    Writes accounting entries to a text stream in the French FEC format, in chunks of lines.
+
+    Args:
+        entries: AccountingEntry objects, e.g. from `generate_entries_from_invoices`,
+            an EntryBatch, or journal rows, e.g. from `iter_journal`.
+        stream: The file or buffer written to.
+        journal_code: The journal code to use for these entries (e.g., 'AC' for Achat).
+        journal_lib: The library for the journal.
+        header: Whether to write the header row, e.g. False to append another journal.
+
+    Returns:
+        The number of entries written.
+    """
+    writer = FecWriter(journal_code, journal_lib)
+    for chunk in writer.chunks(entries, header):
+        stream.write(chunk)
+    return writer.rows
+
+def iter_fec(entries: Entries, journal_code: str = "AC",
+             journal_lib: str = "ACHATS", header: bool = True, chunk_rows: int = 1000) -> Iterator[str]:
+    """
+    Yields the FEC file of `entries` in pieces of `chunk_rows` rows, e.g. for a
+    streamed HTTP response. Only one piece is held in memory at a time.
+    """
+    return FecWriter(journal_code, journal_lib).chunks(entries, header, chunk_rows)
+
+def export_to_fec(entries: Entries, journal_code: str = "AC",
+                  journal_lib: str = "ACHATS") -> str:
     """
     Exports a list of accounting entries to a string in the French FEC format.
+    For large exports, `write_fec` writes to a file without building the string.
 
     Args:
-        entries: A list of AccountingEntry objects.
+        entries: A list of AccountingEntry objects, or an EntryBatch, which is
+            read column by column without building entry objects.
         journal_code: The journal code to use for these entries (e.g., 'AC' for Achat).
         journal_lib: The library for the journal.
 
     Returns:
         A string containing the data in FEC CSV format (tab-delimited).
     """
-    output = io.StringIO()
-    # Explicitly set the line terminator to `\n` to avoid `\r\n` issues on some systems.
-    writer = csv.writer(output, delimiter='\t', lineterminator='\n')
-
-    writer.writerow(FEC_HEADER)
-
-    ecriture_num = 1
-
-    for entry in entries:
-        entry_date_str = entry.entry_date.strftime('%Y%m%d')
-        debit_str = f"{entry.debit:.2f}".replace('.', ',') if entry.debit is not None else ""
-        credit_str = f"{entry.credit:.2f}".replace('.', ',') if entry.credit is not None else ""
-
-        row = [
-            journal_code,
-            journal_lib,
-            str(ecriture_num).zfill(5),
-            entry_date_str,
-            str(entry.account_number),
-            entry.account_name,
-            "",  # CompAuxNum
-            "",  # CompAuxLib
-            "",  # PieceRef
-            entry_date_str, # PieceDate
-            entry.description,
-            debit_str,
-            credit_str,
-            "",  # EcritureLet
-            "",  # DateLet
-            entry_date_str, # ValidDate
-            "",  # Montantdevise
-            ""   # Idevise
-        ]
-        writer.writerow(row)
-
-    return output.getvalue()
+    return ''.join(FecWriter(journal_code, journal_lib).chunks(entries))
@@ -0,0 +1,351 @@
+"""
+Reading FEC files back: parsing, validation and import into the journal.
+
+Clients taken over from other software bring their history as FEC files of
+hundreds of megabytes. `FecReader` maps such a file with mmap and reads it
+line by line, so the file is never loaded whole. `read_ecritures` groups the
+lines into écritures and checks them in the same pass: 18 columns, dates,
+amounts, and the balance of each écriture and of each journal. `import_fec`
+validates a whole file before loading it into the journal in batches, in a
+single transaction, with progress reports.
+"""
+import csv
+import datetime
+import mmap
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.core.export.fec_exporter import FEC_HEADER
+
+# Errors kept in a report; further ones are only counted
+MAX_REPORTED_ERRORS = 100
+# Lines a quoted field may span
+MAX_QUOTED_LINES = 100
+
+
+class FecFormatError(ValueError):
+    """Raised when a file is not a FEC file at all, e.g. its header is wrong."""
+
+
+class FecLine(NamedTuple):
+    """One parsed line of a FEC file, amounts in cents."""
+    line: int
+    journal_code: str
+    journal_lib: str
+    ecriture_num: str
+    entry_date: datetime.date
+    account_number: int
+    account_name: str
+    description: str
+    debit: int
+    credit: int
+
+
+@dataclass
+class FecReport:
+    """Counters and errors of a FEC file, filled in as it is read."""
+    lines: int = 0
+    ecritures: int = 0
+    # Écritures left out because one of their lines is invalid or they do not balance
+    rejected: int = 0
+    # Debit and credit totals in cents per journal code, over every valid line
+    journals: Dict[str, List[int]] = field(default_factory=dict)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    error_count: int = 0
+    # Écritures stored by `import_fec`
+    imported: int = 0
+
+    def add_error(self, line: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    @property
+    def valid(self) -> bool:
+        return self.error_count == 0
+
+
+def parse_amount(text: str) -> int:
+    """
+    Parses a FEC amount ('1234,56', '-12.5', '' for zero) into cents.
+
+    Raises:
+        ValueError: If `text` is not an amount with at most two decimals.
+    """
+    text = text.strip()
+    if not text:
+        return 0
+    sign = -1 if text.startswith('-') else 1
+    units, _, decimals = text.lstrip('+-').replace('.', ',').partition(',')
+    if not (units or decimals) or (units and not units.isdigit()) or (decimals and not decimals.isdigit()) \
+            or len(decimals) > 2:
+        raise ValueError(f"Invalid amount {text!r}")
+    return sign * (int(units or 0) * 100 + int(decimals.ljust(2, '0') or 0))
+
+
+class FecReader:
+    """
+    Reads a FEC file through a read-only memory map.
+
+    The header is checked on opening. Fields may be separated by tabs or pipes,
+    as the format allows, and quoted as `csv.writer` quotes them.
+
+    Args:
+        path: The FEC file.
+        encoding: Its text encoding; the format also allows ISO-8859-15.
+
+    Raises:
+        FecFormatError: If the file is empty or its header is not `FEC_HEADER`.
+    """
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        self.path = path
+        self.encoding = encoding
+        with open(path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise FecFormatError(f"{path} is empty")
+        self.size = len(self._map)
+        # Bytes read so far, for progress reports
+        self.position = 0
+        self.line_number = 0
+        header = self._next_line()
+        if header is None:
+            self.close()
+            raise FecFormatError(f"{path} is empty")
+        header = header.lstrip('\ufeff')
+        self.delimiter = '\t' if '\t' in header else '|'
+        columns = header.split(self.delimiter)
+        if columns != FEC_HEADER:
+            self.close()
+            raise FecFormatError(f"{path}: the header must be the {len(FEC_HEADER)} FEC columns, got {columns[:20]}")
+
+    def __enter__(self) -> 'FecReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+
+    def _next_line(self) -> Optional[str]:
+        if self.position >= self.size:
+            return None
+        end = self._map.find(b'\n', self.position)
+        if end < 0:
+            end = self.size
+        raw = self._map[self.position:end]
+        self.position = end + 1
+        self.line_number += 1
+        if raw.endswith(b'\r'):
+            raw = raw[:-1]
+        return raw.decode(self.encoding)
+
+    def rows(self) -> Iterator[Tuple[int, Optional[List[str]], Optional[str]]]:
+        """
+        Yields the (line number, fields, error) of each data line, skipping
+        blank lines. A line that cannot be parsed comes with an error, and
+        fields split without regard to quotes.
+        """
+        delimiter = self.delimiter
+        opening_quote = delimiter + '"'
+        while True:
+            text = self._next_line()
+            if text is None:
+                return
+            line = self.line_number
+            if not text:
+                continue
+            # A quote only quotes when it opens a field, as in 'x|"a|b"'; in
+            # 'ECRAN 24"' it is part of the text
+            if not text.startswith('"') and opening_quote not in text:
+                yield line, text.split(delimiter), None
+                continue
+            # A quoted field may hold line breaks: read on, within limits, until it is closed
+            first = text
+            resume = (self.position, self.line_number)
+            joined = 0
+            while True:
+                try:
+                    yield line, next(csv.reader([text], delimiter=delimiter, strict=True)), None
+                    break
+                except csv.Error as e:
+                    more = None
+                    if str(e) == 'unexpected end of data' and joined < MAX_QUOTED_LINES:
+                        more = self._next_line()
+                    if more is None:
+                        # Go on from the next line, which may be valid
+                        self.position, self.line_number = resume
+                        yield line, first.split(delimiter), f"Malformed quoted field: {e}"
+                        break
+                    text += '\n' + more
+                    joined += 1
+
+
+def _parse_line(line: int, fields: List[str], dates: Dict[str, datetime.date]) -> FecLine:
+    if len(fields) != len(FEC_HEADER):
+        raise ValueError(f"{len(fields)} columns instead of {len(FEC_HEADER)}")
+    entry_date = dates.get(fields[3])
+    if entry_date is None:
+        try:
+            entry_date = dates[fields[3]] = datetime.datetime.strptime(fields[3], '%Y%m%d').date()
+        except ValueError:
+            raise ValueError(f"Invalid EcritureDate {fields[3]!r}")
+    if not fields[4].isdigit():
+        raise ValueError(f"Invalid CompteNum {fields[4]!r}")
+    debit = parse_amount(fields[11])
+    credit = parse_amount(fields[12])
+    if debit < 0 or credit < 0:
+        raise ValueError("Negative amount")
+    if debit and credit:
+        raise ValueError("A line cannot have both a debit and a credit")
+    return FecLine(line, fields[0], fields[1], fields[2], entry_date, int(fields[4]), fields[5], fields[10],
+                   debit, credit)
+
+
+def read_ecritures(reader: FecReader, report: FecReport) -> Iterator[List[FecLine]]:
+    """
+    Yields the écritures of a FEC file, each as its list of lines, in one pass.
+
+    Consecutive lines with the same JournalCode and EcritureNum form an
+    écriture. Écritures with an invalid line, or whose debits and credits
+    differ, are counted as rejected in `report` and not yielded. Journal
+    totals, over every line read, are checked once the file is read.
+    """
+    dates: Dict[str, datetime.date] = {}
+    journals = report.journals
+
+    def accept(ecriture: List[FecLine], valid: bool) -> bool:
+        report.ecritures += 1
+        if valid and sum(l.debit for l in ecriture) != sum(l.credit for l in ecriture):
+            first = ecriture[0]
+            report.add_error(first.line, f"Écriture {first.journal_code} {first.ecriture_num} does not balance")
+            valid = False
+        if not valid:
+            report.rejected += 1
+        return valid
+
+    current: List[FecLine] = []
+    current_key = None
+    valid = True
+    for line, fields, error in reader.rows():
+        report.lines += 1
+        key = tuple(fields[0:3:2])
+        if key != current_key:
+            if current_key is not None and accept(current, valid):
+                yield current
+            current, current_key, valid = [], key, True
+        if error is not None:
+            report.add_error(line, error)
+            valid = False
+            continue
+        try:
+            parsed = _parse_line(line, fields, dates)
+        except ValueError as e:
+            report.add_error(line, str(e))
+            valid = False
+            continue
+        current.append(parsed)
+        totals = journals.get(parsed.journal_code)
+        if totals is None:
+            totals = journals[parsed.journal_code] = [0, 0]
+        totals[0] += parsed.debit
+        totals[1] += parsed.credit
+    if current_key is not None and accept(current, valid):
+        yield current
+
+    for journal_code, (debit, credit) in sorted(journals.items()):
+        if debit != credit:
+            report.add_error(reader.line_number, f"Journal {journal_code} does not balance")
+
+
+def validate_fec(path: str, encoding: str = 'utf-8') -> FecReport:
+    """Reads a whole FEC file and returns its report, without importing anything."""
+    report = FecReport()
+    with FecReader(path, encoding) as reader:
+        for _ in read_ecritures(reader, report):
+            pass
+    return report
+
+
+def import_fec(path: str, user_id: int, encoding: str = 'utf-8', batch_size: int = 5000,
+               progress: Optional[Callable[[int, int], None]] = None, skip_invalid: bool = False) -> FecReport:
+    """
+    Imports the écritures of a FEC file into a user's journal.
+
+    The whole file is validated first. A file with errors is not imported,
+    unless `skip_invalid` is set, in which case its balanced écritures are
+    imported and the rejected ones listed in the report. Écritures are
+    numbered in the user's sequence of their fiscal year, in file order, and
+    inserted with their account balances about `batch_size` lines at a time,
+    so memory stays bounded whatever the size of the file. All of them are
+    committed in one transaction, rolled back if the import fails.
+
+    Args:
+        progress: Called during both passes with the bytes read so far and
+            the total, twice the file size.
+    """
+    from src.api.extensions import db
+    from src.core.accounting.batch import CREDIT, DEBIT, EntryBatch
+    from src.core.accounting.posting import fiscal_year, insert_batch, reserve_ecriture_nums
+
+    report = FecReport()
+    with FecReader(path, encoding) as reader:
+        total = 2 * reader.size
+        for i, _ in enumerate(read_ecritures(reader, report)):
+            if progress and i % batch_size == 0:
+                progress(reader.position, total)
+    if not report.valid and not skip_invalid:
+        return report
+
+    pending: List[List[FecLine]] = []
+    pending_lines = 0
+
+    def flush():
+        # Number the écritures of each fiscal year in a block, then insert them journal by journal
+        counts: Dict[int, int] = {}
+        for ecriture in pending:
+            year = fiscal_year(ecriture[0].entry_date)
+            counts[year] = counts.get(year, 0) + 1
+        next_numbers = {year: reserve_ecriture_nums(user_id, year, count) for year, count in sorted(counts.items())}
+        batches: Dict[Tuple[str, str], EntryBatch] = {}
+        for ecriture in pending:
+            year = fiscal_year(ecriture[0].entry_date)
+            number = next_numbers[year]
+            next_numbers[year] += 1
+            first = ecriture[0]
+            batch = batches.get((first.journal_code, first.journal_lib))
+            if batch is None:
+                batch = batches[(first.journal_code, first.journal_lib)] = EntryBatch()
+            for l in ecriture:
+                side, cents = (CREDIT, l.credit) if l.credit else (DEBIT, l.debit)
+                batch.append_cents(l.entry_date, l.account_number, l.account_name, l.description, side, cents, number)
+        for (journal_code, journal_lib), batch in batches.items():
+            insert_batch(user_id, batch, journal_code, journal_lib)
+        report.imported += len(pending)
+        pending.clear()
+
+    try:
+        with FecReader(path, encoding) as reader:
+            # The file was counted in the first pass
+            for ecriture in read_ecritures(reader, FecReport()):
+                pending.append(ecriture)
+                pending_lines += len(ecriture)
+                if pending_lines >= batch_size:
+                    flush()
+                    pending_lines = 0
+                    if progress:
+                        progress(reader.size + reader.position, total)
+            if pending:
+                flush()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        report.imported = 0
+        raise
+    if progress:
+        progress(total, total)
+    return report
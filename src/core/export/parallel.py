@@ -0,0 +1,155 @@
+"""
+FEC generation sharded by écriture number over worker processes.
+
+Écritures keep the number they were given when posted, and the FEC lists
+them in that order, so a fiscal year splits into ranges of numbers. Each
+worker reads one range through its own database connection and formats it,
+and the segments are written out in order. The result is the same, byte for
+byte, as `fec_chunks`, the single-process export.
+
+The workers belong to one pool per process, started with the 'spawn' method:
+the web server is threaded, and a forked child would inherit locks held by
+its other threads. The pool outlives requests, so its processes are only
+started once.
+"""
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from src.core.accounting.models import JournalEntry
+from src.core.auth.models import User # Ensures models are registered in spawned workers
+from src.core.invoicing.models import Invoice # Ensures models are registered in spawned workers
+from src.core.accounting.posting import iter_journal, load_journal
+from src.core.export.fec_exporter import FecWriter, iter_fec
+
+# Écritures per segment: bounds the memory of a worker and of the parent's queue
+SHARD_ECRITURES = 10000
+
+ShardTask = Tuple[str, int, int, Tuple[int, int], str, str]
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _engine(database_uri: str):
+    # One connection per task: workers are not tied to a database
+    return create_engine(database_uri, poolclass=NullPool)
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    """Returns this process's pool of `workers` export processes, created on first use."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+        return pool
+
+
+def _discard_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    """Drops a pool whose processes died, so the next export starts a new one."""
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False)
+
+
+def ecriture_range(connection, user_id: int, year: int, journal_code: str) -> Optional[Tuple[int, int]]:
+    """Returns the first and last écriture numbers of a journal's fiscal year, None if it is empty."""
+    first, last = connection.execute(
+        select(func.min(JournalEntry.ecriture_num), func.max(JournalEntry.ecriture_num))
+        .where(JournalEntry.user_id == user_id, JournalEntry.fiscal_year == year,
+               JournalEntry.journal_code == journal_code)
+    ).one()
+    return None if first is None else (first, last)
+
+
+def number_ranges(first: int, last: int, size: int) -> List[Tuple[int, int]]:
+    """Splits the numbers `first` to `last` into consecutive ranges of at most `size` numbers."""
+    return [(start, min(start + size - 1, last)) for start in range(first, last + 1, size)]
+
+
+def _segment(task: ShardTask) -> str:
+    """Formats the écritures of one range of numbers."""
+    database_uri, user_id, year, numbers, journal_code, journal_lib = task
+    engine = _engine(database_uri)
+    try:
+        with engine.connect() as connection:
+            batch = load_journal(user_id, year, journal_code, numbers, bind=connection)
+    finally:
+        engine.dispose()
+    return ''.join(FecWriter(journal_code, journal_lib).batch_lines(batch))
+
+
+def fec_chunks(database_uri: str, user_id: int, year: int, journal_code: str = "AC",
+               journal_lib: str = "ACHATS", header: bool = True) -> Iterator[str]:
+    """Yields the FEC of a fiscal year from one connection, in écriture order."""
+    engine = _engine(database_uri)
+    try:
+        with engine.connect() as connection:
+            yield from iter_fec(iter_journal(user_id, year, journal_code, bind=connection),
+                                journal_code, journal_lib, header)
+    finally:
+        engine.dispose()
+
+
+def parallel_fec_chunks(database_uri: str, user_id: int, year: int, journal_code: str = "AC",
+                        journal_lib: str = "ACHATS", header: bool = True, workers: Optional[int] = None,
+                        shard_size: int = SHARD_ECRITURES) -> Iterator[str]:
+    """
+    Yields the FEC of a fiscal year in segments of `shard_size` écriture
+    numbers, each formatted by one of `workers` processes. At most `workers`
+    segments are being formatted or waiting to be written out at once, plus
+    the segment being yielded.
+
+    The database must be reachable from other processes at `database_uri`,
+    which rules out in-memory SQLite.
+    """
+    engine = _engine(database_uri)
+    try:
+        with engine.connect() as connection:
+            numbers = ecriture_range(connection, user_id, year, journal_code)
+    finally:
+        engine.dispose()
+
+    if header:
+        yield FecWriter.header()
+    if numbers is None:
+        return
+    workers = workers or os.cpu_count() or 1
+    remaining = ((database_uri, user_id, year, shard, journal_code, journal_lib)
+                 for shard in number_ranges(*numbers, shard_size))
+    pool = _pool(workers)
+    # Segments are submitted as earlier ones are written out, in order,
+    # rather than all at once as executor.map would
+    pending = deque()
+    try:
+        pending.extend(pool.submit(_segment, task) for task in islice(remaining, workers))
+        while pending:
+            segment = pending.popleft().result()
+            task = next(remaining, None)
+            if task is not None:
+                pending.append(pool.submit(_segment, task))
+            yield segment
+    except BrokenProcessPool:
+        _discard_pool(workers, pool)
+        raise
+    finally:
+        # The pool is shared: drop the work of an export that stopped early
+        for future in pending:
+            future.cancel()
+
+
+def is_shared_database(database_uri: str) -> bool:
+    """Whether other processes can open the database, i.e. it is not an in-memory SQLite one."""
+    url = make_url(database_uri)
+    return not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'))
@@ -25,6 +25,9 @@ class Invoice(db.Model):
     user = relationship('User', backref=db.backref('invoices', lazy=True))
     line_items = relationship('LineItem', back_populates='invoice', cascade="all, delete-orphan")
 
+    # Summaries select a user's validated invoices over a period
+    __table_args__ = (db.Index('ix_invoices_user_status_date', 'user_id', 'status', 'invoice_date'),)
+
     def __repr__(self):
         return f'<Invoice {self.id} ({self.filename})>'
 
@@ -36,11 +39,12 @@ class LineItem(db.Model):
     quantity = db.Column(db.Numeric(10, 2), nullable=True, default=1)
     unit_price_ht = db.Column(db.Numeric(10, 2), nullable=True)
     total_ht = db.Column(db.Numeric(10, 2), nullable=False)
+    category = db.Column(db.String(255), nullable=True)
     vat_rate = db.Column(db.Numeric(5, 2), nullable=True) # e.g., 20.00, 5.50
     vat_amount = db.Column(db.Numeric(10, 2), nullable=True)
 
     # Relationships
-    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False, index=True)
     invoice = relationship('Invoice', back_populates='line_items')
 
     def __repr__(self):
@@ -0,0 +1,84 @@
+"""
+Money as integer cents.
+
+Amounts arrive as floats from OCR, as `Decimal` from `Numeric` columns and as
+strings from files. Converting them once to integer cents makes sums and
+balance checks exact, with plain integer arithmetic, whatever the number of
+amounts. Floats and decimals are only produced again at the edges: JSON
+responses, database columns and exported files.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, NewType, Optional, Union
+
+Cents = NewType('Cents', int)
+
+Amount = Union[int, float, Decimal, str]
+
+_CENT = Decimal('0.01')
+_NEAR_HALF = 0.4999
+
+
+def to_cents(amount: Amount) -> Cents:
+    """
+    Converts an amount in euros to integer cents.
+
+    Floats give the cents `f"{amount:.2f}"` prints, i.e. their exact binary
+    value rounded half to even: 273.145 is stored just below the half cent
+    and gives 27314, while the exact 61.125 gives 6112. Strings and decimals
+    are rounded exactly, half away from zero.
+    """
+    if type(amount) is float:
+        scaled = amount * 100
+        cents = round(scaled)
+        # The product can be off by an ulp, which only matters next to a half
+        # cent (and stays far below 1e-4 for amounts under a billion euros):
+        # there, fall back to the exact rounding of the printed value.
+        diff = scaled - cents
+        if diff > _NEAR_HALF or diff < -_NEAR_HALF:
+            return int(('%.2f' % amount).replace('.', ''))
+        return cents
+    if type(amount) is int:
+        return amount * 100
+    if isinstance(amount, str):
+        amount = Decimal(amount.replace(' ', '').replace(',', '.'))
+    return int((amount * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def optional_cents(amount: Optional[Amount]) -> Optional[Cents]:
+    """`to_cents`, passing None through."""
+    return None if amount is None else to_cents(amount)
+
+
+def from_cents(cents: int) -> float:
+    """Returns the amount in euros as a float, e.g. for JSON."""
+    return cents / 100
+
+
+def to_decimal(cents: int) -> Decimal:
+    """Returns the amount in euros as a two-decimal `Decimal`, e.g. for `Numeric` columns."""
+    return Decimal(cents).scaleb(-2).quantize(_CENT)
+
+
+def sum_cents(amounts: Iterable[Optional[Amount]]) -> Cents:
+    """Sums amounts exactly, skipping None."""
+    return sum(to_cents(a) for a in amounts if a is not None)
+
+
+def percentage(cents: int, rate: Amount) -> Cents:
+    """
+    Applies a percentage with up to two decimals (e.g. 5.5 for 5.5 % VAT),
+    rounding half away from zero.
+    """
+    basis_points = to_cents(rate)
+    value = abs(cents) * basis_points
+    result = (value + 5000) // 10000
+    return result if cents >= 0 else -result
+
+
+def format_cents(cents: int, separator: str = ',') -> str:
+    """Formats cents with two decimals and `separator` as the decimal mark, e.g. '-1234,50'."""
+    if cents < 0:
+        units, rest = divmod(-cents, 100)
+        return f"-{units}{separator}{rest:02d}"
+    units, rest = divmod(cents, 100)
+    return f"{units}{separator}{rest:02d}"
@@ -0,0 +1,146 @@
+"""
+Adaptive multi-pass OCR.
+
+Most invoices read correctly from a low-resolution image, which Tesseract
+processes several times faster than a full 300 DPI page. The adaptive reader
+starts with such a cheap pass and checks the result with
+`validate_invoice_totals`: when Total HT + TVA = Total TTC the invoice is
+accepted, otherwise the next, more expensive pass runs (full resolution,
+then a different page segmentation mode). Counters and timings per pass show
+how often the fast path is enough.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from src.core.ocr.preprocess import PreprocessConfig, DEFAULT_PREPROCESSING
+from src.core.ocr.reader import extract_text_from_image, extract_words_from_image
+from src.core.ocr.extractor import extract_invoice_data
+from src.core.ocr.layout import WordIndex, extract_invoice_data_from_index
+from src.core.timing import summarize_durations
+from src.core.vat.calculator import validate_invoice_totals
+
+
+class OcrPass(NamedTuple):
+    """One attempt at reading a document: preprocessing settings and Tesseract page segmentation mode."""
+    name: str
+    preprocessing: PreprocessConfig
+    psm: Optional[int] = None
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}={self.preprocessing.version}/psm-{self.psm if self.psm is not None else 'auto'}"
+
+
+# 150 DPI, or about half an A4 page at 300 DPI for images without metadata
+FAST_PASS = OcrPass('fast', PreprocessConfig(target_dpi=150, max_pixels=1240 * 1754))
+FULL_PASS = OcrPass('full', DEFAULT_PREPROCESSING)
+# A single uniform block of text, which often recovers the totals column
+# when the automatic segmentation splits it from its labels
+BLOCK_PASS = OcrPass('block', DEFAULT_PREPROCESSING, psm=6)
+
+DEFAULT_PASSES = (FAST_PASS, FULL_PASS, BLOCK_PASS)
+
+
+class AdaptiveStats:
+    """
+    Thread-safe counters of an `AdaptiveReader`: for each pass, how many times
+    it ran, how many documents it settled, and how long its last
+    `duration_window` runs took, so a long-running server keeps bounded timings.
+    """
+
+    def __init__(self, pass_names: Sequence[str], duration_window: int = 1000):
+        self._lock = threading.Lock()
+        self.runs = {name: 0 for name in pass_names}
+        self.accepted = {name: 0 for name in pass_names}
+        self.durations: Dict[str, Deque[float]] = {name: deque(maxlen=duration_window) for name in pass_names}
+        # Documents for which no pass produced consistent totals
+        self.unresolved = 0
+
+    def record(self, name: str, seconds: float, valid: bool) -> None:
+        with self._lock:
+            self.runs[name] += 1
+            self.durations[name].append(seconds)
+            if valid:
+                self.accepted[name] += 1
+
+    def record_unresolved(self) -> None:
+        with self._lock:
+            self.unresolved += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns the counters and the timing summary of each pass."""
+        with self._lock:
+            documents = sum(self.accepted.values()) + self.unresolved
+            return {
+                'documents': documents,
+                'unresolved': self.unresolved,
+                'passes': {
+                    name: {
+                        'runs': self.runs[name],
+                        'accepted': self.accepted[name],
+                        'accept_rate': self.accepted[name] / self.runs[name] if self.runs[name] else 0.0,
+                        **summarize_durations(self.durations[name]),
+                    }
+                    for name in self.runs
+                },
+            }
+
+
+class AdaptiveReader:
+    """
+    Reads invoices with a sequence of increasingly expensive OCR passes,
+    stopping at the first one whose extracted totals are consistent.
+
+    Args:
+        passes: The passes to try, cheapest first.
+        validate: Decides whether extracted data is good enough to stop.
+    """
+
+    def __init__(self, passes: Sequence[OcrPass] = DEFAULT_PASSES,
+                 validate: Callable[[Dict[str, Any]], bool] = validate_invoice_totals):
+        if not passes:
+            raise ValueError("AdaptiveReader needs at least one pass")
+        self.passes = tuple(passes)
+        self.validate = validate
+        self.stats = AdaptiveStats([p.name for p in self.passes])
+
+    @property
+    def version(self) -> str:
+        """A string identifying the passes, used in the OCR cache key."""
+        return 'adaptive:' + ';'.join(p.version for p in self.passes)
+
+    def _run_pass(self, image_path: str, ocr_pass: OcrPass, engine: str) -> Tuple[str, Dict[str, Any]]:
+        if engine == 'layout':
+            index = WordIndex(extract_words_from_image(image_path, ocr_pass.preprocessing, ocr_pass.psm))
+            return index.text(), extract_invoice_data_from_index(index)
+        raw_text = extract_text_from_image(image_path, ocr_pass.preprocessing, ocr_pass.psm)
+        return raw_text, extract_invoice_data(raw_text)
+
+    def read_invoice(self, image_path: str, engine: str = 'regex',
+                     trace: Optional[list] = None) -> Tuple[str, Dict[str, Any], str]:
+        """
+        Reads an invoice, running further passes only while the totals do not add up.
+        If `trace` is given, a (pass_name, seconds, valid) tuple is appended to
+        it for every pass run, e.g. to report from a worker process.
+
+        Returns:
+            A tuple (raw_text, invoice_data, pass_name). When no pass validates,
+            the result of the last pass that produced text is returned.
+        """
+        result = ('', extract_invoice_data(''), self.passes[-1].name)
+        for ocr_pass in self.passes:
+            start = time.perf_counter()
+            raw_text, data = self._run_pass(image_path, ocr_pass, engine)
+            valid = bool(raw_text) and self.validate(data)
+            seconds = time.perf_counter() - start
+            self.stats.record(ocr_pass.name, seconds, valid)
+            if trace is not None:
+                trace.append((ocr_pass.name, seconds, valid))
+            if valid:
+                return raw_text, data, ocr_pass.name
+            if raw_text:
+                result = (raw_text, data, ocr_pass.name)
+        self.stats.record_unresolved()
+        return result
@@ -0,0 +1,188 @@
+"""
+A persistent, content-addressed cache of OCR results.
+
+Entries are keyed by the SHA-256 of the image file together with the OCR
+settings (language, preprocessing and extractor versions), so a file that was
+scanned once is never sent to Tesseract again, whatever name it is stored
+under. Each entry holds the raw OCR text and the `extract_invoice_data`
+output. The store is a small SQLite database with least-recently-used
+eviction once its total size goes over a configured byte budget.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from flask import current_app
+
+from src.core.ocr.reader import extract_text_from_image, extract_words_from_image, OCR_LANG, PREPROCESSING_VERSION
+from src.core.ocr.extractor import extract_invoice_data, EXTRACTOR_VERSION
+from src.core.ocr.layout import WordIndex, extract_invoice_data_from_index
+from src.core.ocr.adaptive import AdaptiveReader
+from src.core.accounting.categorizer import Categorizer
+
+# Extraction engines: 'regex' works on the flat OCR text, 'layout' on word boxes
+EXTRACTION_ENGINES = ('regex', 'layout')
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """Returns the hex SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(path: str, lang: str = OCR_LANG, preprocessing: str = PREPROCESSING_VERSION, engine: str = 'regex') -> str:
+    """Builds the cache key for a file and the OCR settings used to read it."""
+    return f"{file_digest(path)}:{lang}:{preprocessing}:{engine}-{EXTRACTOR_VERSION}"
+
+
+class OcrResultStore:
+    """
+    SQLite-backed LRU store for OCR results.
+
+    Args:
+        path: The database file, or ':memory:' for a process-local store.
+        max_bytes: Total size of stored text and data above which the least
+            recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_results ("
+            " key TEXT PRIMARY KEY,"
+            " raw_text TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_ocr_results_last_used ON ocr_results (last_used)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Returns `(raw_text, data)` for a key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT raw_text, data FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE ocr_results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return row[0], json.loads(row[1])
+
+    def put(self, key: str, raw_text: str, data: Dict[str, Any]) -> None:
+        """Stores a result, then evicts old entries if the store is over budget."""
+        encoded = json.dumps(data)
+        size = len(raw_text.encode('utf-8')) + len(encoded)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, raw_text, data, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, raw_text, encoded, size, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM ocr_results ORDER BY last_used").fetchall():
+            self._conn.execute("DELETE FROM ocr_results WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM ocr_results")
+            self._conn.commit()
+
+
+class OcrCache:
+    """
+    Flask extension giving routes and OCR jobs a shared `OcrResultStore`.
+
+    The store lives at `OCR_CACHE_PATH` (default: `ocr_cache.sqlite3` in the
+    instance folder) and is bounded by `OCR_CACHE_MAX_BYTES`. Cache misses are
+    read with the engine named by `OCR_EXTRACTION_ENGINE`; with `OCR_ADAPTIVE`
+    they go through an `AdaptiveReader`, a cheap low-resolution pass first.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('OCR_CACHE_PATH', None)
+        app.config.setdefault('OCR_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+        app.config.setdefault('OCR_EXTRACTION_ENGINE', 'regex')
+        app.config.setdefault('OCR_ADAPTIVE', False)
+        if app.config['OCR_EXTRACTION_ENGINE'] not in EXTRACTION_ENGINES:
+            raise ValueError(f"OCR_EXTRACTION_ENGINE must be one of {EXTRACTION_ENGINES}")
+        path = app.config['OCR_CACHE_PATH'] or os.path.join(app.instance_path, 'ocr_cache.sqlite3')
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        app.extensions['ocr_cache'] = OcrResultStore(path, app.config['OCR_CACHE_MAX_BYTES'])
+        app.extensions['ocr_adaptive'] = AdaptiveReader()
+
+    @property
+    def store(self) -> OcrResultStore:
+        return current_app.extensions['ocr_cache']
+
+    @property
+    def adaptive(self) -> AdaptiveReader:
+        return current_app.extensions['ocr_adaptive']
+
+    def read_invoice(self, image_path: str, categorizer: Optional[Categorizer] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Returns the raw OCR text and extracted invoice data for an image,
+        running Tesseract only if this file has not been read before.
+
+        The cache is shared by all users and holds line items categorized with
+        the shared keywords; a tenant's `categorizer` is applied on the way out.
+        """
+        engine = current_app.config['OCR_EXTRACTION_ENGINE']
+        adaptive = current_app.config['OCR_ADAPTIVE']
+        preprocessing = self.adaptive.version if adaptive else PREPROCESSING_VERSION
+        key = cache_key(image_path, preprocessing=preprocessing, engine=engine)
+        cached = self.store.get(key)
+        if cached is not None:
+            return self._categorized(cached, categorizer)
+
+        if adaptive:
+            raw_text, data, _ = self.adaptive.read_invoice(image_path, engine)
+        elif engine == 'layout':
+            index = WordIndex(extract_words_from_image(image_path))
+            raw_text = index.text()
+            data = extract_invoice_data_from_index(index)
+        else:
+            raw_text = extract_text_from_image(image_path)
+            data = extract_invoice_data(raw_text)
+        # The reader returns an empty string on failure, which is not worth keeping
+        if raw_text:
+            self.store.put(key, raw_text, data)
+        return self._categorized((raw_text, data), categorizer)
+
+    @staticmethod
+    def _categorized(result: Tuple[str, Dict[str, Any]], categorizer: Optional[Categorizer]) -> Tuple[str, Dict[str, Any]]:
+        if categorizer is None:
+            return result
+        raw_text, data = result
+        return raw_text, categorizer.categorize_invoice(data)
@@ -0,0 +1,49 @@
+"""
+Helpers to score OCR extraction results against known ground truth.
+
+Ground truth for an image lives next to it in a JSON file with the same base
+name (e.g. `synthetic_invoice.png` and `synthetic_invoice.json`), holding the
+fields `extract_invoice_data` is expected to return.
+"""
+import json
+import math
+import os
+from typing import Any, Dict, Optional
+
+# Header fields compared one by one; line items are compared by count
+SCORED_FIELDS = ('supplier', 'invoice_id', 'date', 'total_ht', 'vat_amount', 'total_ttc')
+
+
+def ground_truth_path(image_path: str) -> str:
+    """Returns the path of the ground-truth JSON file for an image."""
+    return os.path.splitext(image_path)[0] + '.json'
+
+
+def load_ground_truth(image_path: str) -> Optional[Dict[str, Any]]:
+    """Loads the ground truth for an image, or returns None if there is none."""
+    path = ground_truth_path(image_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _same(expected: Any, actual: Any) -> bool:
+    if isinstance(expected, float) and isinstance(actual, (int, float)):
+        return math.isclose(expected, actual, abs_tol=0.005)
+    return expected == actual
+
+
+def score_fields(expected: Dict[str, Any], actual: Dict[str, Any]) -> Dict[str, bool]:
+    """
+    Compares extracted data to the ground truth, field by field.
+
+    Returns:
+        A dictionary mapping each scored field present in the ground truth,
+        plus 'line_items' when expected, to whether it was extracted correctly.
+    """
+    scores = {field: _same(expected[field], actual.get(field))
+              for field in SCORED_FIELDS if field in expected}
+    if 'line_items' in expected:
+        scores['line_items'] = len(expected['line_items']) == len(actual.get('line_items') or [])
+    return scores
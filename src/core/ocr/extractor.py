@@ -1,13 +1,29 @@
 import re
-from typing import Dict, Any, Optional, List
-from src.core.accounting.categorizer import categorize_item
-
-def _search_pattern(text: str, pattern: str, group: int = 1) -> Optional[str]:
-    """Helper function to search for a regex pattern and return a specific group."""
-    match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-    if match:
-        return match.group(group).strip()
-    return None
+from typing import Dict, Any, Optional, List, Iterable, Iterator
+from src.core.accounting.categorizer import Categorizer, DEFAULT_CATEGORIZER
+
+# Bump when the shape or content of `extract_invoice_data` output changes,
+# so cached extraction results are not reused across versions.
+EXTRACTOR_VERSION = 1
+
+# One line of the items table: description, quantity, unit price and total
+LINE_ITEM_PATTERN = re.compile(r"^(.*?)\s*?(\d+)\s*.*?([\d,]+\.\d{2})\s*\|?\s*([\d,]+\.\d{2})$")
+
+# The items table sits between its header row and the 'Total HT' line
+TABLE_PATTERN = re.compile(r"Description\s*\|.*?\n(.*?)Total HT:", re.DOTALL | re.IGNORECASE)
+
+# Header fields, one alternative each. Every alternative captures its value in
+# named groups, so a single scan over the text finds all of them.
+HEADER_PATTERNS = {
+    'invoice_id': r"FACTURE N°:\s*(?P<invoice_id>\S+)",
+    'date': r"Date:\s*(?P<date>\d{2}/\d{2}/\d{4})",
+    'total_ht': r"Total HT:\s*(?P<total_ht>[\d\s,.]+)",
+    'total_ttc': r"Total TTC:\s*(?P<total_ttc>[\d\s,.]+)",
+    # VAT with its rate, e.g. 'TVA (20%): 200.00'
+    'vat': r"TVA\s*\(?\s*(?P<vat_rate>\d+\.?\d*)\s*%\s*\)?:\s*(?P<vat_amount>[\d\s,.]+)",
+    # Fallback when the rate is not printed, just get the amount
+    'vat_fallback': r"TVA:\s*(?P<vat_fallback>[\d\s,.]+)",
+}
 
 def _parse_amount(amount_str: Optional[str]) -> Optional[float]:
     """Helper function to parse a string amount into a float."""
@@ -19,12 +35,14 @@ def _parse_amount(amount_str: Optional[str]) -> Optional[float]:
     except (ValueError, TypeError):
         return None
 
-def _parse_line_items(text: str) -> List[Dict[str, Any]]:
+def _parse_line_items(text: str, categorizer: Categorizer = DEFAULT_CATEGORIZER,
+                      supplier: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Parses the line items from the invoice's OCR text using a robust regex.
+    Items are categorized by `categorizer`, given the invoice's supplier.
     """
     items = []
-    table_match = re.search(r"Description\s*\|.*?\n(.*?)Total HT:", text, re.DOTALL | re.IGNORECASE)
+    table_match = TABLE_PATTERN.search(text)
 
     if not table_match:
         return items
@@ -32,17 +50,15 @@ def _parse_line_items(text: str) -> List[Dict[str, Any]]:
     table_text = table_match.group(1)
     lines = table_text.strip().split('\n')
 
-    line_pattern = re.compile(r"^(.*?)\s*?(\d+)\s*.*?([\d,]+\.\d{2})\s*\|?\s*([\d,]+\.\d{2})$")
-
     for line in lines:
-        match = line_pattern.search(line)
+        match = LINE_ITEM_PATTERN.search(line)
         if match:
             description = match.group(1).replace('|', '').strip()
             quantity = int(match.group(2))
             unit_price = _parse_amount(match.group(3))
             total = _parse_amount(match.group(4))
 
-            category = categorize_item(description)
+            category = categorizer.categorize(description, supplier)
 
             items.append({
                 "description": description,
@@ -54,43 +70,96 @@ def _parse_line_items(text: str) -> List[Dict[str, Any]]:
     return items
 
 
-def extract_invoice_data(text: str) -> Dict[str, Any]:
+class InvoiceScanner:
+    """
+    Extracts invoice header fields with one compiled pattern.
+
+    All header patterns, which must start with a literal letter, are joined
+    into a single alternation, so the text is scanned once and each field
+    keeps its first occurrence, as separate searches would, even where matches
+    overlap. Build it once and reuse it; the module-level `extract_invoice_data`
+    uses a shared instance.
+    """
+
+    def __init__(self, patterns: Dict[str, str] = HEADER_PATTERNS):
+        # Every label starts with a letter; checking it first lets the scan skip
+        # most positions without trying each alternative in turn.
+        first_letters = ''.join(sorted({c for p in patterns.values() for c in (p[0].lower(), p[0].upper())}))
+        alternatives = '|'.join(f"(?:{p})" for p in patterns.values())
+        # Matched inside a lookahead, so matches are zero-width and one field's
+        # value cannot swallow the label of the next, as in 'FACTURE N°:\nDate: ...'
+        self.pattern = re.compile(f"(?=[{re.escape(first_letters)}])(?=(?:{alternatives}))",
+                                  re.IGNORECASE | re.MULTILINE)
+        # The group that closes each alternative tells which field it matched
+        self._field_by_group = {}
+        for field, p in patterns.items():
+            last_group = re.findall(r"\(\?P<(\w+)>", p)[-1]
+            self._field_by_group[last_group] = field
+        self._required = set(patterns) - {'vat_fallback'}
+
+    def scan(self, text: str) -> Dict[str, re.Match]:
+        """Returns the first match of each header field found in `text`."""
+        found = {}
+        for match in self.pattern.finditer(text):
+            field = self._field_by_group[match.lastgroup]
+            if field not in found:
+                found[field] = match
+                if self._required.issubset(found):
+                    break
+        return found
+
+    def extract(self, text: str, categorizer: Categorizer = DEFAULT_CATEGORIZER) -> Dict[str, Any]:
+        """
+        Extracts structured data from raw OCR text.
+        """
+        found = self.scan(text)
+
+        def value(field: str, group: Optional[str] = None) -> Optional[str]:
+            match = found.get(field)
+            return match.group(group or field).strip() if match else None
+
+        # The supplier is the first line of the document
+        first_line, newline, _ = text.partition('\n')
+        supplier = first_line.strip() if newline else None
+
+        # Prefer the VAT line that carries the rate
+        vat_rate = None
+        if 'vat' in found:
+            vat_rate = _parse_amount(value('vat', 'vat_rate'))
+            vat_amount_str = value('vat', 'vat_amount')
+        else:
+            vat_amount_str = value('vat_fallback')
+
+        return {
+            'supplier': supplier,
+            'invoice_id': value('invoice_id'),
+            'date': value('date'),
+            'total_ht': _parse_amount(value('total_ht')),
+            'vat_rate': vat_rate,
+            'vat_amount': _parse_amount(vat_amount_str),
+            'total_ttc': _parse_amount(value('total_ttc')),
+            'line_items': _parse_line_items(text, categorizer, supplier)
+        }
+
+    def extract_many(self, texts: Iterable[str],
+                     categorizer: Categorizer = DEFAULT_CATEGORIZER) -> Iterator[Dict[str, Any]]:
+        """Extracts data from each text in turn, yielding results lazily."""
+        extract = self.extract
+        for text in texts:
+            yield extract(text, categorizer)
+
+
+_SCANNER = InvoiceScanner()
+
+
+def extract_invoice_data(text: str, categorizer: Categorizer = DEFAULT_CATEGORIZER) -> Dict[str, Any]:
     """
     Extracts structured data from raw OCR text using regular expressions.
+    Line items are categorized with `categorizer`, the shared keywords by default.
     """
-    patterns = {
-        'supplier': r"^(.*?)\n",
-        'invoice_id': r"FACTURE N°:\s*(\S+)",
-        'date': r"Date:\s*(\d{2}/\d{2}/\d{4})",
-        'total_ht': r"Total HT:\s*([\d\s,.]+)",
-        'total_ttc': r"Total TTC:\s*([\d\s,.]+)"
-    }
-
-    raw_data = {key: _search_pattern(text, pat) for key, pat in patterns.items()}
-
-    # Custom handling for VAT to extract both rate and amount
-    vat_rate = None
-    vat_amount_str = None
-    vat_pattern = r"TVA\s*\(?\s*(\d+\.?\d*)\s*%\s*\)?:\s*([\d\s,.]+)"
-    vat_match = re.search(vat_pattern, text, re.IGNORECASE)
-    if vat_match:
-        vat_rate = _parse_amount(vat_match.group(1))
-        vat_amount_str = vat_match.group(2)
-    else:
-        # Fallback to old pattern if rate is not found, just get the amount
-        vat_amount_str = _search_pattern(text, r"TVA:\s*([\d\s,.]+)")
-
-    line_items = _parse_line_items(text)
-
-    data = {
-        'supplier': raw_data.get('supplier'),
-        'invoice_id': raw_data.get('invoice_id'),
-        'date': raw_data.get('date'),
-        'total_ht': _parse_amount(raw_data.get('total_ht')),
-        'vat_rate': vat_rate,
-        'vat_amount': _parse_amount(vat_amount_str),
-        'total_ttc': _parse_amount(raw_data.get('total_ttc')),
-        'line_items': line_items
-    }
-
-    return data
+    return _SCANNER.extract(text, categorizer)
+
+
+def extract_many(texts: Iterable[str], categorizer: Categorizer = DEFAULT_CATEGORIZER) -> Iterator[Dict[str, Any]]:
+    """Extracts structured data from a batch of OCR texts."""
+    return _SCANNER.extract_many(texts, categorizer)
@@ -0,0 +1,94 @@
+"""
+A bounded background worker pool for OCR jobs.
+
+Uploads hand their work to this queue and return immediately. Worker threads
+run each job inside an application context, so jobs can use `db.session` just
+like a request handler would. OCR itself runs in a `tesseract` subprocess, so
+threads are enough to keep several scans in flight.
+"""
+import logging
+import queue
+import threading
+from typing import Any, Callable
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the OCR job queue cannot accept more work."""
+
+
+class _WorkerPool:
+    """The per-application queue and its worker threads."""
+
+    def __init__(self, app, workers: int, queue_size: int):
+        self.app = app
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._run, name=f"ocr-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _run(self):
+        while True:
+            func, args = self.jobs.get()
+            try:
+                with self.app.app_context():
+                    func(*args)
+            except Exception:
+                logger.exception("OCR job %s failed", getattr(func, '__name__', func))
+            finally:
+                self.jobs.task_done()
+
+
+class OcrJobQueue:
+    """
+    Flask extension dispatching OCR jobs to a bounded worker pool.
+
+    The pool is sized from the `OCR_WORKERS` and `OCR_QUEUE_SIZE` settings and
+    is started on the first submitted job. With `OCR_EAGER` set, jobs run
+    inline in the caller, which keeps tests deterministic.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('OCR_WORKERS', 2)
+        app.config.setdefault('OCR_QUEUE_SIZE', 32)
+        app.config.setdefault('OCR_EAGER', False)
+        app.extensions['ocr_jobs'] = None
+
+    def _get_pool(self) -> _WorkerPool:
+        app = current_app._get_current_object()
+        with self._lock:
+            pool = app.extensions.get('ocr_jobs')
+            if pool is None:
+                pool = _WorkerPool(app, app.config['OCR_WORKERS'], app.config['OCR_QUEUE_SIZE'])
+                app.extensions['ocr_jobs'] = pool
+            return pool
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> None:
+        """
+        Queues `func(*args)` for a worker thread.
+
+        Raises:
+            QueueFullError: If the queue already holds `OCR_QUEUE_SIZE` jobs.
+        """
+        if current_app.config['OCR_EAGER']:
+            func(*args)
+            return
+        try:
+            self._get_pool().jobs.put_nowait((func, args))
+        except queue.Full:
+            raise QueueFullError("The OCR queue is full, try again later.")
+
+    def pending(self) -> int:
+        """Returns the approximate number of jobs waiting for a worker."""
+        pool = current_app.extensions.get('ocr_jobs')
+        return pool.jobs.qsize() if pool is not None else 0
@@ -0,0 +1,328 @@
+"""
+Layout-aware invoice extraction from Tesseract word boxes.
+
+Instead of running regular expressions over one flat block of text, this
+engine reads Tesseract's TSV output (`image_to_data`) once, groups the words
+into visual rows and indexes them by token. Header fields are then found by
+looking up their label in the index and reading the words to its right, and
+table rows are split into columns using the x positions of the table header.
+The output has the same shape as `extract_invoice_data`.
+"""
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from src.core.accounting.categorizer import Categorizer, DEFAULT_CATEGORIZER
+from src.core.ocr.extractor import _parse_amount, LINE_ITEM_PATTERN
+
+
+class Word(NamedTuple):
+    """A word recognised by Tesseract, with its bounding box in pixels."""
+    text: str
+    left: int
+    top: int
+    width: int
+    height: int
+    conf: float = -1.0
+    page: int = 1
+
+    @property
+    def right(self) -> int:
+        return self.left + self.width
+
+    @property
+    def center_x(self) -> float:
+        return self.left + self.width / 2
+
+
+class Row:
+    """Words sharing the same vertical band of a page, sorted left to right."""
+
+    __slots__ = ('page', 'center', 'height', 'words')
+
+    def __init__(self, word: Word):
+        self.page = word.page
+        self.center = word.top + word.height / 2
+        self.height = word.height
+        self.words = [word]
+
+    def accepts(self, word: Word) -> bool:
+        center = word.top + word.height / 2
+        return word.page == self.page and abs(center - self.center) <= max(self.height, word.height) / 2
+
+    @property
+    def text(self) -> str:
+        return ' '.join(w.text for w in self.words)
+
+
+def parse_tsv(tsv: str, page: int = 1) -> List[Word]:
+    """
+    Parses the TSV output of `pytesseract.image_to_data` into words,
+    skipping the rows that describe blocks, paragraphs and lines.
+    """
+    words = []
+    lines = tsv.splitlines()
+    if not lines:
+        return words
+    columns = {name: i for i, name in enumerate(lines[0].split('\t'))}
+    text_col = columns['text']
+    for line in lines[1:]:
+        fields = line.split('\t')
+        if len(fields) <= text_col or fields[columns['level']] != '5':
+            continue
+        text = fields[text_col].strip()
+        if not text:
+            continue
+        words.append(Word(
+            text=text,
+            left=int(fields[columns['left']]),
+            top=int(fields[columns['top']]),
+            width=int(fields[columns['width']]),
+            height=int(fields[columns['height']]),
+            conf=float(fields[columns['conf']]),
+            page=page,
+        ))
+    return words
+
+
+# Geometry given to words that come from a PDF text layer rather than OCR
+_CHAR_WIDTH = 10
+_LINE_HEIGHT = 20
+
+
+def words_from_text(text: str, page: int = 1) -> List[Word]:
+    """
+    Builds words from plain text, such as a PDF text layer, placing each
+    character on a fixed grid so that rows and columns keep their layout.
+    """
+    words = []
+    for line_number, line in enumerate(text.splitlines()):
+        for match in re.finditer(r"\S+", line):
+            words.append(Word(
+                text=match.group(),
+                left=match.start() * _CHAR_WIDTH,
+                top=line_number * _LINE_HEIGHT,
+                width=len(match.group()) * _CHAR_WIDTH,
+                height=_LINE_HEIGHT - 2,
+                page=page,
+            ))
+    return words
+
+
+_TOKEN_STRIP = ':|()'
+_AMOUNT_WORD = re.compile(r"^[\d,.]+€?$")
+_DATE_WORD = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+_RATE_WORD = re.compile(r"(\d+[.,]?\d*)\s*%")
+_QUANTITY_WORD = re.compile(r"^\d+$")
+
+
+def _token(text: str) -> str:
+    return text.strip(_TOKEN_STRIP).lower()
+
+
+class WordIndex:
+    """
+    Spatial index over the words of a document: words are grouped into rows,
+    and every row is indexed by the tokens it contains.
+    """
+
+    def __init__(self, words: Iterable[Word]):
+        self.rows: List[Row] = []
+        for word in sorted(words, key=lambda w: (w.page, w.top + w.height / 2, w.left)):
+            if self.rows and self.rows[-1].accepts(word):
+                self.rows[-1].words.append(word)
+            else:
+                self.rows.append(Row(word))
+        self._by_token: Dict[str, List[int]] = defaultdict(list)
+        for i, row in enumerate(self.rows):
+            row.words.sort(key=lambda w: w.left)
+            for token in {_token(w.text) for w in row.words}:
+                self._by_token[token].append(i)
+
+    def find_rows(self, *tokens: str) -> List[int]:
+        """Returns the indices of the rows containing all of `tokens`, top to bottom."""
+        candidates = [self._by_token.get(t, []) for t in tokens]
+        if not all(candidates):
+            return []
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for other in candidates[1:]:
+            result.intersection_update(other)
+        return sorted(result)
+
+    def words_after(self, row_index: int, token: str) -> List[Word]:
+        """Returns the words to the right of the first `token` in a row."""
+        words = self.rows[row_index].words
+        for i, word in enumerate(words):
+            if _token(word.text) == token:
+                return words[i + 1:]
+        return []
+
+    def text(self) -> str:
+        """Rebuilds plain text, one line per row."""
+        return '\n'.join(row.text for row in self.rows)
+
+
+def _trailing_amount(words: Sequence[Word]) -> Optional[float]:
+    """Parses the run of numeric words at the end of `words`, e.g. '1 000,00'."""
+    parts = []
+    for word in reversed(words):
+        if not _AMOUNT_WORD.match(word.text):
+            break
+        parts.append(word.text.rstrip('€'))
+    if not parts:
+        return None
+    return _parse_amount(''.join(reversed(parts)))
+
+
+def _label_amount(index: WordIndex, *tokens: str) -> Optional[float]:
+    for row_index in index.find_rows(*tokens):
+        amount = _trailing_amount(index.words_after(row_index, tokens[-1]))
+        if amount is not None:
+            return amount
+    return None
+
+
+def _find_date(index: WordIndex) -> Optional[str]:
+    for row_index in index.find_rows('date'):
+        for word in index.words_after(row_index, 'date'):
+            if _DATE_WORD.match(word.text):
+                return word.text
+    return None
+
+
+def _find_invoice_id(index: WordIndex) -> Optional[str]:
+    for row_index in index.find_rows('facture'):
+        after = index.words_after(row_index, 'facture')
+        # Skip the 'N°:' label, which OCR may split or glue in various ways
+        while after and _token(after[0].text) in ('n°', 'n', '°', 'no', ''):
+            after = after[1:]
+        if after:
+            return after[0].text.lstrip(':')
+    return None
+
+
+def _find_vat(index: WordIndex):
+    """Returns (vat_rate, vat_amount) from the first 'TVA' row that has an amount."""
+    for row_index in index.find_rows('tva'):
+        words = index.words_after(row_index, 'tva')
+        amount = _trailing_amount(words)
+        if amount is None:
+            continue
+        rate = None
+        rate_match = _RATE_WORD.search(' '.join(w.text for w in words))
+        if rate_match:
+            rate = _parse_amount(rate_match.group(1))
+        return rate, amount
+    return None, None
+
+
+_HEADER_COLUMNS = {
+    'description': 'description',
+    'quantité': 'quantity', 'quantite': 'quantity', 'qté': 'quantity', 'qte': 'quantity',
+    'prix': 'unit_price',
+    'total': 'total',
+}
+
+
+def _table_columns(row: Row) -> Optional[List[tuple]]:
+    """
+    Returns the table columns as (name, left boundary) pairs, with boundaries
+    halfway between neighbouring header words, or None if the header is incomplete.
+    """
+    headers = []
+    for word in row.words:
+        name = _HEADER_COLUMNS.get(_token(word.text))
+        if name and name not in [h[0] for h in headers]:
+            headers.append((name, word))
+    if [h[0] for h in headers] != ['description', 'quantity', 'unit_price', 'total']:
+        return None
+    columns = [('description', float('-inf'))]
+    for (_, previous), (name, word) in zip(headers, headers[1:]):
+        columns.append((name, (previous.right + word.left) / 2))
+    return columns
+
+
+def _parse_table_row(row: Row, columns: Optional[List[tuple]], categorizer: Categorizer = DEFAULT_CATEGORIZER,
+                     supplier: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    if columns is None:
+        # No usable header geometry: fall back to the text pattern on this row only
+        match = LINE_ITEM_PATTERN.search(row.text)
+        if not match:
+            return None
+        description = match.group(1).replace('|', '').strip()
+        quantity, unit_price, total = int(match.group(2)), _parse_amount(match.group(3)), _parse_amount(match.group(4))
+    else:
+        cells = {name: [] for name, _ in columns}
+        for word in row.words:
+            if word.text == '|':
+                continue
+            name = columns[0][0]
+            for column, boundary in columns:
+                if word.center_x >= boundary:
+                    name = column
+            cells[name].append(word)
+        quantity_words = [w.text for w in cells['quantity'] if _QUANTITY_WORD.match(w.text)]
+        unit_price = _trailing_amount(cells['unit_price'])
+        total = _trailing_amount(cells['total'])
+        if not quantity_words or unit_price is None or total is None:
+            return None
+        description = ' '.join(w.text for w in cells['description']).replace('|', '').strip()
+        quantity = int(quantity_words[0])
+
+    return {
+        "description": description,
+        "category": categorizer.categorize(description, supplier),
+        "quantity": quantity,
+        "unit_price": unit_price,
+        "total": total
+    }
+
+
+def _parse_line_items(index: WordIndex, categorizer: Categorizer = DEFAULT_CATEGORIZER,
+                      supplier: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Reads the rows between each table header and the following 'Total HT'
+    row (or the end of the page), so tables continued over several pages
+    are read in full.
+    """
+    items = []
+    header_rows = index.find_rows('description')
+    total_rows = set(index.find_rows('total', 'ht'))
+    for start in header_rows:
+        header = index.rows[start]
+        columns = _table_columns(header)
+        for row_index in range(start + 1, len(index.rows)):
+            row = index.rows[row_index]
+            if row_index in total_rows or row.page != header.page or row_index in header_rows:
+                break
+            item = _parse_table_row(row, columns, categorizer, supplier)
+            if item:
+                items.append(item)
+    return items
+
+
+def extract_invoice_data_from_words(words: Iterable[Word], categorizer: Categorizer = DEFAULT_CATEGORIZER) -> Dict[str, Any]:
+    """
+    Extracts structured invoice data from OCR word boxes.
+
+    Returns:
+        A dictionary with the same keys as `extract_invoice_data`.
+    """
+    return extract_invoice_data_from_index(WordIndex(words), categorizer)
+
+
+def extract_invoice_data_from_index(index: WordIndex, categorizer: Categorizer = DEFAULT_CATEGORIZER) -> Dict[str, Any]:
+    """Same as `extract_invoice_data_from_words`, for an index built by the caller."""
+    vat_rate, vat_amount = _find_vat(index)
+    supplier = index.rows[0].text if index.rows else None
+    return {
+        'supplier': supplier,
+        'invoice_id': _find_invoice_id(index),
+        'date': _find_date(index),
+        'total_ht': _label_amount(index, 'total', 'ht'),
+        'vat_rate': vat_rate,
+        'vat_amount': vat_amount,
+        'total_ttc': _label_amount(index, 'total', 'ttc'),
+        'line_items': _parse_line_items(index, categorizer, supplier)
+    }
@@ -0,0 +1,116 @@
+"""
+Reading PDF invoices and statements.
+
+Pages are handled one at a time through a generator, so a long supplier
+statement is never fully rasterized in memory. Pages that carry a text layer
+(PDFs produced by accounting or billing software) are read directly, and only
+scanned pages are rendered to an image and sent to Tesseract. Scanned pages
+are OCR'd in parallel on a thread pool, with at most a few pages rendered
+ahead of the workers. The pool lives as long as the process: an in-process
+OCR engine is loaded once per thread, and new threads for every document
+would load the language model again each time.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, TypeVar
+
+from PIL import Image
+
+T = TypeVar('T')
+
+# Scanned pages are rendered at this resolution before preprocessing
+RENDER_DPI = 300
+# A page whose text layer has fewer characters than this is treated as a scan
+MIN_TEXT_LAYER_CHARS = 20
+
+_page_pools: Dict[int, ThreadPoolExecutor] = {}
+_page_pools_lock = threading.Lock()
+
+
+class PdfPage(NamedTuple):
+    """One PDF page: its embedded text, or a rendered image when it has none."""
+    number: int
+    text: Optional[str]
+    image: Optional[Image.Image]
+
+
+def is_pdf(path: str) -> bool:
+    return path.lower().endswith('.pdf')
+
+
+def _open_document(path: str):
+    try:
+        import pypdfium2
+    except ImportError:
+        raise RuntimeError("Reading PDF files requires the 'pypdfium2' package.")
+    return pypdfium2.PdfDocument(path)
+
+
+def iter_pdf_pages(path: str, dpi: int = RENDER_DPI) -> Iterator[PdfPage]:
+    """
+    Yields the pages of a PDF one by one, in order. Each page comes with its
+    text layer when it has one, otherwise with an image rendered at `dpi`.
+    """
+    document = _open_document(path)
+    try:
+        for i in range(len(document)):
+            page = document[i]
+            try:
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                if len(text.strip()) >= MIN_TEXT_LAYER_CHARS:
+                    yield PdfPage(i + 1, text.replace('\r\n', '\n'), None)
+                    continue
+                image = page.render(scale=dpi / 72).to_pil()
+                image.info['dpi'] = (dpi, dpi)
+                yield PdfPage(i + 1, None, image)
+            finally:
+                page.close()
+    finally:
+        document.close()
+
+
+def _page_pool(workers: int) -> ThreadPoolExecutor:
+    """Returns the process's pool of `workers` page OCR threads, created on first use."""
+    with _page_pools_lock:
+        pool = _page_pools.get(workers)
+        if pool is None:
+            pool = _page_pools[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ocr-page')
+        return pool
+
+
+def map_pages(pages: Iterator[PdfPage], ocr_page: Callable[[PdfPage], T],
+              read_text: Callable[[PdfPage], T], workers: Optional[int] = None) -> List[T]:
+    """
+    Applies `read_text` to text pages and `ocr_page` to scanned pages, the
+    latter on a shared pool of `workers` threads, and returns the results in
+    page order.
+
+    Rendering is the only step done on the calling thread (PDFium is not
+    thread-safe); no more than `workers` scanned pages wait for OCR at a time.
+    """
+    workers = workers or os.cpu_count() or 1
+    results = []
+    in_flight = deque()
+    executor = _page_pool(workers)
+    try:
+        for page in pages:
+            if page.image is None:
+                results.append(read_text(page))
+                continue
+            results.append(None)
+            in_flight.append((len(results) - 1, executor.submit(ocr_page, page)))
+            # Wait for the oldest page before rendering more than `workers` ahead
+            while len(in_flight) >= workers:
+                slot, future = in_flight.popleft()
+                results[slot] = future.result()
+        for slot, future in in_flight:
+            results[slot] = future.result()
+    finally:
+        # The pool is shared: do not leave pages of a failed document queued
+        for _, future in in_flight:
+            future.cancel()
+    return results
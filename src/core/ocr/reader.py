@@ -1,22 +1,164 @@
+import abc
+import logging
+import os
+import threading
+from typing import List, Optional
 from PIL import Image
 import pytesseract
+from src.core.ocr.preprocess import PreprocessConfig, DEFAULT_PREPROCESSING, preprocess_image
+from src.core.ocr.layout import Word, parse_tsv, words_from_text
+from src.core.ocr.pdf import is_pdf, iter_pdf_pages, map_pages
 
-def extract_text_from_image(image_path: str) -> str:
+logger = logging.getLogger(__name__)
+
+# OCR settings that change the text we get back. They are part of the OCR
+# cache key, so the preprocessing version follows the default pipeline settings.
+OCR_LANG = 'fra'
+PREPROCESSING_VERSION = DEFAULT_PREPROCESSING.version
+
+# Header of Tesseract's TSV output, as produced by `image_to_data`
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+
+class OcrBackend(abc.ABC):
+    """
+    Interface of the OCR engines the reader can use.
+    `psm` is Tesseract's page segmentation mode, None for its default.
+    """
+    name = None
+
+    @abc.abstractmethod
+    def image_to_string(self, image: Image.Image, lang: str, psm: Optional[int] = None) -> str:
+        """Returns the recognized text."""
+
+    @abc.abstractmethod
+    def image_to_data(self, image: Image.Image, lang: str, psm: Optional[int] = None) -> str:
+        """Returns word boxes as Tesseract TSV, header line included."""
+
+class PytesseractBackend(OcrBackend):
+    """
+    Runs the `tesseract` command line for every image. Each call starts a
+    process, writes the image to a temporary file and loads the language
+    model, which is slow for small receipts but needs no extra package.
+    """
+    name = 'pytesseract'
+
+    def _config(self, psm: Optional[int]) -> str:
+        return f"--psm {psm}" if psm is not None else ""
+
+    def image_to_string(self, image, lang, psm=None):
+        return pytesseract.image_to_string(image, lang=lang, config=self._config(psm))
+
+    def image_to_data(self, image, lang, psm=None):
+        return pytesseract.image_to_data(image, lang=lang, config=self._config(psm))
+
+class TesserocrBackend(OcrBackend):
+    """
+    Keeps Tesseract engines loaded in-process through `tesserocr`. Each
+    thread gets its own engine per language, created on first use, so the
+    language model is loaded once per worker and images are passed from
+    memory without temporary files.
+    """
+    name = 'tesserocr'
+
+    def __init__(self, tessdata_path: Optional[str] = None):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self._tessdata_path = tessdata_path or os.environ.get('TESSDATA_PREFIX')
+        self._local = threading.local()
+
+    def _engine(self, lang: str):
+        engines = self._local.__dict__.setdefault('engines', {})
+        engine = engines.get(lang)
+        if engine is None:
+            if self._tessdata_path:
+                engine = self._tesserocr.PyTessBaseAPI(path=self._tessdata_path, lang=lang)
+            else:
+                engine = self._tesserocr.PyTessBaseAPI(lang=lang)
+            engines[lang] = engine
+        return engine
+
+    def _load(self, image: Image.Image, lang: str, psm: Optional[int]):
+        engine = self._engine(lang)
+        engine.SetPageSegMode(psm if psm is not None else self._tesserocr.PSM.AUTO)
+        engine.SetImage(image)
+        dpi = image.info.get('dpi')
+        if dpi and dpi[0]:
+            engine.SetSourceResolution(int(dpi[0]))
+        return engine
+
+    def image_to_string(self, image, lang, psm=None):
+        return self._load(image, lang, psm).GetUTF8Text()
+
+    def image_to_data(self, image, lang, psm=None):
+        return TSV_HEADER + "\n" + self._load(image, lang, psm).GetTSVText(0)
+
+OCR_BACKENDS = {
+    'pytesseract': PytesseractBackend,
+    'tesserocr': TesserocrBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def create_backend(name: str = 'auto') -> OcrBackend:
+    """
+    Creates an OCR backend by name. 'auto' prefers the in-process engine and
+    falls back to pytesseract when `tesserocr` or its language data is missing.
+    """
+    if name == 'auto':
+        try:
+            backend = TesserocrBackend()
+            # Load the engine now so a broken installation falls back right away
+            backend._engine(OCR_LANG)
+            return backend
+        except Exception as e:
+            logger.info("In-process OCR engine unavailable (%s), using pytesseract", e)
+            return PytesseractBackend()
+    if name not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend '{name}', expected one of {sorted(OCR_BACKENDS)} or 'auto'")
+    return OCR_BACKENDS[name]()
+
+def set_backend(backend) -> OcrBackend:
+    """Sets the OCR backend used by the reader, given a name or an instance."""
+    global _backend
+    if isinstance(backend, str):
+        backend = create_backend(backend)
+    with _backend_lock:
+        _backend = backend
+    return backend
+
+def get_backend() -> OcrBackend:
+    """
+    Returns the reader's OCR backend, created on first use from $OCR_BACKEND:
+    'auto' (default), 'tesserocr' (in-process engines) or 'pytesseract' (one
+    subprocess per image).
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(os.environ.get('OCR_BACKEND', 'auto'))
+        return _backend
+
+def extract_text_from_image(image_path: str, preprocessing: PreprocessConfig = DEFAULT_PREPROCESSING,
+                            psm: Optional[int] = None) -> str:
     """
     Extracts text from an image file using Tesseract OCR.
+    PDF files are read page by page, see `extract_text_from_pdf`.
 
     Args:
         image_path: The path to the image file.
+        preprocessing: The preprocessing steps applied before OCR.
+        psm: Tesseract page segmentation mode, None for its default.
 
     Returns:
         The extracted text as a string.
         Returns an empty string if the file is not found or an error occurs.
     """
     try:
+        if is_pdf(image_path):
+            return extract_text_from_pdf(image_path, preprocessing, psm=psm)
         with Image.open(image_path) as img:
-            # Specify the language 'fra' for French
-            text = pytesseract.image_to_string(img, lang='fra')
-            return text
+            return _ocr_image(img, preprocessing, psm)
     except FileNotFoundError:
         # In a real application, you might want to log this error
         print(f"Error: The file at {image_path} was not found.")
@@ -25,3 +167,68 @@ def extract_text_from_image(image_path: str) -> str:
         # Log other potential errors
         print(f"An error occurred during OCR processing: {e}")
         return ""
+
+def _ocr_image(img: Image.Image, preprocessing: PreprocessConfig, psm: Optional[int] = None) -> str:
+    processed, timings = preprocess_image(img, preprocessing)
+    logger.debug("Preprocessed image in %s",
+                 ", ".join(f"{step}={seconds * 1000:.1f}ms" for step, seconds in timings.items()))
+    # Specify the language 'fra' for French
+    return get_backend().image_to_string(processed, OCR_LANG, psm)
+
+def _ocr_words(img: Image.Image, preprocessing: PreprocessConfig, page: int = 1, psm: Optional[int] = None) -> List[Word]:
+    processed, _ = preprocess_image(img, preprocessing)
+    return parse_tsv(get_backend().image_to_data(processed, OCR_LANG, psm), page=page)
+
+def extract_text_from_pdf(pdf_path: str, preprocessing: PreprocessConfig = DEFAULT_PREPROCESSING, workers: int = None,
+                          psm: Optional[int] = None) -> str:
+    """
+    Extracts text from a PDF. Pages with a text layer are read directly;
+    scanned pages are rendered one at a time and OCR'd on `workers` threads.
+
+    Returns:
+        The text of all pages, in order.
+    """
+    pages = map_pages(
+        iter_pdf_pages(pdf_path),
+        ocr_page=lambda page: _ocr_image(page.image, preprocessing, psm),
+        read_text=lambda page: page.text,
+        workers=workers
+    )
+    return '\n'.join(pages)
+
+def extract_words_from_pdf(pdf_path: str, preprocessing: PreprocessConfig = DEFAULT_PREPROCESSING, workers: int = None,
+                           psm: Optional[int] = None) -> List[Word]:
+    """Same as `extract_text_from_pdf`, returning word boxes tagged with their page number."""
+    pages = map_pages(
+        iter_pdf_pages(pdf_path),
+        ocr_page=lambda page: _ocr_words(page.image, preprocessing, page.number, psm),
+        read_text=lambda page: words_from_text(page.text, page.number),
+        workers=workers
+    )
+    return [word for page_words in pages for word in page_words]
+
+def extract_words_from_image(image_path: str, preprocessing: PreprocessConfig = DEFAULT_PREPROCESSING,
+                             psm: Optional[int] = None) -> List[Word]:
+    """
+    Extracts words and their bounding boxes from an image file using Tesseract OCR.
+
+    Args:
+        image_path: The path to the image file.
+        preprocessing: The preprocessing steps applied before OCR.
+        psm: Tesseract page segmentation mode, None for its default.
+
+    Returns:
+        The recognised words, in Tesseract's reading order.
+        Returns an empty list if the file is not found or an error occurs.
+    """
+    try:
+        if is_pdf(image_path):
+            return extract_words_from_pdf(image_path, preprocessing, psm=psm)
+        with Image.open(image_path) as img:
+            return _ocr_words(img, preprocessing, psm=psm)
+    except FileNotFoundError:
+        print(f"Error: The file at {image_path} was not found.")
+        return []
+    except Exception as e:
+        print(f"An error occurred during OCR processing: {e}")
+        return []
@@ -1,10 +1,20 @@
-from typing import List, Dict, Any
+import datetime
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import func, null, select
+
+from src.api.extensions import db
+from src.core.cashflow.models import Transaction
+from src.core.invoicing.models import Invoice, LineItem
+from src.core.money import from_cents, sum_cents, to_cents
 
 def generate_financial_summary(invoices: List[Dict[str, Any]]) -> Dict[str, float]:
     """
     Generates a financial summary from a list of processed invoice data.
 
     For now, this assumes all invoices are purchase invoices (expenses).
+    Amounts are summed in integer cents, so the totals are exact. For stored
+    invoices, see `financial_summary`.
 
     Args:
         invoices: A list of invoice data dictionaries.
@@ -12,26 +22,112 @@ def generate_financial_summary(invoices: List[Dict[str, Any]]) -> Dict[str, floa
     Returns:
         A dictionary containing summary metrics.
     """
-    total_expenses_ht = 0.0
-    total_vat_deductible = 0.0
-    total_expenses_ttc = 0.0
-
-    for invoice in invoices:
-        # We only consider invoices that have been successfully processed
-        if invoice.get('total_ht') is not None:
-            total_expenses_ht += invoice['total_ht']
-        if invoice.get('vat_amount') is not None:
-            total_vat_deductible += invoice['vat_amount']
-        if invoice.get('total_ttc') is not None:
-            total_expenses_ttc += invoice['total_ttc']
+    # We only consider invoices that have been successfully processed
+    total_expenses_ht = sum_cents(invoice.get('total_ht') for invoice in invoices)
+    total_vat_deductible = sum_cents(invoice.get('vat_amount') for invoice in invoices)
+    total_expenses_ttc = sum_cents(invoice.get('total_ttc') for invoice in invoices)
 
     # In the future, we would also process revenues and calculate profit/loss
     summary = {
-        "total_expenses_ht": round(total_expenses_ht, 2),
-        "total_vat_deductible": round(total_vat_deductible, 2),
-        "total_expenses_ttc": round(total_expenses_ttc, 2),
+        "total_expenses_ht": from_cents(total_expenses_ht),
+        "total_vat_deductible": from_cents(total_vat_deductible),
+        "total_expenses_ttc": from_cents(total_expenses_ttc),
         "total_revenue": 0.0, # Placeholder
-        "net_profit_loss": round(0 - total_expenses_ht, 2) # Placeholder
+        "net_profit_loss": from_cents(0 - total_expenses_ht) # Placeholder
     }
 
     return summary
+
+
+def _cents(total) -> int:
+    return to_cents(total) if total is not None else 0
+
+
+def financial_summary(user_id: int, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None,
+                      supplier: Optional[str] = None, category: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Summarizes a user's validated invoices and transactions, aggregated by the
+    database with GROUP BY queries rather than loaded row by row.
+
+    Expenses are the validated (purchase) invoices dated from `start` to `end`,
+    both included, optionally from one supplier. With a `category`, they are
+    only the line items of that category: their HT, and their VAT, or when a
+    line has none its share of the invoice's VAT in proportion to its HT.
+    Revenue is the credit transactions of the same dates; the supplier and
+    category filters do not apply to it.
+
+    Returns:
+        The same totals as `generate_financial_summary`, plus the invoice count
+        and the expenses by supplier and by category, largest first.
+    """
+    filters = [Invoice.user_id == user_id, Invoice.status == 'validated']
+    if start is not None:
+        filters.append(Invoice.invoice_date >= start)
+    if end is not None:
+        filters.append(Invoice.invoice_date <= end)
+    if supplier is not None:
+        filters.append(Invoice.supplier == supplier)
+
+    # One row per supplier; the overall totals add these few rows up
+    if category is None:
+        total_ht = func.sum(Invoice.total_ht)
+        supplier_query = (
+            select(Invoice.supplier, func.count(Invoice.id), total_ht, func.sum(Invoice.total_vat),
+                   func.sum(Invoice.total_ttc))
+            .where(*filters)
+        )
+    else:
+        line_vat = func.coalesce(LineItem.vat_amount,
+                                 LineItem.total_ht * Invoice.total_vat / func.nullif(Invoice.total_ht, 0))
+        total_ht = func.sum(LineItem.total_ht)
+        supplier_query = (
+            # TTC is HT + VAT, added up in cents below
+            select(Invoice.supplier, func.count(func.distinct(Invoice.id)), total_ht, func.sum(line_vat), null())
+            .join(LineItem, LineItem.invoice_id == Invoice.id)
+            .where(*filters, LineItem.category == category)
+        )
+    suppliers = []
+    for name, count, ht, vat, ttc in db.session.execute(
+            supplier_query.group_by(Invoice.supplier).order_by(total_ht.desc(), Invoice.supplier)):
+        ht, vat = _cents(ht), _cents(vat)
+        suppliers.append({'supplier': name, 'invoice_count': count, 'total_ht': ht, 'total_vat': vat,
+                          'total_ttc': _cents(ttc) if category is None else ht + vat})
+
+    line_total_ht = func.sum(LineItem.total_ht)
+    category_query = (
+        select(LineItem.category, func.count(LineItem.id), line_total_ht)
+        .join(Invoice, LineItem.invoice_id == Invoice.id)
+        .where(*filters)
+        .group_by(LineItem.category)
+        .order_by(line_total_ht.desc(), LineItem.category)
+    )
+    if category is not None:
+        category_query = category_query.where(LineItem.category == category)
+    categories = [
+        {'category': name, 'line_count': count, 'total_ht': from_cents(_cents(ht))}
+        for name, count, ht in db.session.execute(category_query)
+    ]
+
+    revenue_query = select(func.sum(Transaction.amount)).where(
+        Transaction.user_id == user_id, Transaction.transaction_type == 'credit')
+    if start is not None:
+        revenue_query = revenue_query.where(Transaction.transaction_date >= start)
+    if end is not None:
+        revenue_query = revenue_query.where(Transaction.transaction_date <= end)
+    total_revenue = _cents(db.session.execute(revenue_query).scalar())
+
+    total_expenses_ht = sum(s['total_ht'] for s in suppliers)
+    return {
+        "total_expenses_ht": from_cents(total_expenses_ht),
+        "total_vat_deductible": from_cents(sum(s['total_vat'] for s in suppliers)),
+        "total_expenses_ttc": from_cents(sum(s['total_ttc'] for s in suppliers)),
+        "total_revenue": from_cents(total_revenue),
+        "net_profit_loss": from_cents(total_revenue - total_expenses_ht),
+        "invoice_count": sum(s['invoice_count'] for s in suppliers),
+        "by_supplier": [
+            {**s, 'total_ht': from_cents(s['total_ht']), 'total_vat': from_cents(s['total_vat']),
+             'total_ttc': from_cents(s['total_ttc'])}
+            for s in suppliers
+        ],
+        "by_category": categories,
+    }
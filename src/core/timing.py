@@ -0,0 +1,29 @@
+"""
+Small helpers to summarize timings collected by scripts and benchmarks.
+"""
+import math
+from typing import Dict, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Returns the `pct` percentile (0-100) of `values` using the nearest-rank method.
+    Returns 0.0 for an empty sequence.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_durations(durations: Sequence[float]) -> Dict[str, float]:
+    """Returns count, mean, p50, p95 and max of a list of durations in seconds."""
+    count = len(durations)
+    return {
+        'count': count,
+        'mean': sum(durations) / count if count else 0.0,
+        'p50': percentile(durations, 50),
+        'p95': percentile(durations, 95),
+        'max': max(durations) if count else 0.0,
+    }
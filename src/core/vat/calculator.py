@@ -1,13 +1,17 @@
-import math
 from typing import Dict, Any
 
+from src.core.money import percentage, to_cents
+
+
 def validate_invoice_totals(invoice_data: Dict[str, Any]) -> bool:
     """
     Validates the consistency of invoice totals (HT, TVA, TTC).
 
-    Checks two things:
-    1. Total HT + VAT Amount == Total TTC
-    2. If a VAT rate is available, Total HT * (VAT Rate / 100) == VAT Amount
+    Checks two things, in integer cents:
+    1. Total HT + VAT Amount == Total TTC, exactly
+    2. If a VAT rate is available, Total HT * (VAT Rate / 100) == VAT Amount,
+       give or take one cent per line item, as suppliers may round the VAT
+       of each line rather than of the total
 
     Args:
         invoice_data: The structured data extracted from the invoice.
@@ -24,17 +28,19 @@ def validate_invoice_totals(invoice_data: Dict[str, Any]) -> bool:
     if total_ht is None or vat_amount is None or total_ttc is None:
         return False
 
+    ht_cents = to_cents(total_ht)
+    vat_cents = to_cents(vat_amount)
+
     # 1. Check if HT + VAT = TTC
-    # We use a small tolerance to handle potential floating point inaccuracies.
-    if not math.isclose(total_ht + vat_amount, total_ttc, rel_tol=1e-2):
+    if ht_cents + vat_cents != to_cents(total_ttc):
         return False
 
     # 2. If rate is available, check if calculated VAT matches extracted VAT
     if vat_rate is not None:
-        # Avoid division by zero, although rate should not be zero.
+        # A zero rate cannot be checked against the amount
         if vat_rate > 0:
-            calculated_vat = total_ht * (vat_rate / 100)
-            if not math.isclose(calculated_vat, vat_amount, rel_tol=1e-2):
+            tolerance = max(1, len(invoice_data.get('line_items') or ()))
+            if abs(percentage(ht_cents, vat_rate) - vat_cents) > tolerance:
                 return False
 
     # All checks passed
@@ -0,0 +1,224 @@
+"""
+Synthetic French invoices with known ground truth, for tests and benchmarks.
+
+`random_invoice` draws an invoice (supplier, dates, line items, VAT rate) and
+returns it in the same shape as `extract_invoice_data` output, which makes it
+directly usable as ground truth. `render_text` lays it out the way Tesseract
+reads our invoice template, and `render_image` prints it on a page image, with
+optional scan noise, for end-to-end OCR benchmarks. `generate_corpus` writes a
+set of such images next to their ground-truth JSON files.
+"""
+import datetime
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+SUPPLIERS = [
+    "Votre Entreprise", "Dupont & Fils", "Boulangerie Martin", "Transports Leroy",
+    "Cabinet Moreau Conseil", "Imprimerie du Centre", "Garage Petit", "Agence Lumière",
+    "Papeterie Bernard", "Société Générale d'Entretien", "Assurances Girard", "Atelier Roux",
+]
+
+# Line item descriptions with the category an accountant would give them
+DESCRIPTIONS = [
+    ("Service de conseil", "Documentation et honoraires"),
+    ("Honoraires expert-comptable", "Documentation et honoraires"),
+    ("Loyer bureau", "Locations"),
+    ("Location véhicule", "Locations"),
+    ("Fournitures de bureau", "Achats de matières premières et fournitures"),
+    ("Entretien des locaux", "Entretien et réparations"),
+    ("Réparation imprimante", "Entretien et réparations"),
+    ("Assurance flotte", "Primes d'assurance"),
+    ("Transport de colis", "Transports et déplacements"),
+    ("Frais de déplacement", "Transports et déplacements"),
+    ("Abonnement téléphone", "Frais postaux et télécommunications"),
+    ("Frais postaux", "Frais postaux et télécommunications"),
+    ("Campagne marketing", "Publicité et relations publiques"),
+    ("Publicité en ligne", "Publicité et relations publiques"),
+    ("Frais bancaires", "Services bancaires"),
+    ("Sous-traitance développement", "Sous-traitance"),
+    ("Produit A", "Autres"),
+    ("Cartouches d'encre", "Achats de matières premières et fournitures"),
+    ("Maintenance serveur", "Entretien et réparations"),
+    ("Formation sécurité", "Documentation et honoraires"),
+]
+
+VAT_RATES = [20.0, 20.0, 20.0, 10.0, 5.5, 2.1]
+
+TABLE_HEADER = "Description | Quantité | Prix unitaire | Total"
+
+
+def _format_rate(rate: float) -> str:
+    return f"{rate:g}"
+
+
+def random_invoice(rng: random.Random, year: int = 2023, max_lines: int = 6) -> Dict[str, Any]:
+    """
+    Draws a random invoice.
+
+    Returns:
+        A dictionary shaped like `extract_invoice_data` output, where each line
+        item also carries its expected 'category'.
+    """
+    date = datetime.date(year, 1, 1) + datetime.timedelta(days=rng.randrange(365))
+    vat_rate = rng.choice(VAT_RATES)
+    line_items = []
+    for description, category in rng.sample(DESCRIPTIONS, rng.randint(1, max_lines)):
+        quantity = rng.randint(1, 20)
+        unit_cents = rng.randint(100, 50000)
+        line_items.append({
+            'description': description,
+            'category': category,
+            'quantity': quantity,
+            'unit_price': unit_cents / 100,
+            'total': quantity * unit_cents / 100,
+        })
+    ht_cents = sum(round(item['total'] * 100) for item in line_items)
+    vat_cents = (ht_cents * round(vat_rate * 10) + 500) // 1000
+    return {
+        'supplier': rng.choice(SUPPLIERS),
+        'invoice_id': f"INV{year}-{rng.randint(1, 9999):04d}",
+        'date': date.strftime('%d/%m/%Y'),
+        'total_ht': ht_cents / 100,
+        'vat_rate': vat_rate,
+        'vat_amount': vat_cents / 100,
+        'total_ttc': (ht_cents + vat_cents) / 100,
+        'line_items': line_items,
+    }
+
+
+# Words appended to descriptions, as suppliers add references and periods
+_DESCRIPTION_SUFFIXES = ["", "", "mars 2023", "réf. 4412", "T2", "lot 3", "- forfait", "mensuel", "(acompte)"]
+
+
+def noisy_description(rng: random.Random, description: str) -> str:
+    """
+    Returns a variant of a description as found on real invoices: truncated
+    words, a dropped letter, or a reference appended.
+    """
+    words = description.split()
+    i = rng.randrange(len(words))
+    roll = rng.random()
+    if roll < 0.25 and len(words[i]) > 5:
+        words[i] = words[i][:rng.randint(3, 5)] + '.'
+    elif roll < 0.4 and len(words[i]) > 3:
+        j = rng.randrange(1, len(words[i]))
+        words[i] = words[i][:j] + words[i][j + 1:]
+    elif roll < 0.55:
+        words = [w.upper() for w in words]
+    suffix = rng.choice(_DESCRIPTION_SUFFIXES)
+    return ' '.join(words + ([suffix] if suffix else []))
+
+
+def render_lines(invoice: Dict[str, Any]) -> List[str]:
+    """Returns the text lines of an invoice, as printed on the template."""
+    lines = [
+        invoice['supplier'],
+        f"FACTURE N°: {invoice['invoice_id']}",
+        f"Date: {invoice['date']}",
+        "",
+        TABLE_HEADER,
+    ]
+    for item in invoice['line_items']:
+        lines.append(f"{item['description']} | {item['quantity']} | {item['unit_price']:.2f} | {item['total']:.2f}")
+    lines += [
+        f"Total HT: {invoice['total_ht']:.2f}",
+        f"TVA ({_format_rate(invoice['vat_rate'])}%): {invoice['vat_amount']:.2f}",
+        f"Total TTC: {invoice['total_ttc']:.2f}",
+    ]
+    return lines
+
+
+def render_text(invoice: Dict[str, Any]) -> str:
+    """Returns the invoice as the plain text Tesseract reads from the template."""
+    return '\n'.join(render_lines(invoice)) + '\n'
+
+
+# A4 in inches
+PAGE_SIZE = (8.27, 11.69)
+# Text size and margins, in points (1/72 inch)
+FONT_SIZE = 11
+MARGIN = 54
+LINE_SPACING = 1.6
+
+
+# Tried in order when no font is given; Pillow looks them up in the system font folders.
+# Its built-in fallback font has no accented letters.
+DEFAULT_FONTS = ('DejaVuSans.ttf', 'Arial.ttf', 'LiberationSans-Regular.ttf')
+
+
+def _load_font(size_px: int, font_path: Optional[str]) -> ImageFont.ImageFont:
+    if font_path:
+        return ImageFont.truetype(font_path, size_px)
+    for name in DEFAULT_FONTS:
+        try:
+            return ImageFont.truetype(name, size_px)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size_px)
+
+
+def render_image(invoice: Dict[str, Any], rng: Optional[random.Random] = None, noise: float = 0.0,
+                 dpi: int = 300, font_path: Optional[str] = None) -> Image.Image:
+    """
+    Prints an invoice on a blank A4 page.
+
+    Args:
+        invoice: An invoice from `random_invoice`.
+        rng: Source of randomness for the noise; required when `noise` > 0.
+        noise: From 0 (clean page) to 1 (a poor scan): slight rotation, speckles and blur.
+        dpi: Resolution of the page, stored in the image metadata.
+        font_path: A TrueType font; defaults to the first of `DEFAULT_FONTS` installed.
+
+    Returns:
+        An 8-bit grayscale image.
+    """
+    width, height = round(PAGE_SIZE[0] * dpi), round(PAGE_SIZE[1] * dpi)
+    img = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    font = _load_font(round(FONT_SIZE * dpi / 72), font_path)
+    margin = round(MARGIN * dpi / 72)
+    line_height = round(FONT_SIZE * LINE_SPACING * dpi / 72)
+    for i, line in enumerate(render_lines(invoice)):
+        draw.text((margin, margin + i * line_height), line, fill=0, font=font)
+
+    if noise > 0:
+        if rng is None:
+            raise ValueError("render_image needs an rng to add noise")
+        angle = rng.uniform(-2.0, 2.0) * noise
+        img = img.rotate(angle, resample=Image.Resampling.BILINEAR, expand=False, fillcolor=255)
+        # Dust and toner speckles, a few per square centimetre at full noise
+        draw = ImageDraw.Draw(img)
+        speckles = int(noise * width * height / (dpi * dpi) * 20)
+        draw.point([(rng.randrange(width), rng.randrange(height)) for _ in range(speckles)],
+                   fill=rng.randint(0, 96))
+        img = img.filter(ImageFilter.GaussianBlur(noise * dpi / 300))
+    img.info['dpi'] = (dpi, dpi)
+    return img
+
+
+def generate_corpus(directory: str, count: int, seed: int = 0, noise: float = 0.0, dpi: int = 300,
+                    font_path: Optional[str] = None) -> List[str]:
+    """
+    Renders `count` random invoices into `directory` as PNG images, each with
+    its ground truth in a JSON file of the same name (see `src.core.ocr.evaluation`).
+    Noise levels are drawn between 0 and `noise`. The same seed gives the same corpus.
+
+    Returns:
+        The paths of the images written.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        invoice = random_invoice(rng)
+        img = render_image(invoice, rng, rng.uniform(0, noise), dpi, font_path)
+        path = os.path.join(directory, f"invoice_{i + 1:05d}.png")
+        img.save(path, dpi=(dpi, dpi))
+        with open(os.path.splitext(path)[0] + '.json', 'w', encoding='utf-8') as f:
+            json.dump(invoice, f, ensure_ascii=False, indent=2)
+        paths.append(path)
+    return paths
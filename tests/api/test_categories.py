@@ -0,0 +1,120 @@
+import unittest
+import json
+import os
+from unittest import mock
+
+from src.api.app import create_app
+from src.api.extensions import db, category_rules
+from src.core.accounting.models import CategoryRuleSet, CategoryMemo
+from src.core.auth.models import User
+from src.core.accounting.categories import DEFAULT_CATEGORY
+
+MOCK_TEXT = ("Garage Petit\nFACTURE N°: INV-7\nDate: 26/10/2023\n\nDescription | Quantité | Prix unitaire | Total\n"
+             "Maintenance serveur | 1 | 100.00 | 100.00\nTotal HT: 100.00\nTVA (20%): 20.00\nTotal TTC: 120.00\n")
+
+class CategoriesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a test client and a new database for each test."""
+        self.app = create_app('src.config.TestingConfig')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self._register_and_login()
+
+    def tearDown(self):
+        """Clean up the database after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _register_and_login(self):
+        """Helper to register and log in a user for tests."""
+        credentials = json.dumps(dict(username="testuser", password="password"))
+        self.client.post('/api/auth/register', data=credentials, content_type='application/json')
+        self.client.post('/api/auth/login', data=credentials, content_type='application/json')
+
+    def _add_rule(self, kind, pattern, category):
+        return self.client.post('/api/categories/rules', content_type='application/json',
+                                data=json.dumps(dict(kind=kind, pattern=pattern, category=category)))
+
+    def test_create_update_and_delete_rules(self):
+        """Tests the rule endpoints and that each edit bumps the rule set version."""
+        res = self._add_rule('keyword', 'Maintenance', 'Sous-traitance')
+        self.assertEqual(res.status_code, 201)
+        rule = json.loads(res.data)
+        self.assertEqual(rule['pattern'], 'maintenance')
+
+        res = self._add_rule('keyword', 'MAINTENANCE', 'Entretien et réparations')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.data)['id'], rule['id'])
+
+        rules = json.loads(self.client.get('/api/categories/rules').data)
+        self.assertEqual([r['category'] for r in rules], ['Entretien et réparations'])
+
+        self.assertEqual(self.client.delete(f"/api/categories/rules/{rule['id']}").status_code, 200)
+        self.assertEqual(json.loads(self.client.get('/api/categories/rules').data), [])
+        self.assertEqual(db.session.get(CategoryRuleSet, User.query.filter_by(username="testuser").first().id).version, 3)
+
+    def test_invalid_rules(self):
+        """Tests that unknown kinds and categories are rejected."""
+        self.assertEqual(self._add_rule('regex', 'x', 'Locations').status_code, 400)
+        self.assertEqual(self._add_rule('keyword', 'x', 'Not a category').status_code, 400)
+        self.assertEqual(self._add_rule('keyword', ' ', 'Locations').status_code, 400)
+
+    @mock.patch('src.core.ocr.adaptive.extract_text_from_image', return_value=MOCK_TEXT)
+    def test_rules_apply_to_uploads(self, mock_ocr):
+        """Tests that uploaded invoices are categorized with the user's rules, fresh after each edit."""
+        invoice_path = os.path.join(self.app.config['BASE_DIR'], 'data', 'invoices', 'synthetic_invoice.png')
+
+        def upload_category():
+            with open(invoice_path, 'rb') as img:
+                res = self.client.post('/api/invoices/upload', content_type='multipart/form-data',
+                                       data={'file': (img, 'synthetic_invoice.png')})
+            status = json.loads(self.client.get(json.loads(res.data)['status_url']).data)
+            return status['line_items'][0]['category']
+
+        self._add_rule('keyword', 'serveur', 'Sous-traitance')
+        self.assertEqual(upload_category(), 'Sous-traitance')
+
+        self._add_rule('supplier', 'Garage Petit', 'Transports et déplacements')
+        self.assertEqual(upload_category(), 'Transports et déplacements')
+        self.assertEqual(category_rules.cache.misses, 2)
+
+    @mock.patch('src.core.ocr.adaptive.extract_text_from_image', return_value=MOCK_TEXT)
+    def test_memo_learns_and_corrections_stick(self, mock_ocr):
+        """Tests that categories are remembered per supplier and manual corrections override them."""
+        invoice_path = os.path.join(self.app.config['BASE_DIR'], 'data', 'invoices', 'synthetic_invoice.png')
+
+        def upload():
+            with open(invoice_path, 'rb') as img:
+                res = self.client.post('/api/invoices/upload', content_type='multipart/form-data',
+                                       data={'file': (img, 'synthetic_invoice.png')})
+            return json.loads(self.client.get(json.loads(res.data)['status_url']).data)
+
+        first = upload()
+        item = first['line_items'][0]
+        self.assertEqual(item['category'], DEFAULT_CATEGORY)
+        memos = CategoryMemo.query.all()
+        self.assertEqual([(m.supplier, m.description, m.source) for m in memos],
+                         [('garage petit', 'maintenance serveur', 'auto')])
+
+        res = self.client.patch(f"/api/invoices/{first['id']}/line_items/{item['id']}", content_type='application/json',
+                                data=json.dumps(dict(category='Entretien et réparations')))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(upload()['line_items'][0]['category'], 'Entretien et réparations')
+        # The correction updated the cached memo without recompiling the rules
+        self.assertEqual(category_rules.cache.misses, 1)
+        self.assertIsNone(db.session.get(CategoryRuleSet, User.query.filter_by(username="testuser").first().id))
+
+        stats = json.loads(self.client.get('/api/categories/stats').data)
+        self.assertEqual(stats['memo']['hits'], 1)
+        self.assertEqual(stats['memo']['entries'], 1)
+
+        # Editing the rules forgets learned entries but keeps corrections
+        self._add_rule('keyword', 'serveur', 'Sous-traitance')
+        self.assertEqual([m.source for m in CategoryMemo.query.all()], ['manual'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import io
+import json
+import datetime
+from decimal import Decimal
+
+from src.api.app import create_app
+from src.api.extensions import db
+from src.core.auth.models import User
+from src.core.cashflow.models import Transaction
+from src.core.export.columnar import NULL_INT, Snapshot, write_snapshot
+from src.core.invoicing.models import Invoice, LineItem
+
+class SnapshotExportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a test client and a user with two validated invoices and a payment."""
+        self.app = create_app('src.config.TestingConfig')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        credentials = json.dumps(dict(username="testuser", password="password"))
+        self.client.post('/api/auth/register', data=credentials, content_type='application/json')
+        self.client.post('/api/auth/login', data=credentials, content_type='application/json')
+        self.user = User.query.filter_by(username="testuser").first()
+        for invoice_date, total, supplier in ((datetime.date(2023, 3, 1), '100.00', 'Garage Petit'),
+                                              (datetime.date(2023, 11, 20), '50.10', None)):
+            total_ht = Decimal(total)
+            invoice = Invoice(filename='invoice.png', status='completed', supplier=supplier,
+                              invoice_date=invoice_date, total_ht=total_ht, total_vat=total_ht / 5,
+                              total_ttc=total_ht * 6 / 5, user_id=self.user.id)
+            invoice.line_items.append(LineItem(description='Maintenance serveur', quantity=Decimal('1.5'),
+                                               total_ht=total_ht, category='Entretien et réparations'))
+            db.session.add(invoice)
+            db.session.commit()
+            self.client.post(f'/api/invoices/{invoice.id}/validate')
+        db.session.add(Transaction(description='Paiement', transaction_type='debit', amount=Decimal('120.00'),
+                                   transaction_date=datetime.date(2023, 3, 5), user_id=self.user.id))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up the database after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_snapshot_columns(self):
+        """Tests that every table is written column by column and read back with its types."""
+        buffer = io.BytesIO()
+        manifest = write_snapshot(buffer, self.user.id, row_group_size=2)
+        self.assertEqual({name: table['rows'] for name, table in manifest['tables'].items()},
+                         {'invoices': 2, 'line_items': 2, 'transactions': 3, 'journal': 6})
+        self.assertEqual(manifest['tables']['journal']['row_groups'], [2, 2, 2])
+
+        buffer.seek(0)
+        with Snapshot(buffer) as snapshot:
+            invoices = snapshot.read('invoices')
+            self.assertEqual(list(invoices['total_ht']), [10000, 5010])
+            self.assertEqual(invoices['supplier'], ['Garage Petit', None])
+            self.assertEqual(datetime.date.fromordinal(invoices['invoice_date'][1]), datetime.date(2023, 11, 20))
+            self.assertEqual(list(snapshot.read('line_items', ['quantity'])['quantity']), [150, 150])
+            journal = snapshot.read('journal', ['account_number', 'debit', 'credit'])
+            self.assertEqual(sum(d for d in journal['debit'] if d != NULL_INT), 18012)
+            self.assertEqual(sum(c for c in journal['credit'] if c != NULL_INT), 18012)
+            # Validation records a transaction for each invoice; the payment has none
+            self.assertEqual(snapshot.read('transactions')['invoice_id'][-1], NULL_INT)
+
+    def test_period_and_tables(self):
+        """Tests that a snapshot can be limited to a period and to some tables."""
+        buffer = io.BytesIO()
+        manifest = write_snapshot(buffer, self.user.id, datetime.date(2023, 11, 1), datetime.date(2023, 12, 31),
+                                  tables=['invoices', 'journal'])
+        self.assertEqual({name: table['rows'] for name, table in manifest['tables'].items()},
+                         {'invoices': 1, 'journal': 3})
+        with self.assertRaises(ValueError):
+            write_snapshot(io.BytesIO(), self.user.id, tables=['users'])
+
+    def test_export_endpoint(self):
+        """Tests the snapshot download and its parameter checks."""
+        res = self.client.get('/api/export/snapshot?start=2023-03-01&end=2023-03-31')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.mimetype, 'application/zip')
+        with Snapshot(io.BytesIO(res.data)) as snapshot:
+            self.assertEqual(snapshot.tables['transactions']['rows'], 2)
+            self.assertEqual(snapshot.tables['invoices']['rows'], 1)
+
+        self.assertEqual(self.client.get('/api/export/snapshot?start=2023-03').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/snapshot?tables=users').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,13 @@ import unittest
 import json
 import os
 from io import BytesIO
+from unittest import mock
 
 from src.api.app import create_app
 from src.api.extensions import db
 from src.core.auth.models import User
 from src.core.invoicing.models import Invoice
+from src.api.invoicing import UPLOAD_FOLDER
 
 class InvoicingTestCase(unittest.TestCase):
 
@@ -68,8 +70,8 @@ class InvoicingTestCase(unittest.TestCase):
                 follow_redirects=True
             )
 
-        self.assertEqual(res.status_code, 201)
-        self.assertIn(b'Invoice processed successfully', res.data)
+        self.assertEqual(res.status_code, 202)
+        self.assertIn(b'Invoice accepted for processing', res.data)
 
         # Verify the invoice was created in the DB
         invoice = Invoice.query.first()
@@ -79,6 +81,74 @@ class InvoicingTestCase(unittest.TestCase):
         self.assertEqual(invoice.supplier, 'Votre Entreprise')
         self.assertGreater(len(invoice.line_items), 0)
 
+    def test_get_invoice_status(self):
+        """Test polling an uploaded invoice through its status URL."""
+        invoice_path = os.path.join(self.app.config['BASE_DIR'], 'data', 'invoices', 'synthetic_invoice.png')
+        with open(invoice_path, 'rb') as img:
+            data = {'file': (img, 'synthetic_invoice.png')}
+            res = self.client.post('/api/invoices/upload', content_type='multipart/form-data', data=data)
+
+        self.assertEqual(res.status_code, 202)
+        body = json.loads(res.data)
+        self.assertEqual(res.headers['Location'], body['status_url'])
+
+        res_status = self.client.get(body['status_url'])
+        self.assertEqual(res_status.status_code, 200)
+        status = json.loads(res_status.data)
+        self.assertEqual(status['id'], body['invoice_id'])
+        self.assertIn(status['status'], ('completed', 'error'))
+        self.assertIn('line_items', status)
+
+        # Unknown invoices are not found
+        self.assertEqual(self.client.get('/api/invoices/9999').status_code, 404)
+
+    def test_upload_invoice_queue_full(self):
+        """Test that uploads are rejected with 503 when the OCR queue is full."""
+        # No workers drain the queue, so it fills up after a single job
+        self.app.config.update(OCR_EAGER=False, OCR_WORKERS=0, OCR_QUEUE_SIZE=1)
+        invoice_path = os.path.join(self.app.config['BASE_DIR'], 'data', 'invoices', 'synthetic_invoice.png')
+
+        responses = []
+        for name in ('synthetic_invoice.png', 'rejected_invoice.png', 'synthetic_invoice.png'):
+            with open(invoice_path, 'rb') as img:
+                data = {'file': (img, name)}
+                responses.append(self.client.post('/api/invoices/upload', content_type='multipart/form-data', data=data))
+
+        self.assertEqual(responses[0].status_code, 202)
+        self.assertEqual(responses[1].status_code, 503)
+        self.assertEqual(responses[2].status_code, 503)
+        self.assertIn('Retry-After', responses[1].headers)
+
+        # The rejected upload is removed, but not a file a queued job still reads
+        self.assertFalse(os.path.exists(os.path.join(UPLOAD_FOLDER, 'rejected_invoice.png')))
+        self.assertTrue(os.path.exists(os.path.join(UPLOAD_FOLDER, 'synthetic_invoice.png')))
+
+        # The accepted invoice waits in 'processing', the rejected one was not kept
+        invoices = Invoice.query.all()
+        self.assertEqual(len(invoices), 1)
+        self.assertEqual(invoices[0].status, 'processing')
+
+    @mock.patch('src.core.ocr.adaptive.extract_text_from_image')
+    def test_ocr_stats(self, mock_ocr):
+        """Test that the adaptive OCR counters count the passes run for uploads."""
+        mock_ocr.return_value = ("Garage Petit\nFACTURE N°: INV-7\nDate: 26/10/2023\n"
+                                 "Total HT: 100.00\nTVA (20%): 20.00\nTotal TTC: 120.00\n")
+        before = json.loads(self.client.get('/api/invoices/ocr/stats').data)
+        self.assertTrue(before['adaptive'])
+
+        invoice_path = os.path.join(self.app.config['BASE_DIR'], 'data', 'invoices', 'synthetic_invoice.png')
+        with open(invoice_path, 'rb') as img:
+            res = self.client.post('/api/invoices/upload', content_type='multipart/form-data',
+                                   data={'file': (img, 'synthetic_invoice.png')})
+        self.assertEqual(res.status_code, 202)
+
+        after = json.loads(self.client.get('/api/invoices/ocr/stats').data)
+        self.assertEqual(after['documents'], before['documents'] + 1)
+        fast = after['passes']['fast']
+        self.assertEqual(fast['runs'], before['passes']['fast']['runs'] + 1)
+        self.assertEqual(fast['accepted'], before['passes']['fast']['accepted'] + 1)
+        self.assertIn('p95', fast)
+
     def test_list_invoices(self):
         """Test listing invoices for the current user."""
         # First, check that the list is empty
@@ -0,0 +1,150 @@
+import unittest
+import json
+import datetime
+import gzip
+from decimal import Decimal
+from unittest import mock
+
+from src.api.app import create_app
+from src.api.extensions import db
+from src.core.accounting import upsert
+from src.core.accounting.models import JournalEntry, JournalSequence
+from src.core.accounting.posting import iter_journal, load_journal, reserve_ecriture_nums
+from src.core.auth.models import User
+from src.core.export.fec_exporter import export_to_fec
+from src.core.invoicing.models import Invoice, LineItem
+
+class JournalTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a test client and a new database for each test."""
+        self.app = create_app('src.config.TestingConfig')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        credentials = json.dumps(dict(username="testuser", password="password"))
+        self.client.post('/api/auth/register', data=credentials, content_type='application/json')
+        self.client.post('/api/auth/login', data=credentials, content_type='application/json')
+        self.user = User.query.filter_by(username="testuser").first()
+
+    def tearDown(self):
+        """Clean up the database after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add_invoice(self, invoice_date, total_ht='100.00', total_vat='20.00', total_ttc='120.00'):
+        """Stores a processed invoice with one line item, as the OCR pipeline would."""
+        invoice = Invoice(filename='invoice.png', status='completed', supplier='Garage Petit',
+                          invoice_date=invoice_date, total_ht=Decimal(total_ht), total_vat=Decimal(total_vat),
+                          total_ttc=Decimal(total_ttc), user_id=self.user.id)
+        invoice.line_items.append(LineItem(description='Maintenance serveur', total_ht=Decimal(total_ht),
+                                           category='Entretien et réparations'))
+        db.session.add(invoice)
+        db.session.commit()
+        return invoice
+
+    def test_validation_posts_entries(self):
+        """Tests that validating an invoice stores its balanced entries under one écriture number."""
+        invoice = self._add_invoice(datetime.date(2023, 10, 26))
+        res = self.client.post(f'/api/invoices/{invoice.id}/validate')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.data)['ecriture_num'], 1)
+
+        entries = JournalEntry.query.filter_by(invoice_id=invoice.id).all()
+        self.assertEqual(len(entries), 3)
+        self.assertEqual({e.ecriture_num for e in entries}, {1})
+        self.assertEqual(sum(e.debit_cents or 0 for e in entries), 12000)
+        self.assertEqual(sum(e.credit_cents or 0 for e in entries), 12000)
+
+    def test_sequence_per_fiscal_year(self):
+        """Tests that écriture numbers follow each other within a year and restart the next one."""
+        numbers = []
+        for invoice_date in (datetime.date(2023, 3, 1), datetime.date(2023, 5, 1), datetime.date(2024, 1, 5)):
+            invoice = self._add_invoice(invoice_date)
+            numbers.append(json.loads(self.client.post(f'/api/invoices/{invoice.id}/validate').data)['ecriture_num'])
+        self.assertEqual(numbers, [1, 2, 1])
+
+        batch = load_journal(self.user.id, 2023)
+        self.assertEqual(len(batch), 6)
+        self.assertEqual(list(batch.numbers), [1, 1, 1, 2, 2, 2])
+        fec = export_to_fec(batch)
+        self.assertIn("\t00002\t20230501\t", fec)
+
+        # Streamed, the journal keeps its amounts in cents and exports the same file
+        rows = list(iter_journal(self.user.id, 2023, chunk_size=4))
+        self.assertEqual([debit if debit is not None else credit for *_, debit, credit, _ in rows], list(batch.cents))
+        self.assertEqual(export_to_fec(iter(rows)), fec)
+
+    def test_unbalanced_invoice_posts_difference_to_suspense(self):
+        """Tests that an invoice whose lines do not add up is posted, the difference in the suspense account."""
+        invoice = self._add_invoice(datetime.date(2023, 10, 26), total_ttc='130.00')
+        res = self.client.post(f'/api/invoices/{invoice.id}/validate')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(db.session.get(Invoice, invoice.id).status, 'validated')
+
+        entries = JournalEntry.query.filter_by(invoice_id=invoice.id).all()
+        self.assertEqual(sum(e.debit_cents or 0 for e in entries), 13000)
+        self.assertEqual(sum(e.credit_cents or 0 for e in entries), 13000)
+        suspense = [e for e in entries if e.account_number == 471]
+        self.assertEqual([(e.debit_cents, e.credit_cents) for e in suspense], [(1000, None)])
+
+    def test_incomplete_invoice_is_rejected(self):
+        """Tests that an invoice with a negative amount is neither posted nor validated."""
+        invoice = self._add_invoice(datetime.date(2023, 10, 26), total_ht='-100.00', total_ttc='-80.00')
+        res = self.client.post(f'/api/invoices/{invoice.id}/validate')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(JournalEntry.query.count(), 0)
+        self.assertEqual(db.session.get(Invoice, invoice.id).status, 'completed')
+
+    def test_sequence_upsert(self):
+        """Tests that écriture numbers are reserved in blocks, the first block creating the sequence."""
+        self.assertEqual(reserve_ecriture_nums(self.user.id, 2023, 3), 1)
+        self.assertEqual(reserve_ecriture_nums(self.user.id, 2023, 2), 4)
+        self.assertEqual(reserve_ecriture_nums(self.user.id, 2024, 1), 1)
+        self.assertEqual(db.session.get(JournalSequence, (self.user.id, 2023)).last_num, 5)
+
+        # Databases without ON CONFLICT update, or insert in a savepoint
+        with mock.patch.dict(upsert._UPSERT_INSERTS, clear=True):
+            self.assertEqual(reserve_ecriture_nums(self.user.id, 2023, 1), 6)
+            self.assertEqual(reserve_ecriture_nums(self.user.id, 2025, 2), 1)
+            self.assertEqual(reserve_ecriture_nums(self.user.id, 2025, 1), 3)
+
+    def test_streamed_fiscal_year_export(self):
+        """Tests that the yearly FEC is streamed from the journal, plain or gzipped."""
+        for invoice_date in (datetime.date(2023, 3, 1), datetime.date(2023, 5, 1), datetime.date(2024, 1, 5)):
+            invoice = self._add_invoice(invoice_date)
+            self.client.post(f'/api/invoices/{invoice.id}/validate')
+
+        res = self.client.get('/api/export/fec?year=2023')
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.is_streamed)
+        self.assertIn('fec_2023.txt', res.headers['Content-Disposition'])
+        expected = export_to_fec(load_journal(self.user.id, 2023))
+        self.assertEqual(res.get_data(as_text=True), expected)
+        self.assertEqual(len(expected.splitlines()), 7)
+
+        res = self.client.get('/api/export/fec?year=2023&gzip=1')
+        self.assertEqual(res.mimetype, 'application/gzip')
+        self.assertEqual(gzip.decompress(res.get_data()).decode('utf-8'), expected)
+
+        self.assertEqual(self.client.get('/api/export/fec?year=23').status_code, 400)
+
+    def test_export_numbers(self):
+        """Tests that the export keeps the numbers validation returned, whatever the invoice dates."""
+        def export_numbers():
+            lines = self.client.get('/api/export/fec?year=2023').get_data(as_text=True).splitlines()[1:]
+            return {row[3]: int(row[2]) for row in (line.split('\t') for line in lines)}
+
+        numbers = {}
+        for invoice_date in (datetime.date(2023, 3, 1), datetime.date(2023, 5, 1), datetime.date(2023, 2, 1)):
+            invoice = self._add_invoice(invoice_date)
+            res = self.client.post(f'/api/invoices/{invoice.id}/validate')
+            numbers[invoice_date.strftime('%Y%m%d')] = json.loads(res.data)['ecriture_num']
+        # The February invoice, validated last, keeps number 3 in the FEC
+        self.assertEqual(numbers, {'20230301': 1, '20230501': 2, '20230201': 3})
+        self.assertEqual(export_numbers(), numbers)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import json
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from src.api.app import create_app
+from src.api.extensions import db
+from src.core.accounting import upsert
+from src.core.accounting.batch import CREDIT, EntryBatch
+from src.core.accounting.ledger import account_periods, rebuild_balances, trial_balance, update_balances
+from src.core.auth.models import User
+from src.core.invoicing.models import Invoice, LineItem
+
+class LedgerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a test client and a new database for each test."""
+        self.app = create_app('src.config.TestingConfig')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        credentials = json.dumps(dict(username="testuser", password="password"))
+        self.client.post('/api/auth/register', data=credentials, content_type='application/json')
+        self.client.post('/api/auth/login', data=credentials, content_type='application/json')
+        self.user = User.query.filter_by(username="testuser").first()
+        # Two invoices in March, one in May
+        for invoice_date, total in ((datetime.date(2023, 3, 1), '100.00'), (datetime.date(2023, 3, 20), '50.00'),
+                                    (datetime.date(2023, 5, 2), '10.00')):
+            self._post_invoice(invoice_date, Decimal(total))
+
+    def tearDown(self):
+        """Clean up the database after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _post_invoice(self, invoice_date, total_ht):
+        """Stores a processed invoice at 20% VAT and validates it."""
+        vat = total_ht / 5
+        invoice = Invoice(filename='invoice.png', status='completed', supplier='Garage Petit',
+                          invoice_date=invoice_date, total_ht=total_ht, total_vat=vat,
+                          total_ttc=total_ht + vat, user_id=self.user.id)
+        invoice.line_items.append(LineItem(description='Maintenance serveur', total_ht=total_ht,
+                                           category='Entretien et réparations'))
+        db.session.add(invoice)
+        db.session.commit()
+        res = self.client.post(f'/api/invoices/{invoice.id}/validate')
+        self.assertEqual(res.status_code, 200)
+
+    def test_trial_balance(self):
+        """Tests that the trial balance sums every account over the requested months."""
+        data = json.loads(self.client.get('/api/ledger/balances?year=2023').data)
+        accounts = {a['account_number']: a for a in data['accounts']}
+        self.assertEqual(accounts[401]['credit'], '192.00')
+        self.assertEqual(accounts[401]['balance'], '-192.00')
+        self.assertEqual(accounts[44566]['debit'], '32.00')
+        self.assertEqual(data['total_debit'], '192.00')
+        self.assertTrue(data['balanced'])
+
+        data = json.loads(self.client.get('/api/ledger/balances?start=2023-04&end=2023-12').data)
+        self.assertEqual(data['total_credit'], '12.00')
+
+    def test_account_history(self):
+        """Tests an account's monthly totals and running balance."""
+        data = json.loads(self.client.get('/api/ledger/accounts/401').data)
+        self.assertEqual(data['account_name'], 'Fournisseurs')
+        self.assertEqual([p['period_key'] for p in data['periods']], ['2023-03', '2023-05'])
+        self.assertEqual([p['balance'] for p in data['periods']], ['-180.00', '-192.00'])
+        self.assertEqual(self.client.get('/api/ledger/accounts/999').status_code, 404)
+        self.assertEqual(self.client.get('/api/ledger/accounts/401?start=2023-13').status_code, 400)
+
+    def test_rebuild_matches_incremental(self):
+        """Tests that balances recomputed from the journal equal those maintained at posting."""
+        before = trial_balance(self.user.id)
+        rebuild_balances(self.user.id)
+        db.session.commit()
+        self.assertEqual(trial_balance(self.user.id), before)
+
+    def test_balances_upsert(self):
+        """Tests that postings add to a month's row, or create it, with or without ON CONFLICT support."""
+        for fallback in (False, True):
+            with self.subTest(fallback=fallback), mock.patch.dict(upsert._UPSERT_INSERTS, clear=fallback):
+                batch = EntryBatch()
+                batch.append_cents(datetime.date(2023, 3, 5), 401, 'Fournisseurs', 'Facture', CREDIT, 100)
+                batch.append_cents(datetime.date(2023, 7, 5), 401, 'Fournisseurs', 'Facture', CREDIT, 100)
+                update_balances(self.user.id, batch)
+        db.session.commit()
+        periods = {p['period_key']: p['credit'] for p in account_periods(self.user.id, 401)}
+        self.assertEqual(periods, {'2023-03': 18200, '2023-05': 1200, '2023-07': 200})
+
+if __name__ == '__main__':
+    unittest.main()
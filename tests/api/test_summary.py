@@ -0,0 +1,106 @@
+import unittest
+import json
+import datetime
+from decimal import Decimal
+
+from src.api.app import create_app
+from src.api.extensions import db
+from src.core.auth.models import User
+from src.core.cashflow.models import Transaction
+from src.core.invoicing.models import Invoice, LineItem
+
+class SummaryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a test client with validated invoices, a pending one and some revenue."""
+        self.app = create_app('src.config.TestingConfig')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        credentials = json.dumps(dict(username="testuser", password="password"))
+        self.client.post('/api/auth/register', data=credentials, content_type='application/json')
+        self.client.post('/api/auth/login', data=credentials, content_type='application/json')
+        self.user = User.query.filter_by(username="testuser").first()
+        self._add_invoice(datetime.date(2023, 3, 1), 'Garage Petit',
+                          [('Réparation', '100.00', 'Entretien et réparations')])
+        self._add_invoice(datetime.date(2023, 4, 10), 'Garage Petit', [('Pneus', '50.00', 'Entretien et réparations')])
+        self._add_invoice(datetime.date(2023, 5, 2), 'Imprimerie du Centre',
+                          [('Papier', '30.00', 'Achats de matières premières et fournitures'),
+                           ('Livraison', '10.00', 'Transports et déplacements')])
+        # Not validated: left out of the summary
+        self._add_invoice(datetime.date(2023, 5, 3), 'Garage Petit', [('Vidange', '80.00', None)], validate=False)
+        for transaction_date, amount in ((datetime.date(2023, 3, 15), '500.00'), (datetime.date(2023, 6, 1), '200.00')):
+            db.session.add(Transaction(description='Vente', transaction_type='credit', amount=Decimal(amount),
+                                       transaction_date=transaction_date, user_id=self.user.id))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up the database after each test."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add_invoice(self, invoice_date, supplier, lines, validate=True):
+        """Stores a processed invoice at 20% VAT, validating it unless told otherwise."""
+        total_ht = sum(Decimal(total) for _, total, _ in lines)
+        invoice = Invoice(filename='invoice.png', status='completed', supplier=supplier, invoice_date=invoice_date,
+                          total_ht=total_ht, total_vat=total_ht / 5, total_ttc=total_ht * 6 / 5, user_id=self.user.id)
+        for description, total, category in lines:
+            invoice.line_items.append(LineItem(description=description, total_ht=Decimal(total), category=category))
+        db.session.add(invoice)
+        db.session.commit()
+        if validate:
+            res = self.client.post(f'/api/invoices/{invoice.id}/validate')
+            self.assertEqual(res.status_code, 200)
+
+    def test_summary(self):
+        """Tests that the summary totals validated invoices and revenue, by supplier and category."""
+        res = self.client.get('/api/summary')
+        self.assertEqual(res.status_code, 200)
+        data = json.loads(res.data)
+        self.assertEqual(data['invoice_count'], 3)
+        self.assertAlmostEqual(data['total_expenses_ht'], 190.0)
+        self.assertAlmostEqual(data['total_vat_deductible'], 38.0)
+        self.assertAlmostEqual(data['total_expenses_ttc'], 228.0)
+        self.assertAlmostEqual(data['total_revenue'], 700.0)
+        self.assertAlmostEqual(data['net_profit_loss'], 510.0)
+        self.assertEqual([(s['supplier'], s['invoice_count'], s['total_ht']) for s in data['by_supplier']],
+                         [('Garage Petit', 2, 150.0), ('Imprimerie du Centre', 1, 40.0)])
+        self.assertEqual([(c['category'], c['line_count'], c['total_ht']) for c in data['by_category']],
+                         [('Entretien et réparations', 2, 150.0),
+                          ('Achats de matières premières et fournitures', 1, 30.0),
+                          ('Transports et déplacements', 1, 10.0)])
+
+    def test_summary_filters(self):
+        """Tests the date, supplier and category filters."""
+        data = json.loads(self.client.get('/api/summary?start_date=2023-04-01&end_date=2023-05-31').data)
+        self.assertEqual(data['invoice_count'], 2)
+        self.assertAlmostEqual(data['total_expenses_ht'], 90.0)
+        self.assertAlmostEqual(data['total_revenue'], 0.0)
+        self.assertAlmostEqual(data['net_profit_loss'], -90.0)
+
+        data = json.loads(self.client.get('/api/summary?supplier=Garage Petit').data)
+        self.assertAlmostEqual(data['total_expenses_ttc'], 180.0)
+
+        # Only the category's lines, with their share of the invoice's VAT
+        data = json.loads(self.client.get('/api/summary?category=Transports et déplacements').data)
+        self.assertEqual(data['invoice_count'], 1)
+        self.assertAlmostEqual(data['total_expenses_ht'], 10.0)
+        self.assertAlmostEqual(data['total_vat_deductible'], 2.0)
+        self.assertAlmostEqual(data['total_expenses_ttc'], 12.0)
+        self.assertAlmostEqual(data['net_profit_loss'], 690.0)
+        self.assertEqual([(s['supplier'], s['total_ht']) for s in data['by_supplier']],
+                         [('Imprimerie du Centre', 10.0)])
+        self.assertEqual([c['category'] for c in data['by_category']], ['Transports et déplacements'])
+
+        data = json.loads(self.client.get('/api/summary?category=Entretien et réparations').data)
+        self.assertEqual(data['invoice_count'], 2)
+        self.assertAlmostEqual(data['total_expenses_ttc'], 180.0)
+
+        res = self.client.get('/api/summary?start_date=03/2023')
+        self.assertEqual(res.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
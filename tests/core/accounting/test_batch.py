@@ -0,0 +1,71 @@
+import unittest
+from datetime import date
+
+from src.core.accounting.batch import EntryBatch
+from src.core.accounting.entry import AccountingEntry
+from src.core.accounting.journal import append_invoice_entries, generate_entries_from_invoice
+from src.core.export.fec_exporter import export_to_fec
+from tests.core.accounting.test_journal import MOCK_INVOICE_DATA
+
+ENTRIES = [
+    AccountingEntry(date(2023, 10, 26), 622, "Honoraires", "Conseil", debit=750.10),
+    AccountingEntry(date(2023, 10, 26), 44566, "TVA Déductible", "TVA", debit=150.02),
+    AccountingEntry(date(2023, 10, 27), 401, "Fournisseurs", "Facture 1", credit=900.12),
+]
+
+
+class TestEntryBatch(unittest.TestCase):
+
+    def test_round_trip(self):
+        """Entries read back from a batch are equal to those stored."""
+        batch = EntryBatch.from_entries(ENTRIES)
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(batch.to_entries(), ENTRIES)
+        self.assertEqual(batch.names, ["Honoraires", "TVA Déductible", "Fournisseurs"])
+
+    def test_totals_in_cents(self):
+        """Totals are exact integer cents."""
+        batch = EntryBatch.from_entries(ENTRIES)
+        self.assertEqual(batch.totals(), (90012, 90012))
+        self.assertTrue(batch.is_balanced())
+        self.assertEqual(batch.totals(0, 1), (75010, 0))
+
+    def test_validate_reports_first_invalid_row(self):
+        """Validation checks the whole batch and names the faulty row."""
+        batch = EntryBatch.from_entries(ENTRIES)
+        batch.validate()
+        batch.append(date(2023, 1, 1), 401, "Fournisseurs", "Both", debit=1.0, credit=1.0)
+        with self.assertRaisesRegex(ValueError, "Entry 3"):
+            batch.validate()
+        batch.truncate(3)
+        batch.append(date(2023, 1, 1), 401, "Fournisseurs", "Negative", credit=-5.0)
+        with self.assertRaisesRegex(ValueError, "Entry 3: a credit value cannot be negative"):
+            batch.validate()
+
+    def test_extend_merges_names(self):
+        """Extending a batch maps the other batch's account names onto its own."""
+        batch = EntryBatch.from_entries(ENTRIES[2:])
+        batch.extend(EntryBatch.from_entries(ENTRIES))
+        self.assertEqual(batch.to_entries(), ENTRIES[2:] + ENTRIES)
+        self.assertEqual(len(batch.names), 3)
+
+    def test_invalid_invoice_leaves_batch_unchanged(self):
+        """An unbalanced invoice adds no rows to the batch."""
+        batch = EntryBatch()
+        append_invoice_entries(MOCK_INVOICE_DATA, batch)
+        unbalanced = dict(MOCK_INVOICE_DATA, total_ttc=1300.0)
+        with self.assertRaisesRegex(ValueError, "do not balance"):
+            append_invoice_entries(unbalanced, batch)
+        self.assertEqual(len(batch), 4)
+
+    def test_fec_export_matches_entries(self):
+        """Exporting a batch gives the same FEC file as exporting its entries."""
+        batch = EntryBatch()
+        append_invoice_entries(MOCK_INVOICE_DATA, batch)
+        entries = generate_entries_from_invoice(MOCK_INVOICE_DATA)
+        self.assertEqual(export_to_fec(batch), export_to_fec(entries))
+        self.assertIn("\t1200,00\t", export_to_fec(batch))
+
+
+if __name__ == '__main__':
+    unittest.main()
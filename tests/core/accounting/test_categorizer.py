@@ -1,5 +1,5 @@
 import unittest
-from src.core.accounting.categorizer import categorize_item, DEFAULT_CATEGORY
+from src.core.accounting.categorizer import categorize_item, categorize_many, DEFAULT_CATEGORY
 
 class TestCategorizer(unittest.TestCase):
 
@@ -37,5 +37,11 @@ class TestCategorizer(unittest.TestCase):
         expected_category = "Primes d'assurance"
         self.assertEqual(categorize_item(description), expected_category)
 
+    def test_categorize_many(self):
+        """Tests that a batch is categorized in order, repeated descriptions included."""
+        descriptions = ["Loyer bureau", "Produit A", "Loyer bureau", ""]
+        self.assertEqual(categorize_many(descriptions),
+                         ["Locations", DEFAULT_CATEGORY, "Locations", DEFAULT_CATEGORY])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+from src.core.accounting.classifier import train, load_model, hashed_features
+from src.core.accounting.categorizer import Categorizer
+
+SAMPLES = [
+    ("Maintenance serveur", "Entretien et réparations"),
+    ("Maint. serveur mars", "Entretien et réparations"),
+    ("Cartouches d'encre", "Achats de matières premières et fournitures"),
+    ("Cartouche encre noire", "Achats de matières premières et fournitures"),
+    ("Abonnement internet", "Frais postaux et télécommunications"),
+    ("Abonnement fibre pro", "Frais postaux et télécommunications"),
+] * 3
+
+class TestLinearCategorizer(unittest.TestCase):
+
+    def setUp(self):
+        self.model = train(SAMPLES, dims=1 << 12, epochs=5)
+        fd, self.path = tempfile.mkstemp(suffix='.model')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_features_are_stable(self):
+        """Tests that hashing ignores case and accents and stays within the buckets."""
+        features = hashed_features("Réparation", dims=1 << 12)
+        self.assertEqual(features, hashed_features("REPARATION", dims=1 << 12))
+        self.assertTrue(all(0 <= f < 1 << 12 for f in features))
+        self.assertEqual(hashed_features("  "), [])
+
+    def test_predict(self):
+        """Tests that the model learns unseen spellings from the training items."""
+        self.assertEqual(self.model.predict("maintenance serveurs"), "Entretien et réparations")
+        self.assertEqual(self.model.predict("encre cartouches"), "Achats de matières premières et fournitures")
+        self.assertIsNone(self.model.predict(""))
+        self.assertEqual(self.model.predict_many(["abonnement fibre", "abonnement fibre"]),
+                         ["Frais postaux et télécommunications"] * 2)
+
+    def test_save_and_load(self):
+        """Tests that a mapped model scores exactly like the trained one."""
+        self.model.save(self.path)
+        mapped = load_model(self.path)
+        try:
+            self.assertEqual(mapped.classes, self.model.classes)
+            self.assertEqual(mapped.scores("Maint. serveur"), self.model.scores("Maint. serveur"))
+        finally:
+            mapped.close()
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for broken in (b'not a model', data[:-4], data + b'\0' * 4):
+            with open(self.path, 'wb') as f:
+                f.write(broken)
+            with self.assertRaises(ValueError):
+                load_model(self.path)
+
+    def test_categorizer_fallback(self):
+        """Tests that the model is only used for descriptions no keyword matches."""
+        categorizer = Categorizer(model=self.model)
+        self.assertEqual(categorizer.categorize("Loyer bureau"), "Locations")
+        self.assertEqual(categorizer.categorize("Maint. serveur"), "Entretien et réparations")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from datetime import date
-from src.core.accounting.journal import generate_entries_from_invoice
+from src.core.accounting.journal import generate_entries_from_invoice, generate_entries_from_invoices
 from src.core.accounting.entry import AccountingEntry
 from src.core.accounting.categories import CATEGORY_TO_ACCOUNT
 
@@ -70,5 +70,45 @@ class TestJournalGenerator(unittest.TestCase):
         with self.assertRaises(ValueError):
             generate_entries_from_invoice(invalid_date_data)
 
+    def test_many_invoices_collects_errors(self):
+        """
+        Tests that invalid invoices are reported and skipped while the others are numbered in turn.
+        """
+        bad_date = dict(MOCK_INVOICE_DATA, invoice_id='BAD', date='2023-10-26')
+        errors = []
+        entries = list(generate_entries_from_invoices([MOCK_INVOICE_DATA, bad_date, MOCK_INVOICE_DATA], errors))
+
+        self.assertEqual(len(entries), 8)
+        self.assertEqual([e.ecriture_num for e in entries], [1] * 4 + [2] * 4)
+        self.assertEqual(entries[:4], generate_entries_from_invoice(MOCK_INVOICE_DATA))
+        self.assertEqual(len(errors), 1)
+        self.assertEqual((errors[0]['index'], errors[0]['invoice_id']), (1, 'BAD'))
+
+    def test_many_invoices_skip_bad_amounts_and_items(self):
+        """
+        Tests that amounts that are not numbers and items that are not invoices are skipped too.
+        """
+        bad_amount = dict(MOCK_INVOICE_DATA, invoice_id='NAN', total_ttc='abc')
+        errors = []
+        entries = list(generate_entries_from_invoices([MOCK_INVOICE_DATA, bad_amount, None, MOCK_INVOICE_DATA],
+                                                      errors))
+
+        self.assertEqual([e.ecriture_num for e in entries], [1] * 4 + [2] * 4)
+        self.assertEqual([(e['index'], e['invoice_id']) for e in errors], [(1, 'NAN'), (2, None)])
+
+    def test_many_invoices_is_lazy(self):
+        """
+        Tests that invoices are only read as their entries are consumed.
+        """
+        read = []
+        def invoices():
+            for i in range(3):
+                read.append(i)
+                yield MOCK_INVOICE_DATA
+
+        entries = generate_entries_from_invoices(invoices())
+        next(entries)
+        self.assertEqual(read, [0])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from src.core.accounting.matcher import KeywordMatcher
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def test_longest_keyword_wins(self):
+        """Tests that the longest keyword found wins, wherever it appears."""
+        matcher = KeywordMatcher({"loyer": "Locations", "charges sociales": "Charges sociales", "charges": "Autres"})
+        self.assertEqual(matcher.match("loyer et charges sociales"), "Charges sociales")
+        self.assertEqual(matcher.match("charges diverses"), "Autres")
+        self.assertEqual(matcher.best_match("loyer de mars"), ("loyer", "Locations"))
+
+    def test_ties_follow_insertion_order(self):
+        """Tests that among keywords of equal length, the first one inserted wins."""
+        matcher = KeywordMatcher({"taxe": "Impôts", "loca": "Locations"})
+        self.assertEqual(matcher.match("location taxe"), "Impôts")
+
+    def test_overlapping_keywords(self):
+        """Tests that keywords found through failure links are reported."""
+        matcher = KeywordMatcher({"she": 1, "he": 2, "hers": 3})
+        self.assertEqual(matcher.match("ushers"), 3)
+        self.assertEqual(matcher.match("ushe"), 1)
+        self.assertEqual(matcher.match("the"), 2)
+
+    def test_no_match(self):
+        """Tests that texts without keywords get the default value."""
+        matcher = KeywordMatcher({"loyer": "Locations"})
+        self.assertIsNone(matcher.best_match("produit XYZ"))
+        self.assertEqual(matcher.match("", "Autres"), "Autres")
+        self.assertEqual(matcher.match_many(["loyer", "xyz", "loyer"], "Autres"), ["Locations", "Autres", "Locations"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+from unittest import mock
+from src.core.accounting.categorizer import Categorizer, DEFAULT_CATEGORY
+from src.core.accounting.rules import CategorizerCache
+from src.core.accounting.memo import SupplierMemo
+
+class TestCategorizer(unittest.TestCase):
+
+    def test_tenant_rules_take_precedence(self):
+        """Tests that supplier rules come first, then tenant keywords, then shared keywords."""
+        categorizer = Categorizer(keywords={"Maintenance": "Entretien et réparations"},
+                                  suppliers={"Garage  Petit": "Transports et déplacements"})
+        self.assertEqual(categorizer.categorize("Maintenance serveur"), "Entretien et réparations")
+        self.assertEqual(categorizer.categorize("Loyer bureau"), "Locations")
+        self.assertEqual(categorizer.categorize("Produit A"), DEFAULT_CATEGORY)
+        self.assertEqual(categorizer.categorize("Loyer bureau", supplier="GARAGE PETIT"), "Transports et déplacements")
+
+    def test_categorize_invoice(self):
+        """Tests that invoice data is re-categorized without being modified in place."""
+        data = {'supplier': 'Garage Petit', 'line_items': [{'description': 'Loyer', 'category': 'Locations'}]}
+        categorizer = Categorizer(suppliers={"garage petit": "Transports et déplacements"})
+        result = categorizer.categorize_invoice(data)
+        self.assertEqual(result['line_items'][0]['category'], "Transports et déplacements")
+        self.assertEqual(data['line_items'][0]['category'], "Locations")
+
+class TestSupplierMemo(unittest.TestCase):
+
+    def test_memo_answers_before_rules(self):
+        """Tests that known (supplier, description) pairs skip the rules and new ones are learned."""
+        memo = SupplierMemo({("garage petit", "loyer bureau"): "Sous-traitance"})
+        categorizer = Categorizer(memo=memo)
+        self.assertEqual(categorizer.categorize("Loyer Bureau", supplier="Garage  Petit"), "Sous-traitance")
+        self.assertEqual(categorizer.categorize("Loyer bureau", supplier="Boulangerie Martin"), "Locations")
+        self.assertEqual(categorizer.categorize("Loyer bureau", supplier="Boulangerie Martin"), "Locations")
+        self.assertEqual(memo.stats(), {'hits': 2, 'misses': 1, 'entries': 2})
+
+    def test_drain_unsaved(self):
+        """Tests that only newly learned entries are handed over for persistence, once."""
+        memo = SupplierMemo({("garage petit", "loyer"): "Locations"})
+        memo.learn("Garage Petit", "Loyer", "Locations")
+        memo.learn("Garage Petit", "Réparation", "Entretien et réparations")
+        self.assertEqual(memo.drain_unsaved(), [("garage petit", "reparation", "Entretien et réparations")])
+        self.assertEqual(memo.drain_unsaved(), [])
+
+class TestCategorizerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.versions = {1: 1, 2: 1, 3: 1}
+        self.load_rules = mock.Mock(side_effect=lambda user_id: (self.versions[user_id], {"maintenance": "Sous-traitance"}, {}, {}))
+        self.load_version = mock.Mock(side_effect=lambda user_id: self.versions[user_id])
+
+    def test_compiled_once_within_ttl(self):
+        """Tests that a cached categorizer is reused without any query while fresh."""
+        cache = CategorizerCache(self.load_rules, self.load_version, ttl=60)
+        first = cache.get(1)
+        self.assertIs(cache.get(1), first)
+        self.assertEqual(first.categorize("Maintenance"), "Sous-traitance")
+        self.load_rules.assert_called_once_with(1)
+        self.load_version.assert_not_called()
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_revalidated_by_version(self):
+        """Tests that stale entries are rebuilt only when the rule set version changed."""
+        cache = CategorizerCache(self.load_rules, self.load_version, ttl=0)
+        first = cache.get(1)
+        self.assertIs(cache.get(1), first)
+        self.versions[1] = 2
+        second = cache.get(1)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.version, 2)
+        self.assertEqual(self.load_rules.call_count, 2)
+
+    def test_lru_eviction_and_invalidation(self):
+        """Tests that the least recently used user is evicted and edits invalidate entries."""
+        cache = CategorizerCache(self.load_rules, self.load_version, max_size=2, ttl=60)
+        cache.get(1)
+        cache.get(2)
+        cache.get(1)
+        cache.get(3)
+        self.assertEqual(len(cache), 2)
+        cache.get(2)  # was evicted
+        self.assertEqual(self.load_rules.call_count, 4)
+
+        cache.invalidate(2)
+        cache.get(2)
+        self.assertEqual(self.load_rules.call_count, 5)
+
+    def test_invalidated_while_building(self):
+        """Tests that a categorizer built from rules read before an invalidation is not cached."""
+        cache = CategorizerCache(self.load_rules, self.load_version, ttl=60)
+
+        def load_rules_then_edit(user_id):
+            rules = (self.versions[user_id], {"maintenance": "Sous-traitance"}, {}, {})
+            # Another request edits the rules while this one compiles them
+            self.versions[user_id] += 1
+            cache.invalidate(user_id)
+            return rules
+
+        self.load_rules.side_effect = load_rules_then_edit
+        stale = cache.get(1)
+        self.assertEqual(stale.version, 1)
+        self.assertEqual(len(cache), 0)
+
+        self.load_rules.side_effect = lambda user_id: (self.versions[user_id], {}, {}, {})
+        fresh = cache.get(1)
+        self.assertEqual(fresh.version, 2)
+        self.assertIs(cache.get(1), fresh)
+
+    def test_correct_in_place(self):
+        """Tests that a manual correction updates the cached memo without recompiling the rules."""
+        cache = CategorizerCache(self.load_rules, self.load_version, ttl=60)
+        cache.correct(1, "Garage Petit", "Maintenance", "Entretien et réparations")  # nothing cached yet
+        categorizer = cache.get(1)
+        self.assertEqual(categorizer.categorize("Maintenance", supplier="Garage Petit"), "Sous-traitance")
+
+        cache.correct(1, "Garage Petit", "Maintenance", "Entretien et réparations")
+        self.assertIs(cache.get(1), categorizer)
+        self.assertEqual(categorizer.categorize("Maintenance", supplier="Garage Petit"), "Entretien et réparations")
+        self.assertEqual(categorizer.memo.drain_unsaved(), [])
+        self.load_rules.assert_called_once_with(1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,12 @@ from datetime import date
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
 from src.core.accounting.entry import AccountingEntry
-from src.core.export.fec_exporter import export_to_fec, FEC_HEADER
+import csv
+import io
+from src.core.accounting.batch import EntryBatch
+from src.core.accounting.journal import generate_entries_from_invoices
+from src.core.export.fec_exporter import export_to_fec, iter_fec, write_fec, FecWriter, FEC_HEADER
+from tests.core.accounting.test_journal import MOCK_INVOICE_DATA
 
 class TestFecExporter(unittest.TestCase):
 
@@ -62,5 +67,65 @@ class TestFecExporter(unittest.TestCase):
         self.assertEqual(data_row[11], "250,00") # Check Debit format (with comma)
         self.assertEqual(data_row[12], "") # Check empty Credit
 
+    def test_streaming_export(self):
+        """
+        Tests that streaming entries from a generator gives the same file as exporting a batch.
+        """
+        invoices = [MOCK_INVOICE_DATA, dict(MOCK_INVOICE_DATA, invoice_id='INV2023-043')]
+        stream = io.StringIO()
+        count = write_fec(generate_entries_from_invoices(invoices), stream)
+
+        self.assertEqual(count, 8)
+        batch = EntryBatch.from_entries(generate_entries_from_invoices(invoices))
+        self.assertEqual(stream.getvalue(), export_to_fec(batch))
+        self.assertEqual(stream.getvalue().splitlines()[-1].split('\t')[2], "00002")
+
+    def test_chunked_export(self):
+        """
+        Tests that the FEC yielded in chunks joins up to the same file.
+        """
+        invoices = [MOCK_INVOICE_DATA] * 5
+        chunks = list(iter_fec(generate_entries_from_invoices(invoices), chunk_rows=3))
+
+        self.assertEqual(len(chunks), 7)
+        self.assertEqual(''.join(chunks), export_to_fec(list(generate_entries_from_invoices(invoices))))
+
+    def test_same_bytes_as_csv_writer(self):
+        """
+        Tests that the FEC writer quotes and formats exactly like csv.writer, special characters included.
+        """
+        texts = ['Achat "spécial"', 'Tab\there', 'Line\nbreak', 'Carriage\rreturn', ' espace', '', "Prix 1,5 l'unité",
+                 'Demi']
+        # Amounts stored just below or above a half cent, or exactly on one
+        amounts = [273.145, 754.665, 912.755, 10.005, 20.01, 1.005, 0.1, 61.125]
+        entries = [
+            AccountingEntry(entry_date=date(2023, 1, i + 1), account_number=600 + i, account_name=text,
+                            description=text[::-1], debit=amount if i % 2 else None,
+                            credit=None if i % 2 else amount, ecriture_num=i * 1000)
+            for i, (text, amount) in enumerate(zip(texts, amounts))
+        ]
+        expected = io.StringIO()
+        writer = csv.writer(expected, delimiter='\t', lineterminator='\n')
+        writer.writerow(FEC_HEADER)
+        for e in entries:
+            day = e.entry_date.strftime('%Y%m%d')
+            debit = f"{e.debit:.2f}".replace('.', ',') if e.debit is not None else ""
+            credit = f"{e.credit:.2f}".replace('.', ',') if e.credit is not None else ""
+            writer.writerow(["J\t1", 'Lib "x"', str(e.ecriture_num).zfill(5), day, str(e.account_number),
+                             e.account_name, "", "", "", day, e.description, debit, credit, "", "", day, "", ""])
+
+        self.assertEqual(export_to_fec(entries, 'J\t1', 'Lib "x"'), expected.getvalue())
+        self.assertEqual(export_to_fec(EntryBatch.from_entries(entries), 'J\t1', 'Lib "x"'), expected.getvalue())
+
+    def test_row_count_with_line_breaks(self):
+        """
+        Tests that rows are counted, not line breaks inside quoted descriptions.
+        """
+        entries = [AccountingEntry(date(2023, 1, 1), 401, "Fournisseurs", "Deux\nlignes", credit=1.0)] * 3
+        writer = FecWriter()
+        ''.join(writer.chunks(entries))
+        self.assertEqual(writer.rows, 3)
+        self.assertEqual(write_fec(entries, io.StringIO(), header=False), 3)
+
 if __name__ == '__main__':
     unittest.main()
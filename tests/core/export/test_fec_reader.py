@@ -0,0 +1,197 @@
+import unittest
+import os
+import tempfile
+from datetime import date
+
+from src.api.app import create_app
+from src.api.extensions import db
+from src.core.accounting.batch import EntryBatch
+from src.core.accounting.ledger import trial_balance
+from src.core.accounting.models import JournalEntry, JournalSequence
+from src.core.auth.models import User
+from src.core.export.fec_exporter import FEC_HEADER, FecWriter, export_to_fec
+from src.core.export.fec_reader import (FecFormatError, FecReader, import_fec, parse_amount, read_ecritures,
+                                        FecReport, validate_fec)
+
+def _sample_batch():
+    """Three balanced écritures, the second with a description csv must quote."""
+    batch = EntryBatch()
+    for number, (entry_date, amount, description) in enumerate(
+            ((date(2023, 1, 5), 120.0, 'Facture 1'), (date(2023, 2, 10), 60.0, 'Facture "2"\tavoir'),
+             (date(2024, 1, 3), 12.5, 'Facture 3')), start=1):
+        batch.append(entry_date, 615000, 'Entretien', description, debit=amount, number=number)
+        batch.append(entry_date, 401000, 'Fournisseurs', description, credit=amount, number=number)
+    return batch
+
+class TestFecReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, text, name='fec.txt'):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        return path
+
+    def test_parse_amount(self):
+        """Tests that FEC amounts are read into cents, with either decimal separator."""
+        self.assertEqual(parse_amount('1234,56'), 123456)
+        self.assertEqual(parse_amount('12.5'), 1250)
+        self.assertEqual(parse_amount('-3'), -300)
+        self.assertEqual(parse_amount(''), 0)
+        for text in ('1,234', '12a', ',', '1 000,00'):
+            with self.assertRaises(ValueError):
+                parse_amount(text)
+
+    def test_round_trip(self):
+        """Tests that a file written by the exporter is read back line for line."""
+        batch = _sample_batch()
+        path = self._write(export_to_fec(batch))
+        report = FecReport()
+        with FecReader(path) as reader:
+            ecritures = list(read_ecritures(reader, report))
+        self.assertTrue(report.valid, report.errors)
+        self.assertEqual((report.lines, report.ecritures, report.rejected), (6, 3, 0))
+        self.assertEqual(report.journals, {'AC': [19250, 19250]})
+        self.assertEqual([len(e) for e in ecritures], [2, 2, 2])
+        self.assertEqual(ecritures[1][0].description, 'Facture "2"\tavoir')
+        self.assertEqual(ecritures[2][1].entry_date, date(2024, 1, 3))
+        self.assertEqual((ecritures[2][0].debit, ecritures[2][1].credit), (1250, 1250))
+
+    def test_pipe_delimiter_and_bom(self):
+        """Tests that pipe-separated files with a byte order mark are accepted."""
+        text = export_to_fec(_sample_batch()).replace('\t', '|')
+        report = validate_fec(self._write('\ufeff' + text))
+        self.assertTrue(report.valid, report.errors)
+        self.assertEqual(report.ecritures, 3)
+
+    def test_bad_header(self):
+        """Tests that a file without the FEC header is refused."""
+        with self.assertRaises(FecFormatError):
+            validate_fec(self._write('\t'.join(FEC_HEADER[:-1]) + '\n'))
+        with self.assertRaises(FecFormatError):
+            validate_fec(self._write(''))
+
+    def test_unbalanced_and_invalid_lines(self):
+        """Tests that unbalanced écritures and invalid lines are reported with their line numbers."""
+        lines = export_to_fec(_sample_batch()).splitlines()
+        # Écriture 1 credits 100 instead of 120; écriture 3 has a bad date
+        lines[2] = lines[2].replace('120,00', '100,00')
+        lines[5] = lines[5].replace('20240103', '20241303')
+        report = validate_fec(self._write('\n'.join(lines) + '\n'))
+        self.assertFalse(report.valid)
+        self.assertEqual((report.ecritures, report.rejected), (3, 2))
+        self.assertEqual([line for line, _ in report.errors], [2, 6, 7])
+        self.assertIn('does not balance', report.errors[0][1])
+        self.assertIn('EcritureDate', report.errors[1][1])
+        self.assertEqual(report.errors[2][1], 'Journal AC does not balance')
+
+    def test_stray_quotes(self):
+        """Tests that quotes inside unquoted fields are text, and malformed quoted fields are line errors."""
+        lines = export_to_fec(_sample_batch()).replace('\t', '|').replace('"Facture ""2""|avoir"', 'Facture 2 avoir')
+        lines = lines.splitlines()
+        lines[1] = lines[1].replace('Facture 1', 'ECRAN 24"')
+        report = FecReport()
+        with FecReader(self._write('\n'.join(lines) + '\n')) as reader:
+            ecritures = list(read_ecritures(reader, report))
+        self.assertTrue(report.valid, report.errors)
+        self.assertEqual(ecritures[0][0].description, 'ECRAN 24"')
+
+        # An unclosed quoted field is cut off and the lines after it still read
+        lines[3] = lines[3].replace('|Facture 2 avoir|', '|"Facture 2 avoir|')
+        report = validate_fec(self._write('\n'.join(lines) + '\n'))
+        self.assertEqual((report.lines, report.ecritures, report.rejected), (6, 3, 1))
+        self.assertEqual(report.errors[0][0], 4)
+        self.assertIn('Malformed quoted field', report.errors[0][1])
+
+        # Text after a closing quote
+        lines[3] = lines[3].replace('|"Facture 2 avoir|', '|"Facture" 2|')
+        report = validate_fec(self._write('\n'.join(lines) + '\n'))
+        self.assertEqual(report.errors[0][0], 4)
+        self.assertEqual(report.rejected, 1)
+
+
+class TestImportFec(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('src.config.TestingConfig')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.user = User(username='testuser', password_hash='x')
+        db.session.add(self.user)
+        db.session.commit()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_import(self):
+        """Tests that écritures are numbered per fiscal year, stored and added to the balances."""
+        path = os.path.join(self.tmp.name, 'fec.txt')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(''.join(FecWriter('VT', 'VENTES').chunks(_sample_batch())))
+        progress = []
+        report = import_fec(path, self.user.id, batch_size=2, progress=lambda done, total: progress.append(done))
+        self.assertTrue(report.valid, report.errors)
+        self.assertEqual(report.imported, 3)
+        self.assertEqual(progress[-1], 2 * os.path.getsize(path))
+        self.assertEqual(progress, sorted(progress))
+
+        rows = JournalEntry.query.order_by(JournalEntry.id).all()
+        self.assertEqual(len(rows), 6)
+        self.assertEqual([(r.fiscal_year, r.ecriture_num) for r in rows[::2]], [(2023, 1), (2023, 2), (2024, 1)])
+        self.assertEqual({(r.journal_code, r.journal_lib) for r in rows}, {('VT', 'VENTES')})
+        self.assertEqual(db.session.get(JournalSequence, (self.user.id, 2023)).last_num, 2)
+        balances = {b['account_number']: b for b in trial_balance(self.user.id, '2023-01', '2023-12')}
+        self.assertEqual(balances[615000]['debit'], 18000)
+
+    def _write_unbalanced(self):
+        """Writes the sample file with écriture 1 credited 100 instead of 120."""
+        lines = export_to_fec(_sample_batch()).splitlines()
+        lines[2] = lines[2].replace('120,00', '100,00')
+        path = os.path.join(self.tmp.name, 'fec.txt')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def test_invalid_file_is_not_imported(self):
+        """Tests that a file with errors is only imported, without its rejected écritures, when asked to."""
+        path = self._write_unbalanced()
+        report = import_fec(path, self.user.id)
+        self.assertFalse(report.valid)
+        self.assertEqual(report.imported, 0)
+        self.assertEqual(JournalEntry.query.count(), 0)
+
+        report = import_fec(path, self.user.id, skip_invalid=True)
+        self.assertEqual((report.imported, report.rejected), (2, 1))
+        self.assertEqual(JournalEntry.query.count(), 4)
+
+    def test_failed_import_is_rolled_back(self):
+        """Tests that nothing is kept when an import fails part way."""
+        path = os.path.join(self.tmp.name, 'fec.txt')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(export_to_fec(_sample_batch()))
+        calls = []
+
+        def progress(done, total):
+            # Fails after the first batch of the import pass
+            calls.append(done)
+            if done > total // 2:
+                raise RuntimeError("interrupted")
+
+        with self.assertRaises(RuntimeError):
+            import_fec(path, self.user.id, batch_size=2, progress=progress)
+        self.assertEqual(JournalEntry.query.count(), 0)
+        self.assertEqual(JournalSequence.query.count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import os
+import tempfile
+from datetime import date
+
+from sqlalchemy import create_engine, insert
+
+from src.api.extensions import db
+from src.core.accounting.models import JournalEntry
+from src.core.auth.models import User # Referenced by the journal's foreign keys
+from src.core.invoicing.models import Invoice
+from src.core.export.parallel import ecriture_range, fec_chunks, is_shared_database, number_ranges, parallel_fec_chunks
+
+# Posted out of date order: écriture 1 is in June, 2 in January...
+POSTINGS = [(1, date(2023, 6, 3)), (2, date(2023, 1, 15)), (3, date(2023, 6, 1)), (4, date(2023, 12, 31)),
+            (5, date(2023, 1, 2)), (6, date(2024, 1, 1))]
+
+class TestParallelFec(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database_uri = 'sqlite:///' + os.path.join(self.tmp.name, 'journal.db')
+        engine = create_engine(self.database_uri)
+        db.metadata.create_all(engine)
+        rows = []
+        for number, entry_date in POSTINGS:
+            for account_number, debit, credit in ((615, 10000 + number, None), (44566, 2000, None),
+                                                  (401, None, 12000 + number)):
+                rows.append({'user_id': 1, 'fiscal_year': entry_date.year, 'ecriture_num': number,
+                             'journal_code': 'AC', 'entry_date': entry_date, 'account_number': account_number,
+                             'account_name': 'Compte', 'description': f'Facture {number}',
+                             'debit_cents': debit, 'credit_cents': credit})
+        with engine.begin() as connection:
+            connection.execute(insert(JournalEntry), rows)
+        engine.dispose()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_number_ranges(self):
+        """Tests that a fiscal year's écriture numbers split into consecutive ranges."""
+        engine = create_engine(self.database_uri)
+        with engine.connect() as connection:
+            self.assertEqual(ecriture_range(connection, 1, 2023, 'AC'), (1, 5))
+            self.assertIsNone(ecriture_range(connection, 1, 2022, 'AC'))
+        engine.dispose()
+        self.assertEqual(number_ranges(1, 5, 2), [(1, 2), (3, 4), (5, 5)])
+        self.assertEqual(number_ranges(3, 4, 10), [(3, 4)])
+
+    def test_parallel_matches_sequential(self):
+        """Tests that the sharded export is byte-identical to the sequential one."""
+        sequential = ''.join(fec_chunks(self.database_uri, 1, 2023))
+        parallel = ''.join(parallel_fec_chunks(self.database_uri, 1, 2023, workers=2, shard_size=2))
+        self.assertEqual(parallel, sequential)
+
+        # Écritures keep their posted numbers, whatever their dates
+        rows = [line.split('\t') for line in sequential.splitlines()[1:]]
+        self.assertEqual([(r[2], r[3], r[10]) for r in rows[::3]],
+                         [('00001', '20230603', 'Facture 1'), ('00002', '20230115', 'Facture 2'),
+                          ('00003', '20230601', 'Facture 3'), ('00004', '20231231', 'Facture 4'),
+                          ('00005', '20230102', 'Facture 5')])
+
+    def test_empty_year(self):
+        """Tests that a year without entries exports the header only."""
+        self.assertEqual(''.join(parallel_fec_chunks(self.database_uri, 1, 2022)).count('\n'), 1)
+
+    def test_shared_database(self):
+        """Tests that in-memory SQLite databases are not shared with worker processes."""
+        self.assertFalse(is_shared_database('sqlite:///:memory:'))
+        self.assertTrue(is_shared_database(self.database_uri))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+from src.core.ocr.adaptive import AdaptiveReader, FAST_PASS, FULL_PASS, BLOCK_PASS
+
+VALID_TEXT = "Votre Entreprise\nFACTURE N°: INV-1\nDate: 26/10/2023\nTotal HT: 100.00\nTVA (20%): 20.00\nTotal TTC: 120.00\n"
+# The fast pass misread the TTC amount
+MISREAD_TEXT = VALID_TEXT.replace("Total TTC: 120.00", "Total TTC: 720.00")
+
+class TestAdaptiveReader(unittest.TestCase):
+
+    @mock.patch('src.core.ocr.adaptive.extract_text_from_image', return_value=VALID_TEXT)
+    def test_fast_pass_accepted(self, mock_ocr):
+        """Tests that consistent totals from the fast pass skip the other passes."""
+        reader = AdaptiveReader()
+        raw_text, data, pass_name = reader.read_invoice('invoice.png')
+
+        self.assertEqual(pass_name, 'fast')
+        self.assertEqual(data['total_ttc'], 120.0)
+        mock_ocr.assert_called_once_with('invoice.png', FAST_PASS.preprocessing, None)
+        stats = reader.stats.summary()
+        self.assertEqual(stats['passes']['fast']['accepted'], 1)
+        self.assertEqual(stats['passes']['full']['runs'], 0)
+
+    @mock.patch('src.core.ocr.adaptive.extract_text_from_image', side_effect=[MISREAD_TEXT, VALID_TEXT])
+    def test_falls_back_to_full_resolution(self, mock_ocr):
+        """Tests that inconsistent totals trigger the full-resolution pass."""
+        reader = AdaptiveReader()
+        _, data, pass_name = reader.read_invoice('invoice.png')
+
+        self.assertEqual(pass_name, 'full')
+        self.assertEqual(data['total_ttc'], 120.0)
+        self.assertEqual(mock_ocr.call_args_list[1], mock.call('invoice.png', FULL_PASS.preprocessing, None))
+        stats = reader.stats.summary()
+        self.assertEqual((stats['passes']['fast']['runs'], stats['passes']['fast']['accepted']), (1, 0))
+        self.assertEqual(stats['passes']['full']['accepted'], 1)
+
+    @mock.patch('src.core.ocr.adaptive.extract_text_from_image', side_effect=[MISREAD_TEXT, MISREAD_TEXT, ""])
+    def test_unresolved_returns_last_text(self, mock_ocr):
+        """Tests that when no pass validates, the last non-empty result is kept and counted."""
+        reader = AdaptiveReader()
+        trace = []
+        raw_text, _, pass_name = reader.read_invoice('invoice.png', trace=trace)
+
+        self.assertEqual((raw_text, pass_name), (MISREAD_TEXT, 'full'))
+        self.assertEqual(mock_ocr.call_args_list[2], mock.call('invoice.png', BLOCK_PASS.preprocessing, 6))
+        self.assertEqual([(name, valid) for name, _, valid in trace],
+                         [('fast', False), ('full', False), ('block', False)])
+        self.assertEqual(reader.stats.summary()['unresolved'], 1)
+
+    def test_requires_a_pass(self):
+        """Tests that a reader without passes is rejected."""
+        with self.assertRaises(ValueError):
+            AdaptiveReader(passes=())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from flask import Flask
+from src.core.ocr.cache import OcrCache, OcrResultStore, cache_key
+from src.core.ocr.layout import Word
+
+MOCK_TEXT = "Votre Entreprise\nFACTURE N°: INV-1\nDate: 26/10/2023\nTotal HT: 100.00\nTVA (20%): 20.00\nTotal TTC: 120.00\n"
+
+class TestOcrResultStore(unittest.TestCase):
+
+    def test_get_and_put(self):
+        """Tests that stored results come back unchanged and hits/misses are counted."""
+        store = OcrResultStore(':memory:', max_bytes=1024 * 1024)
+        self.assertIsNone(store.get('abc'))
+        store.put('abc', 'raw text', {'total_ht': 100.0, 'line_items': []})
+        self.assertEqual(store.get('abc'), ('raw text', {'total_ht': 100.0, 'line_items': []}))
+        self.assertEqual((store.hits, store.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        """Tests that the least recently used entries are evicted once over budget."""
+        store = OcrResultStore(':memory:', max_bytes=250)
+        for key in ('a', 'b'):
+            store.put(key, 'x' * 100, {})
+        store.get('a')  # 'a' is now more recent than 'b'
+        store.put('c', 'x' * 100, {})
+
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.get('b'))
+        self.assertIsNotNone(store.get('a'))
+        self.assertIsNotNone(store.get('c'))
+
+class TestOcrCache(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['OCR_CACHE_PATH'] = ':memory:'
+        self.cache = OcrCache(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        fd, self.image_path = tempfile.mkstemp(suffix='.png')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'not really a png')
+
+    def tearDown(self):
+        self.app_context.pop()
+        os.remove(self.image_path)
+
+    def test_key_depends_on_content_and_settings(self):
+        """Tests that the key changes with the file content and the OCR settings."""
+        key = cache_key(self.image_path)
+        self.assertEqual(key, cache_key(self.image_path))
+        self.assertNotEqual(key, cache_key(self.image_path, lang='eng'))
+        with open(self.image_path, 'ab') as f:
+            f.write(b'!')
+        self.assertNotEqual(key, cache_key(self.image_path))
+
+    @mock.patch('src.core.ocr.cache.extract_text_from_image', return_value=MOCK_TEXT)
+    def test_read_invoice_runs_ocr_once(self, mock_ocr):
+        """Tests that a second read of the same file is served from the cache."""
+        first = self.cache.read_invoice(self.image_path)
+        second = self.cache.read_invoice(self.image_path)
+
+        mock_ocr.assert_called_once_with(self.image_path)
+        self.assertEqual(first, second)
+        self.assertEqual(second[1]['total_ttc'], 120.0)
+
+    @mock.patch('src.core.ocr.cache.extract_text_from_image', return_value="")
+    def test_failed_ocr_is_not_cached(self, mock_ocr):
+        """Tests that empty OCR output is retried rather than cached."""
+        self.cache.read_invoice(self.image_path)
+        self.cache.read_invoice(self.image_path)
+        self.assertEqual(mock_ocr.call_count, 2)
+
+    @mock.patch('src.core.ocr.cache.extract_text_from_image')
+    @mock.patch('src.core.ocr.cache.extract_words_from_image',
+                return_value=[Word('Votre', 40, 20, 60, 18), Word('Entreprise', 108, 20, 110, 18)])
+    def test_layout_engine(self, mock_words, mock_text):
+        """Tests that the layout engine reads word boxes and is cached under its own key."""
+        self.app.config['OCR_EXTRACTION_ENGINE'] = 'layout'
+        raw_text, data = self.cache.read_invoice(self.image_path)
+        self.assertEqual(raw_text, 'Votre Entreprise')
+        self.assertEqual(data['supplier'], 'Votre Entreprise')
+        mock_text.assert_not_called()
+        self.assertNotEqual(cache_key(self.image_path, engine='layout'), cache_key(self.image_path))
+
+    @mock.patch('src.core.ocr.cache.extract_text_from_image')
+    @mock.patch('src.core.ocr.adaptive.extract_text_from_image', return_value=MOCK_TEXT)
+    def test_adaptive_reading(self, mock_adaptive, mock_text):
+        """Tests that OCR_ADAPTIVE reads through the adaptive reader, under its own key."""
+        self.app.config['OCR_ADAPTIVE'] = True
+        self.cache.read_invoice(self.image_path)
+        self.cache.read_invoice(self.image_path)
+
+        mock_adaptive.assert_called_once()
+        mock_text.assert_not_called()
+        self.assertEqual(self.cache.adaptive.stats.summary()['passes']['fast']['accepted'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
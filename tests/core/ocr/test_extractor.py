@@ -1,8 +1,22 @@
 import unittest
 import os
+import random
 from src.core.ocr.reader import extract_text_from_image
-from src.core.ocr.extractor import extract_invoice_data
+from src.core.ocr.extractor import extract_invoice_data, extract_many, InvoiceScanner
 from src.core.accounting.categories import DEFAULT_CATEGORY
+from src.data.synthetic import random_invoice, render_text
+
+MOCK_OCR_TEXT = """Votre Entreprise
+FACTURE N°: INV2023-042
+Date: 26/10/2023
+
+Description | Quantité | Prix unitaire | Total
+Service de conseil | 10 | 75.00 | 750.00
+Produit A | 2 | 125.00 | 250.00
+Total HT: 1 000,00
+TVA (20%): 200,00
+Total TTC: 1200.00
+"""
 
 class TestOcrExtractor(unittest.TestCase):
 
@@ -45,5 +59,68 @@ class TestOcrExtractor(unittest.TestCase):
         self.assertEqual(extracted_data['line_items'], expected_line_items)
 
 
+class TestInvoiceScanner(unittest.TestCase):
+
+    def test_extract_from_text(self):
+        """Tests header fields, VAT and line items extracted from OCR text."""
+        data = extract_invoice_data(MOCK_OCR_TEXT)
+        self.assertEqual(data['supplier'], 'Votre Entreprise')
+        self.assertEqual(data['invoice_id'], 'INV2023-042')
+        self.assertEqual(data['date'], '26/10/2023')
+        self.assertEqual(data['total_ht'], 1000.00)
+        self.assertEqual(data['vat_rate'], 20.0)
+        self.assertEqual(data['vat_amount'], 200.00)
+        self.assertEqual(data['total_ttc'], 1200.00)
+        self.assertEqual([item['total'] for item in data['line_items']], [750.0, 250.0])
+
+    def test_first_occurrence_wins(self):
+        """Tests that a repeated label keeps its first value, as separate searches would."""
+        text = MOCK_OCR_TEXT + "Total TTC: 99.00\nDate: 01/01/2024\n"
+        data = extract_invoice_data(text)
+        self.assertEqual(data['total_ttc'], 1200.00)
+        self.assertEqual(data['date'], '26/10/2023')
+
+    def test_empty_value_does_not_hide_next_label(self):
+        """Tests that a label found inside another field's match is still matched, as separate searches would."""
+        data = extract_invoice_data("Fournisseur\nFACTURE N°:\nDate: 26/10/2023\n")
+        self.assertEqual(data['date'], '26/10/2023')
+        self.assertEqual(data['invoice_id'], 'Date:')
+
+    def test_vat_without_rate(self):
+        """Tests the fallback VAT label without a rate, and preference for the rated one."""
+        text = "Fournisseur\nTVA: 19,60\nTotal TTC: 117.60\n"
+        data = extract_invoice_data(text)
+        self.assertIsNone(data['vat_rate'])
+        self.assertEqual(data['vat_amount'], 19.60)
+
+        data = extract_invoice_data(text + "TVA (5.5%): 5.50\n")
+        self.assertEqual(data['vat_rate'], 5.5)
+        self.assertEqual(data['vat_amount'], 5.50)
+
+    def test_missing_fields(self):
+        """Tests that text without labels gives empty fields."""
+        data = extract_invoice_data("no newline here")
+        self.assertIsNone(data['supplier'])
+        self.assertIsNone(data['total_ttc'])
+        self.assertEqual(data['line_items'], [])
+
+    def test_extract_many_matches_ground_truth(self):
+        """Tests batch extraction on synthetic invoices against their ground truth."""
+        rng = random.Random(7)
+        invoices = [random_invoice(rng) for _ in range(50)]
+        results = list(extract_many(render_text(invoice) for invoice in invoices))
+        self.assertEqual(len(results), 50)
+        for invoice, data in zip(invoices, results):
+            for field in ('supplier', 'invoice_id', 'date', 'total_ht', 'vat_rate', 'vat_amount', 'total_ttc'):
+                self.assertEqual(data[field], invoice[field])
+            self.assertEqual(len(data['line_items']), len(invoice['line_items']))
+
+    def test_custom_patterns(self):
+        """Tests that a scanner can be built for other labels."""
+        scanner = InvoiceScanner({'iban': r"IBAN:\s*(?P<iban>\S+)"})
+        found = scanner.scan("Banque\nIBAN: FR7612345\n")
+        self.assertEqual(found['iban'].group('iban'), 'FR7612345')
+
+
 if __name__ == '__main__':
     unittest.main()
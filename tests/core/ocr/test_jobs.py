@@ -0,0 +1,49 @@
+import threading
+import unittest
+from flask import Flask
+from src.core.ocr.jobs import OcrJobQueue, QueueFullError
+
+class TestOcrJobQueue(unittest.TestCase):
+
+    def _make_app(self, **config):
+        app = Flask(__name__)
+        app.config.update(config)
+        jobs = OcrJobQueue(app)
+        return app, jobs
+
+    def test_eager_mode_runs_inline(self):
+        """Tests that jobs run immediately in the caller when OCR_EAGER is set."""
+        app, jobs = self._make_app(OCR_EAGER=True)
+        results = []
+        with app.app_context():
+            jobs.submit(results.append, 42)
+        self.assertEqual(results, [42])
+
+    def test_worker_runs_job_in_app_context(self):
+        """Tests that a worker thread picks up the job inside an application context."""
+        app, jobs = self._make_app(OCR_WORKERS=1, OCR_QUEUE_SIZE=4)
+        done = threading.Event()
+        seen = []
+
+        def job(value):
+            from flask import current_app
+            seen.append((current_app.name, value))
+            done.set()
+
+        with app.app_context():
+            jobs.submit(job, 'invoice-1')
+        self.assertTrue(done.wait(timeout=5))
+        self.assertEqual(seen, [(app.name, 'invoice-1')])
+
+    def test_full_queue_raises(self):
+        """Tests that submitting beyond OCR_QUEUE_SIZE raises QueueFullError."""
+        app, jobs = self._make_app(OCR_WORKERS=0, OCR_QUEUE_SIZE=2)
+        with app.app_context():
+            jobs.submit(print)
+            jobs.submit(print)
+            self.assertEqual(jobs.pending(), 2)
+            with self.assertRaises(QueueFullError):
+                jobs.submit(print)
+
+if __name__ == '__main__':
+    unittest.main()
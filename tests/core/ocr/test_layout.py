@@ -0,0 +1,87 @@
+import unittest
+from src.core.ocr.layout import Word, WordIndex, parse_tsv, extract_invoice_data_from_words
+from src.core.accounting.categories import DEFAULT_CATEGORY
+
+def _row(y, *cells, page=1):
+    """Builds the words of one row from (x, text) cells, splitting cell text on spaces."""
+    words = []
+    for x, text in cells:
+        for part in text.split(' '):
+            words.append(Word(part, x, y, 10 * len(part), 20, 95.0, page))
+            x += 10 * len(part) + 8
+    return words
+
+# Word boxes laid out like the synthetic invoice, in shuffled reading order
+INVOICE_WORDS = (
+    _row(400, (40, 'Total HT:'), (420, '1 000,00'))
+    + _row(20, (40, 'Votre Entreprise'))
+    + _row(60, (40, 'FACTURE N°: INV2023-042'))
+    + _row(62, (400, 'Date: 26/10/2023'))
+    + _row(200, (40, 'Description'), (250, 'Quantité'), (360, 'Prix unitaire'), (520, 'Total'))
+    + _row(240, (40, 'Service de conseil'), (260, '10'), (370, '75.00'), (530, '750.00'))
+    + _row(280, (40, 'Produit A'), (260, '2'), (370, '125.00'), (530, '250.00'))
+    + _row(440, (40, 'TVA (20%):'), (420, '200,00'))
+    + _row(480, (40, 'Total TTC:'), (420, '1200,00'))
+)
+
+class TestLayoutExtractor(unittest.TestCase):
+
+    def test_extract_invoice_fields(self):
+        """Tests that header fields and totals are read from their label's row."""
+        data = extract_invoice_data_from_words(INVOICE_WORDS)
+        self.assertEqual(data['supplier'], 'Votre Entreprise')
+        self.assertEqual(data['invoice_id'], 'INV2023-042')
+        self.assertEqual(data['date'], '26/10/2023')
+        self.assertEqual(data['total_ht'], 1000.0)
+        self.assertEqual(data['vat_rate'], 20.0)
+        self.assertEqual(data['vat_amount'], 200.0)
+        self.assertEqual(data['total_ttc'], 1200.0)
+
+    def test_extract_line_items_by_column(self):
+        """Tests that table rows are split into columns from the header positions."""
+        data = extract_invoice_data_from_words(INVOICE_WORDS)
+        self.assertEqual(data['line_items'], [
+            {'description': 'Service de conseil', 'category': 'Documentation et honoraires',
+             'quantity': 10, 'unit_price': 75.0, 'total': 750.0},
+            {'description': 'Produit A', 'category': DEFAULT_CATEGORY,
+             'quantity': 2, 'unit_price': 125.0, 'total': 250.0},
+        ])
+
+    def test_table_continued_on_next_page(self):
+        """Tests that a repeated table header on a new page continues the line items."""
+        words = list(INVOICE_WORDS) + (
+            _row(20, (40, 'Description'), (250, 'Quantité'), (360, 'Prix unitaire'), (520, 'Total'), page=2)
+            + _row(60, (40, 'Loyer bureau'), (260, '1'), (370, '900.00'), (530, '900.00'), page=2)
+        )
+        items = extract_invoice_data_from_words(words)['line_items']
+        self.assertEqual([item['description'] for item in items], ['Service de conseil', 'Produit A', 'Loyer bureau'])
+        self.assertEqual(items[-1]['category'], 'Locations')
+
+    def test_same_keys_as_text_extractor(self):
+        """Tests that an empty document yields the same dictionary shape, with no values."""
+        data = extract_invoice_data_from_words([])
+        self.assertEqual(set(data), {'supplier', 'invoice_id', 'date', 'total_ht', 'vat_rate',
+                                     'vat_amount', 'total_ttc', 'line_items'})
+        self.assertEqual(data['line_items'], [])
+
+    def test_rows_and_text(self):
+        """Tests that words are grouped into rows that rebuild the text line by line."""
+        index = WordIndex(INVOICE_WORDS)
+        self.assertEqual(index.rows[1].text, 'FACTURE N°: INV2023-042 Date: 26/10/2023')
+        self.assertEqual(index.find_rows('total', 'ttc'), [len(index.rows) - 1])
+
+    def test_parse_tsv(self):
+        """Tests that only word-level TSV rows with text are kept."""
+        tsv = (
+            "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+            "1\t1\t0\t0\t0\t0\t0\t0\t600\t800\t-1\t\n"
+            "5\t1\t1\t1\t1\t1\t40\t20\t60\t18\t96.5\tVotre\n"
+            "5\t1\t1\t1\t1\t2\t108\t20\t110\t18\t95.1\tEntreprise\n"
+            "5\t1\t1\t1\t1\t3\t230\t20\t5\t18\t-1\t \n"
+        )
+        words = parse_tsv(tsv, page=2)
+        self.assertEqual([w.text for w in words], ['Votre', 'Entreprise'])
+        self.assertEqual(words[0], Word('Votre', 40, 20, 60, 18, 96.5, 2))
+
+if __name__ == '__main__':
+    unittest.main()
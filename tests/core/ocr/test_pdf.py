@@ -0,0 +1,108 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from PIL import Image
+from src.core.ocr.pdf import iter_pdf_pages, map_pages
+from src.core.ocr.reader import extract_text_from_image, extract_words_from_image
+
+def _write_text_pdf(path, lines):
+    """Writes a one-page PDF whose text layer holds `lines`."""
+    stream = "BT /F1 12 Tf 14 TL 50 780 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R"
+        " /Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+    ]
+    out = "%PDF-1.4\n"
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    with open(path, 'w', encoding='latin-1') as f:
+        f.write(out)
+
+INVOICE_LINES = [
+    "Votre Entreprise",
+    "FACTURE N: INV2023-042",
+    "Date: 26/10/2023",
+    "Total HT: 1000.00",
+    "Total TTC: 1200.00",
+]
+
+class TestPdfReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _scanned_pdf(self, pages=3):
+        path = os.path.join(self.tmpdir.name, 'scan.pdf')
+        images = [Image.new('RGB', (200, 300), 'white') for _ in range(pages)]
+        images[0].save(path, 'PDF', save_all=True, append_images=images[1:], resolution=72)
+        return path
+
+    def test_scanned_pages_are_rendered_in_order(self):
+        """Tests that pages without a text layer are yielded as images, one by one."""
+        pages = list(iter_pdf_pages(self._scanned_pdf(), dpi=144))
+        self.assertEqual([p.number for p in pages], [1, 2, 3])
+        self.assertTrue(all(p.text is None for p in pages))
+        self.assertEqual(pages[0].image.size, (400, 600))
+
+    def test_text_layer_skips_rendering(self):
+        """Tests that pages with embedded text are read without rendering."""
+        path = os.path.join(self.tmpdir.name, 'text.pdf')
+        _write_text_pdf(path, INVOICE_LINES)
+        (page,) = list(iter_pdf_pages(path))
+        self.assertIsNone(page.image)
+        self.assertIn("Total TTC: 1200.00", page.text)
+
+    def test_map_pages_keeps_order_with_parallel_ocr(self):
+        """Tests that scanned pages run on worker threads and results stay in page order."""
+        threads = set()
+
+        def ocr_page(page):
+            threads.add(threading.get_ident())
+            return f"page {page.number}"
+
+        results = map_pages(iter_pdf_pages(self._scanned_pdf(pages=6), dpi=36), ocr_page,
+                            read_text=lambda page: page.text, workers=3)
+        self.assertEqual(results, [f"page {n}" for n in range(1, 7)])
+        self.assertNotIn(threading.get_ident(), threads)
+
+        # The next document runs on the same threads, which keep their OCR engines
+        map_pages(iter_pdf_pages(self._scanned_pdf(pages=6), dpi=36), ocr_page,
+                  read_text=lambda page: page.text, workers=3)
+        self.assertLessEqual(len(threads), 3)
+
+    @mock.patch('src.core.ocr.reader.pytesseract')
+    def test_reader_ocrs_scanned_pdf(self, mock_tesseract):
+        """Tests that the reader sends each scanned page to Tesseract."""
+        mock_tesseract.image_to_string.return_value = "texte"
+        text = extract_text_from_image(self._scanned_pdf(pages=2))
+        self.assertEqual(text, "texte\ntexte")
+        self.assertEqual(mock_tesseract.image_to_string.call_count, 2)
+
+    @mock.patch('src.core.ocr.reader.pytesseract')
+    def test_reader_uses_text_layer(self, mock_tesseract):
+        """Tests that text-layer PDFs are read without OCR, as text and as words."""
+        path = os.path.join(self.tmpdir.name, 'text.pdf')
+        _write_text_pdf(path, INVOICE_LINES)
+        self.assertIn("FACTURE N: INV2023-042", extract_text_from_image(path))
+        words = extract_words_from_image(path)
+        self.assertEqual(words[0].text, "Votre")
+        mock_tesseract.image_to_string.assert_not_called()
+        mock_tesseract.image_to_data.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
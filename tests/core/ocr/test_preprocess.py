@@ -0,0 +1,71 @@
+import unittest
+from PIL import Image, ImageDraw
+from src.core.ocr.preprocess import (
+    PreprocessConfig, DEFAULT_PREPROCESSING, FULL_PREPROCESSING, NO_PREPROCESSING,
+    preprocess_image, downscale, binarize, estimate_skew, crop
+)
+
+def _make_page(width=600, height=800):
+    """Draws a white page with a few thick horizontal text-like lines."""
+    img = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    for y in range(150, height - 150, 40):
+        draw.rectangle([100, y, width - 100, y + 8], fill=0)
+    return img
+
+class TestPreprocess(unittest.TestCase):
+
+    def test_downscale_caps_pixels(self):
+        """Tests that large images are shrunk to the pixel budget and small ones left alone."""
+        config = PreprocessConfig(max_pixels=100 * 100)
+        big = Image.new('RGB', (400, 400), 'white')
+        self.assertEqual(downscale(big, config).size, (100, 100))
+        small = Image.new('RGB', (50, 50), 'white')
+        self.assertIs(downscale(small, config), small)
+
+    def test_downscale_uses_dpi(self):
+        """Tests that images with DPI metadata are brought to the target DPI."""
+        img = Image.new('L', (1200, 1200), 255)
+        img.info['dpi'] = (600, 600)
+        self.assertEqual(downscale(img, PreprocessConfig(target_dpi=300)).size, (600, 600))
+
+    def test_binarize_handles_uneven_lighting(self):
+        """Tests that text is kept and a dark gradient background is whitened."""
+        img = Image.linear_gradient('L').resize((200, 200)).point(lambda v: 100 + v // 2)
+        ImageDraw.Draw(img).rectangle([90, 20, 94, 180], fill=0)
+        result = binarize(img, DEFAULT_PREPROCESSING)
+        self.assertEqual(set(result.getdata()) - {0, 255}, set())
+        self.assertEqual(result.getpixel((92, 100)), 0)
+        self.assertEqual(result.getpixel((20, 180)), 255)
+
+    def test_estimate_skew(self):
+        """Tests that the rotation of a tilted page is detected."""
+        page = _make_page().rotate(3, fillcolor=255)
+        angle = estimate_skew(page, PreprocessConfig(deskew_step=0.5))
+        self.assertAlmostEqual(angle, -3.0, delta=0.5)
+        self.assertEqual(estimate_skew(_make_page(), DEFAULT_PREPROCESSING), 0.0)
+
+    def test_crop_removes_margins(self):
+        """Tests that blank margins are cropped down to the padding."""
+        img = Image.new('L', (500, 500), 255)
+        ImageDraw.Draw(img).rectangle([200, 200, 299, 299], fill=0)
+        self.assertEqual(crop(img, PreprocessConfig(crop_padding=10)).size, (120, 120))
+
+    def test_pipeline_reports_timings(self):
+        """Tests that each configured step is timed and disabled steps are skipped."""
+        _, timings = preprocess_image(_make_page().convert('RGB'), FULL_PREPROCESSING)
+        self.assertEqual(list(timings), ['downscale', 'grayscale', 'binarize', 'deskew', 'crop'])
+        img = _make_page()
+        result, timings = preprocess_image(img, NO_PREPROCESSING)
+        self.assertIs(result, img)
+        self.assertEqual(timings, {})
+
+    def test_version_reflects_settings(self):
+        """Tests that the version string changes with the settings."""
+        self.assertEqual(NO_PREPROCESSING.version, 'none')
+        self.assertNotEqual(DEFAULT_PREPROCESSING.version, PreprocessConfig(target_dpi=200).version)
+        with self.assertRaises(ValueError):
+            PreprocessConfig(steps=('sharpen',))
+
+if __name__ == '__main__':
+    unittest.main()
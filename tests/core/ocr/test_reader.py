@@ -1,5 +1,11 @@
 import unittest
 import os
+import sys
+import threading
+import types
+from unittest import mock
+from PIL import Image
+from src.core.ocr import reader
 from src.core.ocr.reader import extract_text_from_image
 
 class TestOcrReader(unittest.TestCase):
@@ -21,5 +27,85 @@ class TestOcrReader(unittest.TestCase):
         self.assertIn("Total TTC", extracted_text)
         self.assertIn("Votre Entreprise", extracted_text)
 
+class _FakeEngine:
+    """Stands in for tesserocr.PyTessBaseAPI and records how it is used."""
+    created = []
+
+    def __init__(self, path=None, lang=None):
+        self.lang = lang
+        self.images = []
+        _FakeEngine.created.append(self)
+
+    def SetPageSegMode(self, psm):
+        self.psm = psm
+
+    def SetImage(self, image):
+        self.images.append(image)
+
+    def SetSourceResolution(self, dpi):
+        self.dpi = dpi
+
+    def GetUTF8Text(self):
+        return f"text {len(self.images)}"
+
+    def GetTSVText(self, page):
+        return "5\t1\t1\t1\t1\t1\t10\t10\t50\t20\t90.0\tBonjour"
+
+class TestOcrBackends(unittest.TestCase):
+
+    def setUp(self):
+        _FakeEngine.created = []
+        fake = types.SimpleNamespace(PyTessBaseAPI=_FakeEngine, PSM=types.SimpleNamespace(AUTO=3))
+        self.modules = mock.patch.dict(sys.modules, {'tesserocr': fake})
+        self.modules.start()
+        self.image = Image.new('L', (20, 20), 255)
+        self.previous_backend = reader._backend
+
+    def tearDown(self):
+        self.modules.stop()
+        reader.set_backend(self.previous_backend)
+
+    def test_engine_is_reused_per_thread(self):
+        """Tests that each thread loads the language model once and reuses it."""
+        backend = reader.TesserocrBackend()
+        self.assertEqual(backend.image_to_string(self.image, 'fra'), "text 1")
+        self.assertEqual(backend.image_to_string(self.image, 'fra', psm=6), "text 2")
+        self.assertEqual(len(_FakeEngine.created), 1)
+        self.assertEqual(_FakeEngine.created[0].psm, 6)
+
+        worker = threading.Thread(target=backend.image_to_string, args=(self.image, 'fra'))
+        worker.start()
+        worker.join()
+        self.assertEqual(len(_FakeEngine.created), 2)
+
+    def test_tsv_has_header(self):
+        """Tests that in-process TSV output parses like pytesseract's."""
+        reader.set_backend(reader.TesserocrBackend())
+        with mock.patch('src.core.ocr.reader.Image.open', return_value=self.image):
+            words = reader.extract_words_from_image('invoice.png')
+        self.assertEqual([w.text for w in words], ['Bonjour'])
+
+    def test_reader_uses_configured_backend(self):
+        """Tests that the reader goes through the selected backend."""
+        backend = mock.Mock(spec=reader.OcrBackend)
+        backend.image_to_string.return_value = "Votre Entreprise"
+        reader.set_backend(backend)
+        with mock.patch('src.core.ocr.reader.Image.open', return_value=self.image):
+            self.assertEqual(extract_text_from_image('invoice.png'), "Votre Entreprise")
+        backend.image_to_string.assert_called_once()
+
+    def test_backend_interface_is_abstract(self):
+        """Tests that a backend must implement both OCR calls."""
+        with self.assertRaises(TypeError):
+            reader.OcrBackend()
+
+    def test_auto_falls_back_to_pytesseract(self):
+        """Tests that 'auto' uses pytesseract when the in-process engine cannot start."""
+        with mock.patch.object(_FakeEngine, '__init__', side_effect=RuntimeError("no tessdata")):
+            self.assertIsInstance(reader.create_backend('auto'), reader.PytesseractBackend)
+        self.assertIsInstance(reader.create_backend('auto'), reader.TesserocrBackend)
+        with self.assertRaises(ValueError):
+            reader.create_backend('easyocr')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from decimal import Decimal
+
+from src.core.money import format_cents, from_cents, percentage, sum_cents, to_cents, to_decimal
+
+
+class TestMoney(unittest.TestCase):
+
+    def test_to_cents_from_floats(self):
+        """Floats give the cents they print with two decimals."""
+        self.assertEqual(to_cents(0.1 + 0.2), 30)
+        self.assertEqual(to_cents(19.99), 1999)
+        self.assertEqual(to_cents(-2.5), -250)
+        # Exact binary halves round to even, as printing does
+        self.assertEqual(to_cents(0.125), 12)
+        self.assertEqual(to_cents(61.125), 6112)
+        self.assertEqual(to_cents(-61.375), -6138)
+        # Stored just below the half cent, as f"{amount:.2f}" prints them
+        self.assertEqual(to_cents(273.145), 27314)
+        self.assertEqual(to_cents(1.005), 100)
+        self.assertEqual(to_cents(-754.665), -75466)
+
+    def test_to_cents_from_other_types(self):
+        """Integers, decimals and strings with a comma or spaces convert exactly."""
+        self.assertEqual(to_cents(12), 1200)
+        self.assertEqual(to_cents(Decimal('1.005')), 101)
+        self.assertEqual(to_cents('1 234,56'), 123456)
+
+    def test_sum_is_exact(self):
+        """Summing many amounts gives the exact total, skipping None."""
+        self.assertEqual(sum_cents([0.1] * 1000 + [None]), 10000)
+        self.assertEqual(from_cents(sum_cents([0.1] * 1000)), 100.0)
+
+    def test_percentage(self):
+        """VAT rates with decimals round half away from zero."""
+        self.assertEqual(percentage(10000, 20.0), 2000)
+        self.assertEqual(percentage(1010, 5.5), 56)
+        self.assertEqual(percentage(-1010, 5.5), -56)
+
+    def test_formatting(self):
+        """Cents are printed with two decimals and the given decimal mark."""
+        self.assertEqual(format_cents(25000), "250,00")
+        self.assertEqual(format_cents(5), "0,05")
+        self.assertEqual(format_cents(-123456), "-1234,56")
+        self.assertEqual(format_cents(199, '.'), "1.99")
+        self.assertEqual(to_decimal(-5), Decimal('-0.05'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from src.core.timing import percentile, summarize_durations
+
+class TestTiming(unittest.TestCase):
+
+    def test_percentile(self):
+        """Tests nearest-rank percentiles on a simple series."""
+        values = [5, 1, 4, 2, 3, 6, 7, 8, 9, 10]
+        self.assertEqual(percentile(values, 50), 5)
+        self.assertEqual(percentile(values, 95), 10)
+        self.assertEqual(percentile(values, 0), 1)
+
+    def test_empty_input(self):
+        """Tests that empty inputs summarize to zeros."""
+        self.assertEqual(percentile([], 50), 0.0)
+        summary = summarize_durations([])
+        self.assertEqual(summary['count'], 0)
+        self.assertEqual(summary['mean'], 0.0)
+
+    def test_summary(self):
+        """Tests the summary of a list of durations."""
+        summary = summarize_durations([0.1, 0.2, 0.3, 0.4])
+        self.assertEqual(summary['count'], 4)
+        self.assertAlmostEqual(summary['mean'], 0.25)
+        self.assertEqual(summary['p50'], 0.2)
+        self.assertEqual(summary['max'], 0.4)
+
+if __name__ == '__main__':
+    unittest.main()
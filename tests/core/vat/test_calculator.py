@@ -45,5 +45,20 @@ class TestVatCalculator(unittest.TestCase):
         zero_data = {'total_ht': 100.0, 'vat_amount': 0.0, 'total_ttc': 100.0, 'vat_rate': 0.0}
         self.assertTrue(validate_invoice_totals(zero_data))
 
+    def test_totals_must_add_up_to_the_cent(self):
+        """Tests that a total off by a few euros is rejected, even on a large invoice."""
+        data = {'total_ht': 1000.0, 'vat_amount': 200.0, 'total_ttc': 1206.0}
+        self.assertFalse(validate_invoice_totals(data))
+        data['total_ttc'] = 1200.0
+        self.assertTrue(validate_invoice_totals(data))
+
+    def test_vat_rounded_per_line(self):
+        """Tests that VAT rounded line by line may differ from the total's VAT by a cent per line."""
+        data = {'total_ht': 0.4, 'vat_amount': 0.04, 'total_ttc': 0.44, 'vat_rate': 5.5,
+                'line_items': [{'total': 0.1}] * 4}
+        self.assertTrue(validate_invoice_totals(data))
+        data['line_items'] = []
+        self.assertFalse(validate_invoice_totals(data))
+
 if __name__ == '__main__':
     unittest.main()
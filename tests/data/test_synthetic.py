@@ -0,0 +1,47 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from src.data.synthetic import random_invoice, render_image, generate_corpus
+from src.core.ocr.evaluation import load_ground_truth
+from src.core.vat.calculator import validate_invoice_totals
+
+class TestSyntheticInvoices(unittest.TestCase):
+
+    def test_random_invoice_is_consistent(self):
+        """Tests that generated invoices have totals that add up."""
+        rng = random.Random(42)
+        for _ in range(50):
+            invoice = random_invoice(rng)
+            self.assertTrue(validate_invoice_totals(invoice))
+            self.assertAlmostEqual(sum(item['total'] for item in invoice['line_items']), invoice['total_ht'])
+
+    def test_render_image(self):
+        """Tests that pages are A4 at the requested resolution and noise is reproducible."""
+        invoice = random_invoice(random.Random(1))
+        clean = render_image(invoice, dpi=72)
+        self.assertEqual((clean.size, clean.mode, clean.info['dpi']), ((595, 842), 'L', (72, 72)))
+
+        noisy = render_image(invoice, random.Random(7), noise=1.0, dpi=72)
+        self.assertEqual(noisy.tobytes(), render_image(invoice, random.Random(7), noise=1.0, dpi=72).tobytes())
+        self.assertNotEqual(noisy.tobytes(), clean.tobytes())
+        with self.assertRaises(ValueError):
+            render_image(invoice, noise=0.5)
+
+    def test_generate_corpus(self):
+        """Tests that each image is written with its ground truth."""
+        directory = tempfile.mkdtemp()
+        try:
+            paths = generate_corpus(directory, 3, seed=5, noise=0.5, dpi=72)
+            self.assertEqual(len(paths), 3)
+            for path in paths:
+                self.assertTrue(os.path.exists(path))
+                truth = load_ground_truth(path)
+                self.assertIn('invoice_id', truth)
+                self.assertTrue(validate_invoice_totals(truth))
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()